@@ -3,9 +3,20 @@ import google.generativeai as genai
 import os
 import re
 from dotenv import load_dotenv
-import docx
+from doc_extraction import extract_doc_text
+from docx_extraction import extract_docx_text
 import pandas as pd
 import fitz  # PyMuPDF
+from candidate_store import CandidateStore, file_digest
+from contact_extractor import extract_identity
+from embedding_engine import configured_embeddings
+from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+from requisition_library import jd_digest, prompt_version
+from requisition_matcher import chunk_words, document_vector
+from result_pager import ResultStore, paginate
+from shortlist import ShortlistStore
+from skill_index import DEFAULT_SKILLS, SkillIndex, find_skills
+from vector_quantization import QuantizedVectorIndex
 
 # Set page configuration at the very beginning
 st.set_page_config(page_title="JD and Resume Matcher with Skills")
@@ -13,16 +24,50 @@ load_dotenv()
 
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+@st.cache_resource
+def get_candidate_store():
+    return CandidateStore()
+
+@st.cache_resource
+def get_skill_index():
+    # Built once per server from the stored skills, then updated as resumes arrive
+    return SkillIndex.build(get_candidate_store().iter_skills())
+
+@st.cache_resource
+def get_shortlists():
+    return ShortlistStore()
+
+@st.cache_resource
+def get_embeddings():
+    # Local embeddings: ranking stored resumes against a JD costs no LLM calls
+    return configured_embeddings(FastEmbedEmbeddings)
+
+def embedding_model():
+    embeddings = get_embeddings()
+    return getattr(embeddings, "model_name", None) or type(embeddings).__name__
+
+def embed_document(text):
+    """Unit vector of a resume or JD: the normalized mean of its chunk embeddings."""
+    return document_vector(get_embeddings().embed_documents(chunk_words(text) or [text]))
+
+@st.cache_resource
+def get_vector_index():
+    # int8 copy of the stored resume embeddings, loaded once per server and extended as resumes arrive
+    try:
+        return QuantizedVectorIndex.from_candidate_store(get_candidate_store(), embedding_model())
+    except ValueError:
+        # Nothing embedded yet
+        return QuantizedVectorIndex(len(embed_document("resume")), "int8")
+
+def shortlist_key(jd_content, skills_list):
+    # Scores depend on the required skills too, so each skill set gets its own shortlist
+    return prompt_version(jd_digest(jd_content), *sorted({skill.lower() for skill in skills_list}))
+
 def get_gemini_response(input_prompt, resume_content, jd_content):
     model = genai.GenerativeModel('gemini-1.5-flash')
     response = model.generate_content([input_prompt, resume_content, jd_content])
     return response.text
 
-def extract_contact_info(text):
-    phone_pattern = re.compile(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
-    phone_match = phone_pattern.search(text)
-    return phone_match.group(0) if phone_match else "N/A"
-
 def input_file_setup(uploaded_file):
     if uploaded_file is not None:
         file_type = uploaded_file.type
@@ -34,10 +79,15 @@ def input_file_setup(uploaded_file):
             except Exception as e:
                 st.error(f"Error processing PDF: {e}")
                 file_content = ""
-        elif file_type in ["application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
+        elif file_type == "application/msword":
+            try:
+                file_content = extract_doc_text(uploaded_file.read())
+            except Exception as e:
+                st.error(f"Error processing Word document: {e}")
+                file_content = ""
+        elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
             try:
-                doc = docx.Document(uploaded_file)
-                file_content = "\n".join([para.text for para in doc.paragraphs])
+                file_content = extract_docx_text(uploaded_file)
             except Exception as e:
                 st.error(f"Error processing Word document: {e}")
                 file_content = ""
@@ -63,6 +113,32 @@ def extract_skills(text, skill_list):
     
     return ", ".join(found_skills) if found_skills else "N/A"
 
+def load_resume(store, skill_index, vector_index, resume, skill_list):
+    """Candidate record for an uploaded resume; extracted and stored on its first upload only."""
+    file_hash = file_digest(resume.getvalue())
+    record = store.get(file_hash)
+    if record is None:
+        resume_content = input_file_setup(resume)
+        # Identity fields are extracted locally; the LLM is only asked to score
+        pdf_bytes = resume.getvalue() if resume.type == "application/pdf" else None
+        identity = extract_identity(resume_content, pdf_bytes)
+        if not resume_content:
+            # Failed extractions are not stored, so a later upload retries them
+            return dict(identity, file_hash=file_hash, file_name=resume.name, text="", skills=[])
+        record = store.add(file_hash, resume.name, resume_content, identity, skills=[])
+    # Index the default skills and any newly entered ones the stored record lacks
+    skills = sorted(set(record["skills"]) | set(find_skills(record["text"], DEFAULT_SKILLS + tuple(skill_list))))
+    if skills != record["skills"] or record["id"] not in skill_index:
+        store.set_skills(file_hash, skills)
+        skill_index.add(record["id"], skills)
+        record["skills"] = skills
+    # Resumes stored before embeddings were recorded get theirs on their next upload
+    if file_hash not in vector_index:
+        vector = embed_document(record["text"])
+        store.put_embedding(file_hash, embedding_model(), vector)
+        vector_index.add([file_hash], [vector])
+    return record
+
 st.header("Multi Resume Matcher with JD and skills")
 st.subheader("Upload Job Description and Resumes to Analyze Matching Scores")
 
@@ -73,7 +149,46 @@ if uploaded_jd is not None:
     jd_content = input_file_setup(uploaded_jd)
     st.write("Job Description Uploaded Successfully")
 
-uploaded_resumes = st.file_uploader("Upload Resumes (Multiple PDFs, DOC, DOCX)...", type=["pdf", "doc", "docx"], accept_multiple_files=True)
+candidate_store = get_candidate_store()
+skill_index = get_skill_index()
+resume_source = st.radio("Resumes", ["Upload resumes", "Search candidate store"], horizontal=True)
+
+uploaded_resumes = []
+stored_candidates = []
+if resume_source == "Upload resumes":
+    uploaded_resumes = st.file_uploader("Upload Resumes (Multiple PDFs, DOC, DOCX)...", type=["pdf", "doc", "docx"], accept_multiple_files=True)
+else:
+    search_mode = st.radio("Search by", ["Keywords", "Skills", "Similarity to JD"], horizontal=True)
+    if search_mode == "Keywords":
+        search_query = st.text_input("Search previously analysed resumes (e.g. kafka AND terraform):")
+    elif search_mode == "Skills":
+        search_query = st.text_input("Boolean skill query (e.g. Python AND (Spark OR Databricks) AND NOT Java):")
+    else:
+        search_query = ""
+    search_limit = st.number_input("Maximum candidates", min_value=1, max_value=500, value=50, step=10)
+    if search_mode == "Similarity to JD":
+        if jd_content:
+            vector_index = get_vector_index()
+            similar = vector_index.search(embed_document(jd_content), k=int(search_limit))
+            stored_candidates = [record for record in (candidate_store.get(file_hash) for file_hash, _ in similar) if record]
+            st.caption(f"{len(stored_candidates)} most similar of {len(vector_index)} embedded candidates")
+        else:
+            st.write("Upload a Job Description to rank stored candidates by similarity.")
+    elif search_query.strip():
+        try:
+            if search_mode == "Keywords":
+                stored_candidates = candidate_store.search(search_query, limit=int(search_limit))
+                matches = len(stored_candidates)
+            else:
+                unknown = skill_index.query_skills(search_query) - skill_index.skills
+                if unknown:
+                    st.warning(f"Not in the skill index yet: {', '.join(sorted(unknown))}")
+                candidate_ids = skill_index.query(search_query)
+                matches = len(candidate_ids)
+                stored_candidates = candidate_store.get_by_ids(candidate_ids[:int(search_limit)].tolist())
+            st.caption(f"{matches} matching candidates out of {len(candidate_store)} stored")
+        except ValueError as e:
+            st.error(str(e))
 
 skills_required = st.text_input("Enter key skills required for the job (comma-separated):")
 skills_list = [skill.strip() for skill in skills_required.split(",") if skill.strip()]
@@ -85,8 +200,10 @@ table_data = []
 if submit:
     if uploaded_jd is None:
         st.write("Please upload a Job Description to proceed.")
-    elif not uploaded_resumes:
+    elif resume_source == "Upload resumes" and not uploaded_resumes:
         st.write("Please upload at least one Resume to proceed.")
+    elif resume_source == "Search candidate store" and not stored_candidates:
+        st.write("Please enter a search that matches at least one stored candidate.")
     elif not skills_list:
         st.write("Please enter key skills required for the job.")
     else:
@@ -96,40 +213,39 @@ if submit:
         # Extract skills from JD for reference (optional, not used in table)
         jd_skills = extract_skills(jd_content, skills_list)
         
-        for resume in uploaded_resumes:
-            resume_content = input_file_setup(resume)
-            contact_info = extract_contact_info(resume_content)
+        if resume_source == "Upload resumes":
+            candidates = [load_resume(candidate_store, skill_index, get_vector_index(), resume, skills_list) for resume in uploaded_resumes]
+        else:
+            candidates = stored_candidates
+
+        shortlist_scores = []
+        for candidate in candidates:
+            resume_content = candidate["text"]
+            if not resume_content:
+                # Nothing to score: no LLM call and no row for a failed extraction
+                st.error(f"No text could be extracted from {candidate['file_name']}; it was skipped.")
+                continue
+            contact_info = ", ".join(candidate["phones"]) or "N/A"
             resume_skills = extract_skills(resume_content, skills_list)
             
             input_prompt = f"""
             Role: Resume Analyzer
             
-            Task: Analyze the compatibility between the resume and job requirements below. Format your response precisely as specified.
-            
-            Instructions:
-            1. Extract the candidate's name from the resume
-            2. Calculate a match percentage based on skills overlap and relevance
-            3. Structure your analysis in the exact format below
+            Task: Score the compatibility between the resume and job requirements below.
             
             Required Skills: {skills_list}
             
             Output Format (maintain this exact structure):
-            Name: [Full name extracted from resume]
             Match Percentage: [0-100%]
-            JD Skills: [Comma-separated list of skills found in the job description]
-            Resume Skills: [Comma-separated list of skills found in the resume]
-            Contact Number: {contact_info}
             
             Importance:
-            - Be precise in your percentage calculation
-            - Include ALL matching skills, even partial matches
-            - Return ONLY the requested information in the specified format
-            - Do not include explanations or additional text
+            - Be precise in your percentage calculation, counting partial matches
+            - Return ONLY the requested line, with no explanations or additional text
             """
             
             response = get_gemini_response(input_prompt, resume_content, jd_content)
             
-            name = resume.name  # Default to file name
+            name = candidate["name"] or candidate["file_name"]  # Default to file name
             match_percentage = "N/A"
             
             if response:
@@ -138,13 +254,60 @@ if submit:
                     line_lower = line.lower()
                     if "match percentage" in line_lower:
                         match_percentage = line.split(":")[-1].strip()
-                    elif "name:" in line_lower and line_lower.index("name:") == 0:
-                        extracted_name = line.split(":", 1)[-1].strip()
-                        if extracted_name and extracted_name != "[Full name extracted from resume]":
-                            name = extracted_name  # Use extracted name if available
             
-            table_data.append([name, match_percentage, user_entered_skills, resume_skills, contact_info])
+            score = re.search(r"\d+(?:\.\d+)?", match_percentage)
+            if score and candidate.get("id") is not None:
+                shortlist_scores.append((candidate["id"], float(score.group())))
+            
+            table_data.append([
+                name,
+                match_percentage,
+                user_entered_skills,
+                resume_skills,
+                contact_info,
+                ", ".join(candidate["emails"]) or "N/A",
+                ", ".join(candidate["linkedin"] + candidate["github"]) or "N/A",
+                candidate["location"] or "N/A",
+            ])
         
-        df = pd.DataFrame(table_data, columns=["Name", "Match Percentage", "User-Entered Skills", "Skills as per Resume", "Contact Number"])
-        st.subheader("Resume Analysis Results")
-        st.dataframe(df)
+        # Only this batch is merged into the requisition's persisted top-K shortlist
+        get_shortlists().update_many(shortlist_key(jd_content, skills_list), shortlist_scores)
+        
+        df = pd.DataFrame(table_data, columns=["Name", "Match Percentage", "User-Entered Skills", "Skills as per Resume", "Contact Number", "Email", "Profiles", "Location"])
+        df.insert(2, "Score", pd.to_numeric(df["Match Percentage"].str.extract(r"(\d+(?:\.\d+)?)")[0], errors="coerce"))
+        # Kept across reruns so paging and sorting do not re-run the analysis
+        st.session_state["resume_results"] = ResultStore.from_pandas(df)
+
+if "resume_results" in st.session_state:
+    st.subheader("Resume Analysis Results")
+    page = paginate(
+        st.session_state["resume_results"], key="resume_results",
+        sort_columns=["Score", "Name", "Location"],
+        search_columns=["Name", "Skills as per Resume", "Email", "Location"],
+        default_sort="Score",
+    )
+    st.dataframe(page, hide_index=True)
+
+if jd_content and skills_list:
+    shortlists = get_shortlists()
+    jd_hash = shortlist_key(jd_content, skills_list)
+    shortlist_scores = dict(shortlists.shortlist(jd_hash))
+    if shortlist_scores:
+        st.subheader(f"Shortlist for this Job Description and these skills (top {shortlists.size})")
+        shortlisted = candidate_store.get_by_ids(shortlist_scores)
+        st.dataframe(pd.DataFrame([
+            {
+                "Name": candidate["name"] or candidate["file_name"],
+                "Score": shortlist_scores[candidate["id"]],
+                "Email": ", ".join(candidate["emails"]) or "N/A",
+                "Location": candidate["location"] or "N/A",
+            }
+            for candidate in shortlisted
+        ]), hide_index=True)
+        st.caption(f"{shortlists.scored(jd_hash)} candidates scored against this Job Description and these skills so far")
+        names = {candidate["id"]: candidate["name"] or candidate["file_name"] for candidate in shortlisted}
+        withdrawn = st.multiselect("Withdraw candidates from all shortlists", list(names), format_func=names.get)
+        if st.button("Withdraw", disabled=not withdrawn):
+            for candidate_id in withdrawn:
+                shortlists.withdraw(candidate_id)
+            st.rerun()
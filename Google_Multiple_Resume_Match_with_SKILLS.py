@@ -5,8 +5,11 @@ import os
 import re
 from dotenv import load_dotenv # type: ignore
 import fitz # type: ignore
-import docx # type: ignore
 import pandas as pd # type: ignore
+from doc_extraction import extract_doc_text
+from docx_extraction import extract_docx_text
+from minhash_dedup import duplicate_groups, word_shingle_hashes
+from result_pager import ResultStore, paginate
 
 
 # Set page configuration at the very beginning
@@ -16,6 +19,9 @@ load_dotenv()
 
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+# Resumes whose word 5-gram Jaccard similarity reaches this are treated as copies
+DUPLICATE_THRESHOLD = 0.8
+
 def get_gemini_response(input_prompt, resume_content):
     model = genai.GenerativeModel('gemini-1.5-flash')
     response = model.generate_content([input_prompt, resume_content])
@@ -30,14 +36,28 @@ def input_file_setup(uploaded_file):
     if uploaded_file is not None:
         file_type = uploaded_file.type
         if file_type == "application/pdf":
-            document = fitz.open(stream=uploaded_file.read(), filetype="pdf")
-            text_parts = [page.get_text() for page in document]
-            file_content = " ".join(text_parts)
-        elif file_type in ["application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
-            doc = docx.Document(uploaded_file)
-            file_content = "\n".join([para.text for para in doc.paragraphs])
+            try:
+                document = fitz.open(stream=uploaded_file.read(), filetype="pdf")
+                text_parts = [page.get_text() for page in document]
+                file_content = " ".join(text_parts)
+            except Exception as e:
+                st.error(f"Error processing PDF {uploaded_file.name}: {e}")
+                file_content = ""
+        elif file_type == "application/msword":
+            try:
+                file_content = extract_doc_text(uploaded_file.read())
+            except Exception as e:
+                st.error(f"Error processing Word document {uploaded_file.name}: {e}")
+                file_content = ""
+        elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+            try:
+                file_content = extract_docx_text(uploaded_file)
+            except Exception as e:
+                st.error(f"Error processing Word document {uploaded_file.name}: {e}")
+                file_content = ""
         else:
-            raise ValueError("Unsupported file type")
+            st.error(f"Unsupported file type: {uploaded_file.name}")
+            file_content = ""
         return file_content
     else:
         return ""
@@ -67,14 +87,25 @@ if submit:
     elif not skills_list:
         st.write("Please enter key skills for comparison.")
     else:
-        for resume in uploaded_resumes:
-            resume_content = input_file_setup(resume)
+        resume_texts = [input_file_setup(resume) for resume in uploaded_resumes]
+        # Resubmitted copies of the same resume are scored once, through their first upload
+        groups = duplicate_groups(word_shingle_hashes(resume_texts), DUPLICATE_THRESHOLD)
+        skipped = len(uploaded_resumes) - len(groups)
+        if skipped:
+            st.info(f"{skipped} near-duplicate resume(s) were merged into their first upload and not scored again.")
+
+        for group in groups:
+            resume = uploaded_resumes[group[0]]
+            resume_content = resume_texts[group[0]]
+            if not resume_content:
+                # Nothing to score: no LLM call and no row for a failed extraction
+                st.error(f"No text could be extracted from {resume.name}; it was skipped.")
+                continue
+            copies = ", ".join(uploaded_resumes[index].name for index in group[1:])
             contact_info = extract_contact_info(resume_content)
             resume_skills = extract_skills(resume_content, skills_list)
             
             input_prompt = f"""
-            ```python
-input_prompt = f"""
 Role: Expert Resume Analyzer and Skills Matcher
 
 Context: You are analyzing a resume to determine how well it matches with a specific set of required skills: {skills_list}.
@@ -115,8 +146,19 @@ Candidate Assessment:
                     if "match percentage" in line_lower:
                         match_percentage = line.split(":")[-1].strip()
             
-            table_data.append([name, match_percentage, skills_required, resume_skills, contact_info])
+            table_data.append([name, match_percentage, skills_required, resume_skills, contact_info, copies])
         
-        df = pd.DataFrame(table_data, columns=["Name", "Match Percentage", "User-Entered Skills", "Skills as per Resume", "Contact Number"])
-        st.subheader("Resume Analysis Results")
-        st.dataframe(df)
+        df = pd.DataFrame(table_data, columns=["Name", "Match Percentage", "User-Entered Skills", "Skills as per Resume", "Contact Number", "Duplicate Copies"])
+        df.insert(2, "Score", pd.to_numeric(df["Match Percentage"].str.extract(r"(\d+(?:\.\d+)?)")[0], errors="coerce"))
+        # Kept across reruns so paging and sorting do not re-run the analysis
+        st.session_state["resume_results"] = ResultStore.from_pandas(df)
+
+if "resume_results" in st.session_state:
+    st.subheader("Resume Analysis Results")
+    page = paginate(
+        st.session_state["resume_results"], key="resume_results",
+        sort_columns=["Score", "Name"],
+        search_columns=["Name", "Skills as per Resume", "Duplicate Copies"],
+        default_sort="Score",
+    )
+    st.dataframe(page, hide_index=True)
@@ -1,18 +1,34 @@
 
 import streamlit as st
 import os
-import io
+import uuid
 import fitz  # PyMuPDF
-import docx  # python-docx
 import pandas as pd
 from dotenv import load_dotenv
 
 # LangChain / RAG imports
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
 from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.documents import Document
+
+from doc_extraction import extract_doc_text
+from docx_extraction import extract_docx_text
+from pdf_extraction import extract_pdf_text
+from qbr_summarization import estimate_tokens
+from context_assembly import DEFAULT_CONTEXT_TOKENS, assemble_context
+from section_chunker import chunk_document
+from upload_handling import SpooledUpload, measure_memory
+from embedding_engine import configured_embeddings
+from vector_collections import CollectionPool, collection_name, estimate_collection_bytes
+from requisition_library import (
+    CLARIFICATION_QUESTIONS,
+    SUMMARY,
+    CachedChunkEmbeddings,
+    RequisitionLibrary,
+    prompt_version,
+)
 
 # Semantic skill matcher imports
 from semantic_skill_matcher import SemanticSkillMatcher
@@ -37,6 +53,18 @@ if not GROQ_API_KEY:
         "GROQ_API_KEY not found. Set it in Streamlit Secrets or .env"
     )
 
+# Context windows of the Groq models (tokens); prompt + context + answer must fit
+MODEL_CONTEXT_TOKENS = {
+    "llama-3.3-70b-versatile": 131_072,
+    "llama-3.1-70b-versatile": 131_072,
+    "mixtral-8x7b-32768": 32_768,
+    "gemma2-27b-it": 8_192,
+}
+# Least room left for the retrieved context once the prompt and the answer are reserved
+MIN_CONTEXT_TOKENS = 1_000
+# Room kept for the prompt templates (the longest is ~450 tokens) when capping the answer
+PROMPT_RESERVE_TOKENS = 600
+
 # Sidebar controls (optional)
 st.set_page_config(page_title="Resume Expert (RAG + LangChain + Groq)", layout="wide")
 with st.sidebar:
@@ -57,6 +85,11 @@ with st.sidebar:
     max_tokens = st.number_input("Max tokens", min_value=256, max_value=8192, value=3000, step=128, key="llm_max_tokens")
     k_retrieval = st.slider("Retriever k", 2, 12, 8, 1, key="retriever_k")
     search_type = st.selectbox("Retriever search type", ["mmr", "similarity"], index=0, key="search_type")
+    context_tokens = st.number_input(
+        "Context budget (tokens)", min_value=500, max_value=32_000, value=DEFAULT_CONTEXT_TOKENS, step=500,
+        help="Retrieved chunks are deduplicated and cut to this many tokens per prompt",
+        key="context_tokens",
+    )
     
     # Evidence-Backed Skill Validation controls (FR 6)
     st.divider()
@@ -92,6 +125,12 @@ with st.sidebar:
     k_retrieval = st.slider("Retriever k", 2, 12, 8, 1)
     search_type = st.selectbox("Retriever search type", ["mmr", "similarity"], index=0)
 
+# The answer may not crowd the context out of small windows (gemma2: 8,192 tokens in all)
+model_window = MODEL_CONTEXT_TOKENS.get(model_name, 8_192)
+if max_tokens > model_window - PROMPT_RESERVE_TOKENS - MIN_CONTEXT_TOKENS:
+    max_tokens = model_window - PROMPT_RESERVE_TOKENS - MIN_CONTEXT_TOKENS
+    st.sidebar.warning(f"Max tokens capped at {max_tokens:,} to leave room for context in the {model_window:,}-token window of {model_name}.")
+
 # Initialize LLM (Groq via LangChain)
 llm = ChatGroq(
     api_key=GROQ_API_KEY,
@@ -101,83 +140,130 @@ llm = ChatGroq(
 )
 
 # ==================== FILE HELPERS ====================
-def extract_text_from_pdf(file_bytes: bytes) -> str:
+# Extraction budget: CVs/JDs rarely carry signal past this point, only boilerplate
+PDF_MAX_PAGES = 40
+PDF_MAX_CHARS = 200_000
+
+def extract_text_from_pdf(source) -> str:
+    """source: PDF bytes, or a temp file path for large (spilled) uploads."""
     try:
-        document = fitz.open(stream=file_bytes, filetype="pdf")
-        text_parts = [page.get_text() for page in document]
-        return " ".join(text_parts).strip()
+        # Line breaks are kept: the chunker reads headings and roles from them
+        text, stats = extract_pdf_text(
+            source, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS, page_separator="\n"
+        )
     except Exception as e:
         raise ValueError(f"Failed to open PDF: {e}")
-
-def extract_text_from_docx(file_bytes: bytes) -> str:
+    if stats["page_timings"]:
+        slowest = max(stats["page_timings"], key=lambda t: t["seconds"])
+        st.caption(
+            f"📄 Extracted {stats['extracted_pages']}/{stats['total_pages']} pages in {stats['seconds']:.2f}s "
+            f"(slowest: page {slowest['page']}, {slowest['seconds']:.2f}s)"
+        )
+    if stats["stopped_early"]:
+        st.info(f"Long PDF: only the first {stats['extracted_pages']} pages were used.")
+    return text
+
+def extract_text_from_docx(source) -> str:
     try:
-        d = docx.Document(io.BytesIO(file_bytes))
-        text_parts = [p.text for p in d.paragraphs]
-        return " ".join(text_parts).strip()
+        # Streams the XML directly; includes tables, headers/footers and text boxes
+        return extract_docx_text(source, separator="\n").strip()
     except Exception as e:
         raise ValueError(f"Failed to open DOCX: {e}")
 
+def extract_text_from_doc(file_bytes: bytes) -> str:
+    try:
+        # Native Word 97-2003 (OLE2) parser, no conversion step needed
+        return extract_doc_text(file_bytes).strip()
+    except Exception as e:
+        raise ValueError(f"Failed to open DOC: {e}")
+
 def extract_text_from_txt(file_bytes: bytes) -> str:
     try:
         return file_bytes.decode("utf-8").strip()
     except Exception as e:
         raise ValueError(f"Failed to decode TXT file: {e}")
 
-def process_file(uploaded_file) -> str:
-    if uploaded_file is None:
-        raise FileNotFoundError("No file uploaded")
-
-    file_bytes = uploaded_file.read()
-    if not file_bytes:
-        raise ValueError("Uploaded file is empty or unreadable.")
-
-    ext = uploaded_file.name.split(".")[-1].lower()
+def extract_upload_text(upload: SpooledUpload, ext: str) -> str:
     if ext == "pdf":
-        return extract_text_from_pdf(file_bytes)
+        return extract_text_from_pdf(upload.source)
     elif ext == "docx":
-        return extract_text_from_docx(file_bytes)
+        return extract_text_from_docx(upload.source)
     elif ext == "doc":
-        st.warning("DOC has limited support. Please convert to DOCX or PDF for best results.")
         try:
-            return extract_text_from_docx(file_bytes)
+            return extract_text_from_doc(upload.buffer())
         except Exception as e:
             st.error(f"Error processing DOC file: {e}")
-            return "Error processing DOC file. Please convert to DOCX or PDF for better results."
+            return ""
     elif ext == "txt":
-        return extract_text_from_txt(file_bytes)
+        return extract_text_from_txt(bytes(upload.buffer()))
     else:
         raise ValueError(f"Unsupported file format: {ext}")
 
+def process_file(uploaded_file) -> str:
+    """
+    Extracts text with bounded memory: large uploads are spilled to a temp file,
+    oversized ones are rejected, and all handles are closed before returning.
+    """
+    if uploaded_file is None:
+        raise FileNotFoundError("No file uploaded")
+
+    ext = uploaded_file.name.split(".")[-1].lower()
+    memory_stats = st.session_state.setdefault("memory_stats", {})
+    with measure_memory(memory_stats) as checkpoint:
+        with SpooledUpload(uploaded_file) as upload:
+            text = extract_upload_text(upload, ext)
+            checkpoint()
+    return text
+
 # ==================== RAG INDEX BUILD ====================
-def build_vectorstore(jd_text: str, resume_text: str):
+@st.cache_resource
+def get_requisition_library():
+    return RequisitionLibrary()
+
+@st.cache_resource
+def get_embeddings():
+    # Loaded once per server; EMBEDDING_MODEL_DIR switches to the int8 ONNX engine
+    return configured_embeddings(FastEmbedEmbeddings)
+
+@st.cache_resource
+def get_collection_pool():
+    # One collection per document pair, shared by the sessions indexing it and
+    # dropped when idle or over VECTOR_COLLECTIONS_MAX_MB
+    return CollectionPool(drop=lambda vs: vs.delete_collection())
+
+def build_vectorstore(jd_text: str, resume_text: str, collection_name: str):
     """
-    Builds a single Chroma vectorstore containing both JD and Resume chunks with metadata.
-    In-memory for simplicity (ephemeral). Add persist_directory for persistence if needed.
+    Builds a Chroma vectorstore containing both JD and Resume chunks with metadata.
+    In-memory (ephemeral); the collection name must be unique to the documents, as
+    every session of the server shares the same Chroma backend.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1200,
-        chunk_overlap=150,
-        separators=["\n\n", "\n", " ", ""],
-    )
     docs = []
 
-    # NOTE: No need to import Document explicitly; create_documents returns Documents
+    # One chunk per section / role, no overlap; metadata: source, section, heading, chunk
     if jd_text:
-        jd_docs = splitter.create_documents([jd_text], metadatas=[{"source": "jd"}])
+        jd_docs = [Document(page_content=text, metadata=metadata)
+                   for text, metadata in chunk_document(jd_text, "jd")]
         docs.extend(jd_docs)
     if resume_text:
-        resume_docs = splitter.create_documents([resume_text], metadatas=[{"source": "resume"}])
+        resume_docs = [Document(page_content=text, metadata=metadata)
+                       for text, metadata in chunk_document(resume_text, "resume")]
         docs.extend(resume_docs)
 
     if not docs:
         return None
 
-    embeddings = FastEmbedEmbeddings()  # lightweight local embeddings, no external calls
+    embeddings = get_embeddings()  # lightweight local embeddings, no external calls
+    if jd_text:
+        # JD chunk vectors are shared by every resume evaluated against this JD
+        jd_chunks = [doc.page_content for doc in jd_docs]
+        jd_vectors = get_requisition_library().requisition(jd_text).chunk_embeddings(
+            embeddings.model_name, jd_chunks, embeddings.embed_documents
+        )
+        embeddings = CachedChunkEmbeddings(embeddings, zip(jd_chunks, jd_vectors))
     vs = Chroma.from_documents(
         documents=docs,
         embedding=embeddings,
-        collection_name="jobfit_rag",
-        # persist_directory="./chroma_jobfit"  # uncomment to persist across runs
+        collection_name=collection_name,
     )
     return vs
 
@@ -191,8 +277,9 @@ def make_retriever(vectorstore, scope="both", k=8, search_type="mmr"):
     retriever = vectorstore.as_retriever(search_type=search_type, search_kwargs=kwargs)
     return retriever
 
-def retrieve_context(vectorstore, scope: str, query: str, k: int = 8, search_type: str = "mmr") -> str:
+def retrieve_chunks(vectorstore, scope: str, query: str, k: int = 8, search_type: str = "mmr") -> list:
     """
+    Chunk texts in retrieval order.
     Compatible with LangChain 0.3+ retrievers (Runnable).
     Falls back to get_relevant_documents for older versions.
     """
@@ -203,7 +290,28 @@ def retrieve_context(vectorstore, scope: str, query: str, k: int = 8, search_typ
     except AttributeError:
         # Older retrievers use .get_relevant_documents(query)
         docs = retriever.get_relevant_documents(query)
-    return "\n\n".join([d.page_content for d in docs])
+    return [d.page_content for d in docs]
+
+def build_context(prompt_template: str, *sections) -> str:
+    """
+    Deduplicated context from the retrieved chunks of each section (JD, resume),
+    within the token budget left by the prompt and the answer in the model's window.
+    """
+    room = model_window - max_tokens - estimate_tokens(prompt_template)
+    if room < MIN_CONTEXT_TOKENS:
+        st.error(
+            f"Only {max(room, 0):,} tokens of {model_name}'s {model_window:,}-token window are left for context; "
+            "lower Max tokens or choose a model with a larger window."
+        )
+        st.stop()
+    budget = min(context_tokens, room)
+    context, stats = assemble_context(sections, budget_tokens=budget)
+    st.caption(
+        f"🧩 Context: {stats['output_tokens']:,} of {stats['input_tokens']:,} tokens sent ({stats['ratio']:.0%}); "
+        f"dropped {stats['duplicates'] + stats['near_duplicates']} repeated and {stats['boilerplate']} boilerplate "
+        f"sentences{', cut to budget' if stats['truncated'] else ''}"
+    )
+    return context
 
 def call_llm_with_context(prompt_template: str, context: str, **fmt_vars) -> str:
     """
@@ -425,6 +533,13 @@ if uploaded_resume is not None:
     st.success(f"✅ {file_type} Resume uploaded")
     resume_content = process_file(uploaded_resume)
 
+if "memory_stats" in st.session_state:
+    mem = st.session_state.memory_stats
+    st.sidebar.caption(
+        f"🧠 Process RSS during your {mem['uploads']} extractions: peak +{mem['peak_mb']:.0f} MB, "
+        f"steady +{mem['steady_mb']:.0f} MB, now {mem['rss_mb']:.0f} MB (includes other sessions)"
+    )
+
 # Controls
 col1, col2, col3 = st.columns(3)
 with col1:
@@ -444,22 +559,25 @@ input_promp = st.text_input("Queries: Feel Free to Ask here", key="custom_query_
 submit_general_query = st.button("Answer My Query", key="submit_general_query")
 
 # ==================== VECTORSTORE CACHE ====================
-if "vectorstore" not in st.session_state:
-    st.session_state.vectorstore = None
-if "indexed_key" not in st.session_state:
-    st.session_state.indexed_key = None
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+st.session_state.vectorstore = None
 
-def compute_index_key(jd_text, resume_text):
-    # Use hashes to detect content changes and rebuild index
-    return f"{hash(jd_text) if jd_text else 0}-{hash(resume_text) if resume_text else 0}"
+def index_documents(name):
+    with st.spinner("🔎 Indexing documents for retrieval..."):
+        vs = build_vectorstore(jd_content, resume_content, collection_name=name)
+    return vs, estimate_collection_bytes(len(jd_content or "") + len(resume_content or ""))
 
 if jd_content or resume_content:
-    key_now = compute_index_key(jd_content, resume_content)
-    if st.session_state.vectorstore is None or st.session_state.indexed_key != key_now:
-        with st.spinner("🔎 Indexing documents for retrieval..."):
-            vs = build_vectorstore(jd_content, resume_content)
-            st.session_state.vectorstore = vs
-            st.session_state.indexed_key = key_now
+    # Acquired on every run: keeps this session's collection alive, and rebuilds
+    # it if it was evicted
+    st.session_state.vectorstore = get_collection_pool().acquire(
+        st.session_state.session_id,
+        collection_name(get_embeddings().model_name, jd_content, resume_content),
+        index_documents,
+    )
+else:
+    get_collection_pool().release(st.session_state.session_id)
 
 def ensure_vs():
     if st.session_state.vectorstore is None:
@@ -473,9 +591,11 @@ if submit_recruiter:
         vs = ensure_vs()
         if vs:
             with st.spinner("Analyzing alignment..."):
-                ctx_jd = retrieve_context(vs, "jd", "role requirements, responsibilities, skills, experience", k=k_retrieval, search_type=search_type)
-                ctx_cv = retrieve_context(vs, "resume", "candidate skills, projects, responsibilities, experience", k=k_retrieval, search_type=search_type)
-                context = ctx_jd + "\n\n---\n\n" + ctx_cv
+                context = build_context(
+                    PROMPT_RECRUITER,
+                    retrieve_chunks(vs, "jd", "role requirements, responsibilities, skills, experience", k=k_retrieval, search_type=search_type),
+                    retrieve_chunks(vs, "resume", "candidate skills, projects, responsibilities, experience", k=k_retrieval, search_type=search_type),
+                )
                 answer = call_llm_with_context(PROMPT_RECRUITER, context)
             st.subheader("Technical Recruiter Analysis")
             st.write(answer)
@@ -563,9 +683,11 @@ elif submit_technical_questions:
         vs = ensure_vs()
         if vs:
             with st.spinner("Generating technical questions..."):
-                ctx_jd = retrieve_context(vs, "jd", "technical stack, tools, methodologies, domain", k=k_retrieval, search_type=search_type)
-                ctx_cv = retrieve_context(vs, "resume", "skills, tools, technologies, project details", k=k_retrieval, search_type=search_type)
-                context = ctx_jd + "\n\n---\n\n" + ctx_cv
+                context = build_context(
+                    PROMPT_TECHNICAL_Q,
+                    retrieve_chunks(vs, "jd", "technical stack, tools, methodologies, domain", k=k_retrieval, search_type=search_type),
+                    retrieve_chunks(vs, "resume", "skills, tools, technologies, project details", k=k_retrieval, search_type=search_type),
+                )
                 answer = call_llm_with_context(PROMPT_TECHNICAL_Q, context)
             st.subheader("Technical Questions")
             st.write(answer)
@@ -577,9 +699,11 @@ elif submit_coding_questions:
         vs = ensure_vs()
         if vs:
             with st.spinner("Generating coding questions..."):
-                ctx_jd = retrieve_context(vs, "jd", "coding tasks, programming languages, data processing, testing", k=k_retrieval, search_type=search_type)
-                ctx_cv = retrieve_context(vs, "resume", "coding experience, problems solved, libraries, pipelines, testing", k=k_retrieval, search_type=search_type)
-                context = ctx_jd + "\n\n---\n\n" + ctx_cv
+                context = build_context(
+                    PROMPT_CODING_Q,
+                    retrieve_chunks(vs, "jd", "coding tasks, programming languages, data processing, testing", k=k_retrieval, search_type=search_type),
+                    retrieve_chunks(vs, "resume", "coding experience, problems solved, libraries, pipelines, testing", k=k_retrieval, search_type=search_type),
+                )
                 answer = call_llm_with_context(PROMPT_CODING_Q, context)
             st.subheader("Coding Questions")
             st.write(answer)
@@ -591,9 +715,11 @@ elif submit_domain:
         vs = ensure_vs()
         if vs:
             with st.spinner("Running domain-fit analysis..."):
-                ctx_jd = retrieve_context(vs, "jd", "domain, business context, analytics, industry", k=k_retrieval, search_type=search_type)
-                ctx_cv = retrieve_context(vs, "resume", "domain experience, projects, industry exposure", k=k_retrieval, search_type=search_type)
-                context = ctx_jd + "\n\n---\n\n" + ctx_cv
+                context = build_context(
+                    PROMPT_DOMAIN,
+                    retrieve_chunks(vs, "jd", "domain, business context, analytics, industry", k=k_retrieval, search_type=search_type),
+                    retrieve_chunks(vs, "resume", "domain experience, projects, industry exposure", k=k_retrieval, search_type=search_type),
+                )
                 answer = call_llm_with_context(PROMPT_DOMAIN, context)
             st.subheader("Domain Expert Analysis")
             st.write(answer)
@@ -605,9 +731,11 @@ elif submit_manager:
         vs = ensure_vs()
         if vs:
             with st.spinner("Running technical-fit analysis..."):
-                ctx_jd = retrieve_context(vs, "jd", "required skills and years of experience, tooling, architecture", k=k_retrieval, search_type=search_type)
-                ctx_cv = retrieve_context(vs, "resume", "skills with experience, projects, responsibilities", k=k_retrieval, search_type=search_type)
-                context = ctx_jd + "\n\n---\n\n" + ctx_cv
+                context = build_context(
+                    PROMPT_MANAGER,
+                    retrieve_chunks(vs, "jd", "required skills and years of experience, tooling, architecture", k=k_retrieval, search_type=search_type),
+                    retrieve_chunks(vs, "resume", "skills with experience, projects, responsibilities", k=k_retrieval, search_type=search_type),
+                )
                 answer = call_llm_with_context(PROMPT_MANAGER, context)
             st.subheader("Technical Manager Analysis")
             st.write(answer)
@@ -619,8 +747,18 @@ elif submit_jd_summarization:
         vs = ensure_vs()
         if vs:
             with st.spinner("Summarizing JD..."):
-                context = retrieve_context(vs, "jd", "summarize job description responsibilities skills qualifications", k=k_retrieval, search_type=search_type)
-                answer = call_llm_with_context(PROMPT_JD_SUMMARY, context)
+                # JD-only: computed once per JD and settings, reused by every session
+                answer = get_requisition_library().requisition(jd_content).artifact(
+                    SUMMARY,
+                    prompt_version(model_name, temperature, max_tokens, k_retrieval, search_type, context_tokens, PROMPT_JD_SUMMARY),
+                    lambda: call_llm_with_context(
+                        PROMPT_JD_SUMMARY,
+                        build_context(
+                            PROMPT_JD_SUMMARY,
+                            retrieve_chunks(vs, "jd", "summarize job description responsibilities skills qualifications", k=k_retrieval, search_type=search_type),
+                        ),
+                    ),
+                )
             st.subheader("Job Description Summary")
             st.write(answer)
     else:
@@ -631,8 +769,17 @@ elif submit_jd_clarification:
         vs = ensure_vs()
         if vs:
             with st.spinner("Drafting clarification questions..."):
-                context = retrieve_context(vs, "jd", "technical scope, tools, platforms, expectations, project details", k=k_retrieval, search_type=search_type)
-                answer = call_llm_with_context(PROMPT_JD_CLARIFICATION, context)
+                answer = get_requisition_library().requisition(jd_content).artifact(
+                    CLARIFICATION_QUESTIONS,
+                    prompt_version(model_name, temperature, max_tokens, k_retrieval, search_type, context_tokens, PROMPT_JD_CLARIFICATION),
+                    lambda: call_llm_with_context(
+                        PROMPT_JD_CLARIFICATION,
+                        build_context(
+                            PROMPT_JD_CLARIFICATION,
+                            retrieve_chunks(vs, "jd", "technical scope, tools, platforms, expectations, project details", k=k_retrieval, search_type=search_type),
+                        ),
+                    ),
+                )
             st.subheader("JD Clarification Questions")
             st.write(answer)
     else:
@@ -643,7 +790,10 @@ elif submit_skill_analysis:
         vs = ensure_vs()
         if vs:
             with st.spinner("Analyzing top skills in the resume..."):
-                context = retrieve_context(vs, "resume", f"{top_skills}. roles, projects, responsibilities, dates, durations", k=k_retrieval, search_type=search_type)
+                context = build_context(
+                    PROMPT_SKILL_ANALYST,
+                    retrieve_chunks(vs, "resume", f"{top_skills}. roles, projects, responsibilities, dates, durations", k=k_retrieval, search_type=search_type),
+                )
                 answer = call_llm_with_context(PROMPT_SKILL_ANALYST, context, top_skills=top_skills)
             st.subheader("Top Skill Analysis")
             st.write(answer)
@@ -655,9 +805,11 @@ elif submit_general_query:
         vs = ensure_vs()
         if vs:
             with st.spinner("Answering your query..."):
-                ctx_jd = retrieve_context(vs, "jd", input_promp or "requirements and skills", k=max(2, k_retrieval - 2), search_type=search_type) if jd_content else ""
-                ctx_cv = retrieve_context(vs, "resume", input_promp or "candidate skills and projects", k=max(2, k_retrieval - 2), search_type=search_type) if resume_content else ""
-                context = (ctx_jd + "\n\n---\n\n" + ctx_cv).strip()
+                context = build_context(
+                    PROMPT_GENERAL_Q,
+                    retrieve_chunks(vs, "jd", input_promp or "requirements and skills", k=max(2, k_retrieval - 2), search_type=search_type) if jd_content else [],
+                    retrieve_chunks(vs, "resume", input_promp or "candidate skills and projects", k=max(2, k_retrieval - 2), search_type=search_type) if resume_content else [],
+                )
                 answer = call_llm_with_context(PROMPT_GENERAL_Q, context, user_query=input_promp or "Provide insights based on the context.")
             st.subheader("Query Response")
             st.write(answer)
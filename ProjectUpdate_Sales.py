@@ -1,8 +1,17 @@
 import streamlit as st
-import pandas as pd
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
+from qbr_ingestion import file_digest, read_qbr_csv
+from qbr_summarization import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DEFAULT_ROWS_PER_BATCH,
+    format_batch,
+    generate_summaries,
+    pack_batches,
+    parse_batch_response,
+)
 
 # Load environment
 load_dotenv()
@@ -22,18 +31,45 @@ def format_summary(project_name, summary_html):
     </div>
     """
 
-# Generate summary using Gemini
+# One Gemini client for the session instead of one per row
+@st.cache_resource
+def get_model():
+    return genai.GenerativeModel("gemini-1.5-flash")
+
+model = get_model()
+
+def format_error(error):
+    return f"<p style='color:red;'>Error: {str(error)}</p>"
+
+# Generate summary using Gemini (raises on failure; the batch engine retries)
 def get_project_summary(text):
-    try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        prompt = (
-            "Summarize this employee's QBR project in 4-5 concise bullet points using <ul><li> HTML tags. "
-            "Include goals, tech skills used, key achievements, and value delivered:"
-        )
-        response = model.generate_content([prompt + "\n\n" + text])
-        return response.text
-    except Exception as e:
-        return f"<p style='color:red;'>Error: {str(e)}</p>"
+    prompt = (
+        "Summarize this employee's QBR project in 4-5 concise bullet points using <ul><li> HTML tags. "
+        "Include goals, tech skills used, key achievements, and value delivered:"
+    )
+    response = model.generate_content([prompt + "\n\n" + text])
+    return response.text
+
+BATCH_PROMPT = (
+    "Summarize each of the following employee QBR project records in 4-5 concise bullet points "
+    "using <ul><li> HTML tags. Include goals, tech skills used, key achievements, and value delivered. "
+    "Respond with only a JSON object that maps each record number to its HTML summary, "
+    'for example {"1": "<ul><li>...</li></ul>", "2": "<ul><li>...</li></ul>"}.'
+)
+
+# Summarize several rows in one request (raises on failure; the batch engine retries)
+def get_batch_summaries(batch):
+    response = model.generate_content(
+        [BATCH_PROMPT + "\n\n" + format_batch(batch)],
+        generation_config={"response_mime_type": "application/json"},
+    )
+    # Rows the model skipped are left out; the caller requests them on their own
+    return parse_batch_response(response.text, batch)
+
+# Parsed once per file content; reruns reuse the same (read-only) frame
+@st.cache_resource(show_spinner="Parsing CSV...", max_entries=4)
+def load_qbr_frame(file_hash, _file_bytes):
+    return read_qbr_csv(_file_bytes)
 
 # Streamlit UI
 st.set_page_config(page_title="QBR Summary Generator", layout="centered")
@@ -42,9 +78,32 @@ st.title("📊 Project Summary for Sales")
 uploaded_file = st.file_uploader("Upload the QBR CSV file", type=["csv"])
 
 if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file)
+    file_bytes = uploaded_file.getvalue()
+    file_hash = file_digest(file_bytes)
+    df = load_qbr_frame(file_hash, file_bytes)
     st.success("✅ File uploaded!")
 
+    # Generation settings
+    st.sidebar.header("⚡ Generation Settings")
+    batch_rows = st.sidebar.checkbox(
+        "Summarize several rows per request", value=True,
+        help="Fewer, larger Gemini calls; much faster for files with many short rows"
+    )
+    rows_per_batch = st.sidebar.slider(
+        "Rows per request", min_value=2, max_value=25, value=DEFAULT_ROWS_PER_BATCH,
+        disabled=not batch_rows
+    )
+    max_parallel_requests = st.sidebar.number_input(
+        "Parallel requests", min_value=1, max_value=32, value=DEFAULT_MAX_WORKERS,
+        help="How many Gemini calls run at the same time"
+    )
+    requests_per_minute = st.sidebar.number_input(
+        "Requests per minute", min_value=1, max_value=2000, value=DEFAULT_REQUESTS_PER_MINUTE,
+        help="Stay under your Gemini quota"
+    )
+
+    row_texts = {}
+    row_titles = {}
     for idx, row in df.iterrows():
         employee_name = row.get("Created By", "N/A")
         team_lead = row.get("Team_Lead", "")
@@ -61,7 +120,58 @@ if uploaded_file is not None:
         Achievements: {achievements}
         Value Add: {value_add}
         """
+        row_texts[idx] = combined_text
+        row_titles[idx] = project_name
+
+    def run(work, summarize):
+        # Every request, including single-row retries, goes through the shared rate limiter
+        return generate_summaries(
+            work, summarize, max_workers=max_parallel_requests, requests_per_minute=requests_per_minute
+        )
+
+    # Settings changes rerun the script; only the button spends Gemini calls
+    if st.button("🚀 Generate Summaries", type="primary"):
+        progress_bar = st.progress(0)
+        # One placeholder per row keeps cards in file order while requests finish out of order
+        placeholders = {idx: st.empty() for idx in row_texts}
+        results = {}
+        failed_rows = 0
+
+        def show(idx, summary_html):
+            results[idx] = summary_html
+            placeholders[idx].markdown(format_summary(row_titles[idx], summary_html), unsafe_allow_html=True)
+            progress_bar.progress(len(results) / len(row_texts), text=f"{len(results)}/{len(row_texts)} rows summarized")
+
+        pending = row_texts
+        if batch_rows:
+            batches = pack_batches(row_texts, rows_per_batch)
+            st.caption(f"📦 {len(row_texts)} rows in {len(batches)} requests")
+            pending = {}
+            for batch_index, _, summaries, error in run(dict(enumerate(batches)), get_batch_summaries):
+                for idx, combined_text in batches[batch_index].items():
+                    if error is not None:
+                        failed_rows += 1
+                        show(idx, format_error(error))
+                    elif idx in summaries:
+                        show(idx, summaries[idx])
+                    else:
+                        pending[idx] = combined_text
+            if pending:
+                st.caption(f"🔁 {len(pending)} rows were missing from batch answers and are requested one by one")
 
-        summary_html = get_project_summary(combined_text)
-        formatted_output = format_summary(project_name, summary_html)
-        st.markdown(formatted_output, unsafe_allow_html=True)
+        for _, idx, summary, error in run(pending, get_project_summary):
+            if error is not None:
+                failed_rows += 1
+                show(idx, format_error(error))
+            else:
+                show(idx, summary)
+        progress_bar.empty()
+        st.session_state["sales_summaries"] = (file_hash, results)
+        if failed_rows:
+            st.warning(f"⚠️ {failed_rows} row(s) could not be summarized; see the cards marked in red.")
+    else:
+        # Summaries of the last run stay on screen across reruns
+        last_results = st.session_state.get("sales_summaries")
+        if last_results is not None and last_results[0] == file_hash:
+            for idx, summary_html in last_results[1].items():
+                st.markdown(format_summary(row_titles[idx], summary_html), unsafe_allow_html=True)
@@ -3,7 +3,29 @@ import pandas as pd
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
-from collections import defaultdict
+from qbr_consolidation import (
+    aggregate_projects,
+    apply_project_merges,
+    format_projects,
+    project_keys,
+    split_project_text,
+    suggest_project_merges,
+)
+from qbr_history import CHANGED, NEW, UNCHANGED, QBRHistory, project_fingerprints, row_fingerprints
+from qbr_ingestion import entry_counts, file_digest, read_qbr_csv, sorted_values
+from qbr_summarization import (
+    CHARS_PER_TOKEN,
+    DEFAULT_CHUNK_TOKENS,
+    DEFAULT_MAP_REDUCE_TOKENS,
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    MapReduce,
+    SummaryCache,
+    estimate_tokens,
+    generate_summaries,
+    split_cached,
+)
+from result_pager import ResultStore, paginate
 
 # Load environment
 load_dotenv()
@@ -23,11 +45,9 @@ def format_summary(project_name, summary_html):
     </div>
     """
 
-# Generate summary using Gemini
-def get_project_summary(consolidated_text):
-    try:
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        prompt = """
+# Bump whenever SUMMARY_PROMPT or the model changes so cached summaries are regenerated
+PROMPT_VERSION = "gemini-1.5-flash/v1"
+SUMMARY_PROMPT = """
         Analyze the following consolidated project information and create a summary in this exact format:
 
         * **Project Name:** [Project Name]
@@ -39,108 +59,78 @@ def get_project_summary(consolidated_text):
         If multiple entries exist for the same project, consolidate the information intelligently.
         Focus on being concise but comprehensive. Here's the project data:
         """
-        response = model.generate_content([prompt + "\n\n" + consolidated_text])
-        return response.text
-    except Exception as e:
-        return f"<p style='color:red;'>Error generating summary: {str(e)}</p>"
-
-# Consolidate project entries
-def consolidate_projects(filtered_df):
-    # Group by project name (case-insensitive and trimmed)
-    project_groups = defaultdict(list)
-    
-    for idx, row in filtered_df.iterrows():
-        project_name = str(row.get("Project_Name", "")).strip()
-        if project_name and project_name.lower() != 'nan':
-            # Use lowercase for grouping to handle case variations
-            project_key = project_name.lower().strip()
-            project_groups[project_key].append({
-                'original_name': project_name,
-                'row': row
-            })
-    
-    consolidated_projects = {}
-    
-    for project_key, entries in project_groups.items():
-        if not entries:
-            continue
-            
-        # Use the first occurrence's name as the display name
-        display_name = entries[0]['original_name']
-        
-        # Consolidate all information for this project
-        all_descriptions = set()
-        all_achievements = set()
-        all_value_adds = set()
-        all_skills = set()
-        all_problem_statements = set()
-        team_leads = set()
-        business_units = set()
-        employees = set()
-        
-        for entry_data in entries:
-            row = entry_data['row']
-            
-            # Collect unique information (non-null and non-empty)
-            desc = str(row.get("Project_Description", "")).strip()
-            if desc and desc.lower() not in ['nan', 'none', '']:
-                all_descriptions.add(desc)
-            
-            achievement = str(row.get("Acheivements_ValueAdds", "")).strip()
-            if achievement and achievement.lower() not in ['nan', 'none', '']:
-                all_achievements.add(achievement)
-            
-            value_add = str(row.get("Value_Add", "")).strip()
-            if value_add and value_add.lower() not in ['nan', 'none', '']:
-                all_value_adds.add(value_add)
-            
-            skill = str(row.get("Project_Brief_Skill", "")).strip()
-            if skill and skill.lower() not in ['nan', 'none', '']:
-                all_skills.add(skill)
-                
-            problem = str(row.get("Project_Problem_Statement", "")).strip()
-            if problem and problem.lower() not in ['nan', 'none', '']:
-                all_problem_statements.add(problem)
-            
-            team_lead = str(row.get("Team_Lead", "")).strip()
-            if team_lead and team_lead.lower() not in ['nan', 'none', '']:
-                team_leads.add(team_lead)
-            
-            business_unit = str(row.get("Business_Unit_Name", "")).strip()
-            if business_unit and business_unit.lower() not in ['nan', 'none', '']:
-                business_units.add(business_unit)
-            
-            employee = str(row.get("Created By", "")).strip()
-            if employee and employee.lower() not in ['nan', 'none', '']:
-                employees.add(employee)
-        
-        # Create consolidated text with all unique information
-        consolidated_text = f"""
-        Project Name: {display_name}
-        Number of Entries Consolidated: {len(entries)}
-        Business Units: {', '.join(sorted(business_units)) if business_units else 'Not specified'}
-        Team Leads: {', '.join(sorted(team_leads)) if team_leads else 'Not specified'}
-        Employees: {', '.join(sorted(employees)) if employees else 'Not specified'}
-        
-        Project Problem Statements:
-        {' | '.join(all_problem_statements) if all_problem_statements else 'Not specified'}
-        
-        Project Descriptions:
-        {' | '.join(all_descriptions) if all_descriptions else 'Not specified'}
-        
-        Technical Skills Used:
-        {' | '.join(all_skills) if all_skills else 'Not specified'}
-        
-        Key Achievements:
-        {' | '.join(all_achievements) if all_achievements else 'Not specified'}
-        
-        Value Delivered:
-        {' | '.join(all_value_adds) if all_value_adds else 'Not specified'}
+# Map-reduce prompts for projects too large for a single request
+PART_NOTES_PROMPT = """
+        The following is one part of a large project's consolidated QBR entries; other parts
+        are summarized separately, so sections marked "Not specified" may be covered elsewhere.
+        Extract concise notes, starting with the project name, covering: goals, technical
+        skills and tools, key achievements, and business value delivered. Keep concrete
+        names, numbers and outcomes; drop repetition. Here's the project data:
         """
-        
-        consolidated_projects[display_name] = consolidated_text
-    
-    return consolidated_projects
+MERGE_NOTES_PROMPT = """
+        Merge the following notes about the same project into one set of concise notes,
+        starting with the project name. Keep goals, technical skills, key achievements and
+        business value; remove duplicates and keep concrete numbers. Here are the notes:
+        """
+
+# Parsed once per file content; widget reruns reuse the same (read-only) frame
+@st.cache_resource(show_spinner="Parsing CSV...", max_entries=4)
+def load_qbr_frame(file_hash, _file_bytes):
+    return read_qbr_csv(_file_bytes)
+
+@st.cache_data(max_entries=4)
+def load_filter_options(file_hash, _df):
+    return sorted_values(_df, 'Business_Unit_Name'), sorted_values(_df, 'Project_Name')
+
+@st.cache_data(show_spinner="Looking for near-duplicate projects...", max_entries=4)
+def load_merge_suggestions(file_hash, _df):
+    return suggest_project_merges(_df)
+
+@st.cache_resource
+def get_summary_cache():
+    return SummaryCache()
+
+@st.cache_resource
+def get_history():
+    return QBRHistory()
+
+@st.cache_data(max_entries=4)
+def load_row_fingerprints(file_hash, _df):
+    return row_fingerprints(_df)
+
+# Generate summary using Gemini (raises on failure; the batch engine isolates errors)
+def generate_text(prompt, text):
+    model = genai.GenerativeModel("gemini-1.5-flash")
+    response = model.generate_content([prompt + "\n\n" + text])
+    return response.text
+
+def get_project_summary(consolidated_text):
+    return generate_text(SUMMARY_PROMPT, consolidated_text)
+
+def get_part_notes(part_text):
+    return generate_text(PART_NOTES_PROMPT, part_text)
+
+def merge_notes(notes, final):
+    joined = "\n\n---\n\n".join(notes)
+    return generate_text(SUMMARY_PROMPT if final else MERGE_NOTES_PROMPT, joined)
+
+RESULT_COLUMNS = ["Project", "Status", "Entries", "Digest", "Error"]
+
+# Paged summary cards; bodies are read from the summary cache for the visible page only
+def render_summary_pages(store):
+    st.subheader("🗂️ Project Summaries")
+    page = paginate(
+        store, key="qbr_results",
+        sort_columns=["Project", "Entries", "Status"], search_columns=["Project", "Status"],
+        default_sort="Project", descending=False,
+    )
+    bodies = get_summary_cache().get_many(page["Digest"].dropna())
+    for row in page.itertuples(index=False):
+        if isinstance(row.Error, str):
+            summary_html = row.Error
+        else:
+            summary_html = bodies.get(row.Digest, "<p>Summary is no longer in the cache; generate again.</p>")
+        st.markdown(format_summary(row.Project, summary_html), unsafe_allow_html=True)
 
 # Streamlit UI
 st.set_page_config(page_title="QBR Summary Generator", layout="wide")
@@ -149,17 +139,25 @@ st.title("📊 Enhanced Project Summary for Sales")
 uploaded_file = st.file_uploader("Upload the QBR CSV file", type=["csv"])
 
 if uploaded_file is not None:
-    df = pd.read_csv(uploaded_file)
+    file_bytes = uploaded_file.getvalue()
+    file_hash = file_digest(file_bytes)
+    df = load_qbr_frame(file_hash, file_bytes)
+    business_units, project_names = load_filter_options(file_hash, df)
     st.success("✅ File uploaded successfully!")
     
     # Display basic info
     st.info(f"📋 Total records: {len(df)} | Columns: {len(df.columns)}")
+    row_changes = get_history().diff_rows(load_row_fingerprints(file_hash, df))
+    if not row_changes["first_run"]:
+        st.caption(
+            f"🕑 Since the last run: {row_changes['new']} new or edited rows, "
+            f"{row_changes['removed']} rows no longer present, {row_changes['unchanged']} unchanged"
+        )
     
     # Create filtering options
     st.sidebar.header("🔍 Filter Options")
     
     # Business Unit Filter
-    business_units = sorted(df['Business_Unit_Name'].dropna().unique())
     selected_business_units = st.sidebar.multiselect(
         "Select Business Unit(s):",
         options=business_units,
@@ -168,8 +166,6 @@ if uploaded_file is not None:
     )
     
     # Project Name Filter
-    project_names = sorted(df['Project_Name'].dropna().unique())
-    
     # Option to select all projects or specific ones
     select_all_projects = st.sidebar.checkbox("Select All Projects", value=True)
     
@@ -184,6 +180,22 @@ if uploaded_file is not None:
             help="Choose specific projects"
         )
     
+    # Generation settings
+    st.sidebar.header("⚡ Generation Settings")
+    max_parallel_requests = st.sidebar.number_input(
+        "Parallel requests", min_value=1, max_value=32, value=DEFAULT_MAX_WORKERS,
+        help="How many Gemini calls run at the same time"
+    )
+    requests_per_minute = st.sidebar.number_input(
+        "Requests per minute", min_value=1, max_value=2000, value=DEFAULT_REQUESTS_PER_MINUTE,
+        help="Stay under your Gemini quota"
+    )
+    map_reduce_tokens = st.sidebar.number_input(
+        "Split projects above (tokens)", min_value=1_000, max_value=1_000_000,
+        value=DEFAULT_MAP_REDUCE_TOKENS, step=1_000,
+        help="Larger projects are summarized in parts that are then merged"
+    )
+    
     # Apply filters
     if selected_business_units and selected_projects:
         filtered_df = df[
@@ -195,6 +207,30 @@ if uploaded_file is not None:
         st.info(f"Showing {len(filtered_df)} records after filtering")
         
         if len(filtered_df) > 0:
+            # Review near-duplicate project names before they are consolidated
+            merge_suggestions = load_merge_suggestions(file_hash, df)
+            filtered_keys = {name.lower() for name in sorted_values(filtered_df, 'Project_Name')}
+            suggested_merges = merge_suggestions[
+                merge_suggestions['Project_Name'].str.lower().isin(filtered_keys)
+            ].reset_index(drop=True)
+            with st.expander(
+                f"🧬 Near-duplicate Projects ({len(suggested_merges)} suggested merges)", expanded=False
+            ):
+                if suggested_merges.empty:
+                    st.write("No near-duplicate project names found")
+                    reviewed_merges = suggested_merges
+                else:
+                    st.caption("Untick a row to keep that project separate, or edit the name it merges into.")
+                    reviewed_merges = st.data_editor(
+                        suggested_merges,
+                        hide_index=True,
+                        disabled=["Project_Name", "Similarity", "Matched_On", "Entries"],
+                        # New suggestions (other file or filters) start from a fresh review
+                        key=f"project_merges_{file_hash}_{hash(tuple(suggested_merges['Project_Name']))}",
+                        use_container_width=True,
+                    )
+            filtered_df = apply_project_merges(filtered_df, reviewed_merges)
+            
             # Show filtering summary
             with st.expander("📋 Filter Summary", expanded=False):
                 col1, col2 = st.columns(2)
@@ -205,15 +241,15 @@ if uploaded_file is not None:
                 
                 with col2:
                     st.write("**Selected Projects:**")
-                    unique_projects = filtered_df['Project_Name'].unique()
-                    for proj in sorted(unique_projects)[:10]:  # Show first 10
+                    unique_projects = sorted_values(filtered_df, 'Project_Name')
+                    for proj in unique_projects[:10]:  # Show first 10
                         st.write(f"• {proj}")
                     if len(unique_projects) > 10:
                         st.write(f"• ... and {len(unique_projects) - 10} more")
             
             # Show consolidation preview
             with st.expander("🔄 Project Consolidation Preview", expanded=False):
-                project_counts = filtered_df['Project_Name'].value_counts()
+                project_counts = entry_counts(filtered_df, 'Project_Name')
                 duplicated_projects = project_counts[project_counts > 1]
                 
                 if len(duplicated_projects) > 0:
@@ -227,26 +263,111 @@ if uploaded_file is not None:
             
             # Generate summaries button
             if st.button("🚀 Generate Project Summaries", type="primary"):
-                consolidated_projects = consolidate_projects(filtered_df)
+                history = get_history()
+                cache = get_summary_cache()
+                
+                # Diff against the last run: unchanged projects reuse their stored summaries
+                fingerprints = project_fingerprints(filtered_df)
+                project_status, stored_digests = history.project_status(fingerprints, PROMPT_VERSION)
+                stored_summaries = cache.get_many(stored_digests.values())
+                reused_summaries = {
+                    key: stored_summaries[digest]
+                    for key, digest in stored_digests.items()
+                    if digest in stored_summaries
+                }
+                status_counts = project_status.value_counts()
                 
                 st.subheader("📝 Generated Summaries")
-                st.info(f"Consolidated {len(filtered_df)} entries into {len(consolidated_projects)} unique projects")
+                st.info(f"Consolidated {len(filtered_df)} entries into {len(fingerprints)} unique projects")
+                st.caption(
+                    f"🆕 {status_counts.get(NEW, 0)} new, ✏️ {status_counts.get(CHANGED, 0)} changed, "
+                    f"✅ {status_counts.get(UNCHANGED, 0)} unchanged since the last run"
+                )
+                
+                # Only new and changed projects are consolidated and summarized
+                valid_rows, _, row_keys = project_keys(filtered_df)
+                delta_rows = ~row_keys.isin(list(reused_summaries)).to_numpy()
+                aggregated_projects = aggregate_projects(filtered_df[valid_rows][delta_rows])
+                consolidated_projects = format_projects(aggregated_projects)
+                
+                # Projects whose consolidated text was summarized before are served from the cache
+                digests, cached_summaries, pending_projects = split_cached(
+                    consolidated_projects, cache, PROMPT_VERSION
+                )
+                st.caption(
+                    f"♻️ {len(reused_summaries) + len(cached_summaries)} served from stored summaries, "
+                    f"{len(pending_projects)} to generate"
+                )
                 
                 # Progress bar
                 progress_bar = st.progress(0)
-                total_projects = len(consolidated_projects)
+                total_projects = len(fingerprints)
+                
+                # Only the latest card is drawn while generating; all results go to the
+                # paged view below, which loads card bodies for the visible page only
+                latest_card = st.empty()
+                project_key_of = dict(zip(fingerprints['display_name'], fingerprints.index))
+                result_rows = {
+                    key: [fingerprints.at[key, 'display_name'], project_status[key],
+                          int(fingerprints.at[key, 'rows']), stored_digests.get(key), None]
+                    for key in fingerprints.index
+                }
+                
+                def remember(project_name):
+                    key = project_key_of[project_name]
+                    history.record_projects(
+                        [(key, project_name, fingerprints.at[key, 'fingerprint'], digests[project_name])],
+                        PROMPT_VERSION,
+                    )
                 
-                for i, (project_name, consolidated_text) in enumerate(consolidated_projects.items()):
-                    # Update progress
-                    progress_bar.progress((i + 1) / total_projects)
-                    
-                    # Generate summary
-                    with st.spinner(f"Generating summary for: {project_name}"):
-                        summary = get_project_summary(consolidated_text)
-                        formatted_output = format_summary(project_name, summary)
-                        st.markdown(formatted_output, unsafe_allow_html=True)
+                for project_name in cached_summaries:
+                    result_rows[project_key_of[project_name]][3] = digests[project_name]
+                    remember(project_name)
+                failed_projects = 0
+                
+                # Oversized projects go through map-reduce in bounded parts
+                work = {}
+                for project_name, text in pending_projects.items():
+                    if estimate_tokens(text) > map_reduce_tokens:
+                        work[project_name] = split_project_text(
+                            project_name, aggregated_projects[project_name], DEFAULT_CHUNK_TOKENS * CHARS_PER_TOKEN
+                        )
+                    else:
+                        work[project_name] = text
+                split_count = sum(1 for item in work.values() if isinstance(item, list))
+                if split_count:
+                    st.caption(f"✂️ {split_count} large project(s) will be summarized in parts")
+                
+                total_pending = len(pending_projects)
+                results = generate_summaries(
+                    work,
+                    get_project_summary,
+                    max_workers=max_parallel_requests,
+                    requests_per_minute=requests_per_minute,
+                    map_reduce=MapReduce(get_part_notes, merge_notes, max_workers=max_parallel_requests),
+                )
+                for done, (_, project_name, summary, error) in enumerate(results, start=1):
+                    result_row = result_rows[project_key_of[project_name]]
+                    if error is not None:
+                        failed_projects += 1
+                        summary = f"<p style='color:red;'>Error generating summary: {str(error)}</p>"
+                        result_row[1], result_row[4] = "failed", summary
+                    else:
+                        cache.put(digests[project_name], project_name, summary)
+                        remember(project_name)
+                        result_row[3] = digests[project_name]
+                    formatted_output = format_summary(project_name, summary)
+                    latest_card.markdown(formatted_output, unsafe_allow_html=True)
+                    progress_bar.progress(done / total_pending, text=f"{done}/{total_pending} summaries ready")
                 
                 progress_bar.empty()
+                latest_card.empty()
+                st.session_state["qbr_results"] = (
+                    file_hash, ResultStore.from_records(list(result_rows.values()), RESULT_COLUMNS)
+                )
+                history.record_rows(load_row_fingerprints(file_hash, df))
+                if failed_projects:
+                    st.warning(f"⚠️ {failed_projects} project(s) could not be summarized; see the cards marked in red.")
                 st.success(f"✅ Generated summaries for {total_projects} unique projects!")
                 
         else:
@@ -255,6 +376,11 @@ if uploaded_file is not None:
     else:
         st.warning("⚠️ Please select at least one Business Unit and Project to continue.")
     
+    # Results of the last run, paged so thousands of projects stay responsive
+    last_results = st.session_state.get("qbr_results")
+    if last_results is not None and last_results[0] == file_hash:
+        render_summary_pages(last_results[1])
+    
     # Show data preview
     with st.expander("👀 Data Preview", expanded=False):
         st.dataframe(df.head(10))
@@ -264,7 +390,7 @@ if uploaded_file is not None:
         col_info = pd.DataFrame({
             'Column': df.columns,
             'Non-null Count': df.count(),
-            'Data Type': df.dtypes
+            'Data Type': df.dtypes.astype(str)
         })
         st.dataframe(col_info)
 
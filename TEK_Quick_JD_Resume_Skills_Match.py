@@ -4,15 +4,21 @@ import os
 import re
 from dotenv import load_dotenv
 import fitz
-import docx
+from doc_extraction import extract_doc_text
+from docx_extraction import extract_docx_text
 import pandas as pd
 import pymupdf  # Instead of fitz
+from requisition_library import SKILLS, RequisitionLibrary, prompt_version
 
 st.set_page_config(page_title="JD and Resume Matcher with Skills")
 load_dotenv()
 
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+@st.cache_resource
+def get_requisition_library():
+    return RequisitionLibrary()
+
 def get_gemini_response(input_prompt, resume_content, jd_content):
     model = genai.GenerativeModel('gemini-1.5-flash')
     response = model.generate_content([input_prompt, resume_content, jd_content])
@@ -30,9 +36,10 @@ def input_file_setup(uploaded_file):
             document = pymupdf.open(stream=uploaded_file.read(), filetype="pdf")
             text_parts = [page.get_text() for page in document]
             file_content = " ".join(text_parts)
-        elif file_type in ["application/msword", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
-            doc = docx.Document(uploaded_file)
-            file_content = "\n".join([para.text for para in doc.paragraphs])
+        elif file_type == "application/msword":
+            file_content = extract_doc_text(uploaded_file.read())
+        elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+            file_content = extract_docx_text(uploaded_file)
         else:
             raise ValueError("Unsupported file type")
         return file_content
@@ -72,11 +79,15 @@ if submit:
     elif not skills_list:
         st.write("Please enter key skills required for the job.")
     else:
+        # The JD skills depend only on the JD and the skill list, not on the resume
+        jd_skills = get_requisition_library().requisition(jd_content).artifact(
+            SKILLS, prompt_version(*sorted(skills_list)),
+            lambda: extract_skills(jd_content, skills_list),
+        )
         for resume in uploaded_resumes:
             resume_content = input_file_setup(resume)
             contact_info = extract_contact_info(resume_content)
             resume_skills = extract_skills(resume_content, skills_list)
-            jd_skills = extract_skills(jd_content, skills_list)
             
             # st.write(f"Extracted Skills from Resume ({resume.name}):", resume_skills)
             # st.write(f"Extracted Skills from JD:", jd_skills)
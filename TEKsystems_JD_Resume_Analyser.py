@@ -2,8 +2,8 @@ import streamlit as st
 import google.generativeai as genai
 import os
 import fitz  # PyMuPDF for PDF processing
-import docx  # python-docx for DOCX processing
-import io
+from doc_extraction import extract_doc_text
+from docx_extraction import extract_docx_text
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -29,11 +29,11 @@ def extract_text_from_pdf(file_bytes):
 
 def extract_text_from_docx(file_bytes):
     """Extract text from DOCX file"""
-    doc = docx.Document(io.BytesIO(file_bytes))
-    text_parts = []
-    for paragraph in doc.paragraphs:
-        text_parts.append(paragraph.text)
-    return " ".join(text_parts)
+    return extract_docx_text(file_bytes, separator=" ")
+
+def extract_text_from_doc(file_bytes):
+    """Extract text from a legacy Word 97-2003 DOC file"""
+    return extract_doc_text(file_bytes)
 
 def extract_text_from_txt(file_bytes):
     """Extract text from TXT file"""
@@ -52,14 +52,11 @@ def process_resume_file(uploaded_file):
     elif file_extension == 'docx':
         return extract_text_from_docx(file_bytes)
     elif file_extension == 'doc':
-        # For DOC files, we need to inform the user about potential limitations
-        st.warning("DOC format has limited support. For best results, consider converting to DOCX or PDF.")
         try:
-            # Attempt to process as DOCX (some DOC files can be read by python-docx)
-            return extract_text_from_docx(file_bytes)
+            return extract_text_from_doc(file_bytes)
         except Exception as e:
             st.error(f"Error processing DOC file: {e}")
-            return "Error processing DOC file. Please convert to DOCX or PDF for better results."
+            return ""
     elif file_extension == 'txt':
         return extract_text_from_txt(file_bytes)
     else:
@@ -205,9 +202,12 @@ if submit_recruiter:
     if uploaded_file is not None and input_text:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response(input_text, resume_content, input_prompt1)
-            st.subheader("Technical Recruiter Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt1)
+                st.subheader("Technical Recruiter Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -217,9 +217,12 @@ elif submit_questions:
     if uploaded_file is not None and input_text:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response(input_text, resume_content, input_prompt2)
-            st.subheader("Technical Questions")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt2)
+                st.subheader("Technical Questions")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -229,9 +232,12 @@ elif submit_domain:
     if uploaded_file is not None and input_text:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response(input_text, resume_content, input_prompt3)
-            st.subheader("Domain Expert Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt3)
+                st.subheader("Domain Expert Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -241,9 +247,12 @@ elif submit_manager:
     if uploaded_file is not None and input_text:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response(input_text, resume_content, input_prompt4)
-            st.subheader("Technical Manager Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt4)
+                st.subheader("Technical Manager Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -253,9 +262,12 @@ elif submit_general_query:
     if uploaded_file is not None or input_text:
         try:
             resume_content = process_resume_file(uploaded_file) if uploaded_file is not None else ""
-            response = get_gemini_response(input_text, resume_content, input_prompt_query, input_promp)
-            st.subheader("Query Response")
-            st.write(response)
+            if uploaded_file is not None and not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt_query, input_promp)
+                st.subheader("Query Response")
+                st.write(response)
         except Exception as e:
             if "No file uploaded" not in str(e):
                 st.error(f"Error processing file: {e}")
@@ -268,9 +280,12 @@ elif submit_skill_analysis:
     if uploaded_file is not None and top_skills:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response("", resume_content, input_prompt6, top_skills)
-            st.subheader("Top Skill Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response("", resume_content, input_prompt6, top_skills)
+                st.subheader("Top Skill Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
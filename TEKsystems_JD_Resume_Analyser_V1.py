@@ -2,17 +2,23 @@ import streamlit as st
 import google.generativeai as genai
 import os
 import fitz  # PyMuPDF for PDF processing
-import docx  # python-docx for DOCX processing
-import io
+from doc_extraction import extract_doc_text
+from docx_extraction import extract_docx_text
 from dotenv import load_dotenv
+from requisition_library import CLARIFICATION_QUESTIONS, SUMMARY, RequisitionLibrary, prompt_version
 
 # Load environment variables
 load_dotenv()
 os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+@st.cache_resource
+def get_requisition_library():
+    return RequisitionLibrary()
 
 def get_gemini_response(input_jd, resume_content, prompt, additional_input=""):
-    model = genai.GenerativeModel('gemini-2.5-flash')
+    model = genai.GenerativeModel(GEMINI_MODEL)
     if additional_input:
         response = model.generate_content([input_jd, resume_content, prompt, additional_input])
     else:
@@ -29,11 +35,11 @@ def extract_text_from_pdf(file_bytes):
 
 def extract_text_from_docx(file_bytes):
     """Extract text from DOCX file"""
-    doc = docx.Document(io.BytesIO(file_bytes))
-    text_parts = []
-    for paragraph in doc.paragraphs:
-        text_parts.append(paragraph.text)
-    return " ".join(text_parts)
+    return extract_docx_text(file_bytes, separator=" ")
+
+def extract_text_from_doc(file_bytes):
+    """Extract text from a legacy Word 97-2003 DOC file"""
+    return extract_doc_text(file_bytes)
 
 def extract_text_from_txt(file_bytes):
     """Extract text from TXT file"""
@@ -52,12 +58,11 @@ def process_resume_file(uploaded_file):
     elif file_extension == 'docx':
         return extract_text_from_docx(file_bytes)
     elif file_extension == 'doc':
-        st.warning("DOC format has limited support. For best results, consider converting to DOCX or PDF.")
         try:
-            return extract_text_from_docx(file_bytes)
+            return extract_text_from_doc(file_bytes)
         except Exception as e:
             st.error(f"Error processing DOC file: {e}")
-            return "Error processing DOC file. Please convert to DOCX or PDF for better results."
+            return ""
     elif file_extension == 'txt':
         return extract_text_from_txt(file_bytes)
     else:
@@ -241,9 +246,12 @@ if submit_recruiter:
     if uploaded_file is not None and input_text:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response(input_text, resume_content, input_prompt1)
-            st.subheader("Technical Recruiter Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt1)
+                st.subheader("Technical Recruiter Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -253,9 +261,12 @@ elif submit_technical_questions:
     if uploaded_file is not None and input_text:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response(input_text, resume_content, input_prompt_technical)
-            st.subheader("Technical Questions")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt_technical)
+                st.subheader("Technical Questions")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -265,9 +276,12 @@ elif submit_coding_questions:
     if uploaded_file is not None and input_text:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response(input_text, resume_content, input_prompt_coding)
-            st.subheader("Coding Questions")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt_coding)
+                st.subheader("Coding Questions")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -277,9 +291,12 @@ elif submit_domain:
     if uploaded_file is not None and input_text:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response(input_text, resume_content, input_prompt3)
-            st.subheader("Domain Expert Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt3)
+                st.subheader("Domain Expert Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -289,9 +306,12 @@ elif submit_manager:
     if uploaded_file is not None and input_text:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response(input_text, resume_content, input_prompt4)
-            st.subheader("Technical Manager Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt4)
+                st.subheader("Technical Manager Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -301,9 +321,12 @@ elif submit_general_query:
     if uploaded_file is not None or input_text:
         try:
             resume_content = process_resume_file(uploaded_file) if uploaded_file is not None else ""
-            response = get_gemini_response(input_text, resume_content, input_prompt_query, input_promp)
-            st.subheader("Query Response")
-            st.write(response)
+            if uploaded_file is not None and not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(input_text, resume_content, input_prompt_query, input_promp)
+                st.subheader("Query Response")
+                st.write(response)
         except Exception as e:
             if "No file uploaded" not in str(e):
                 st.error(f"Error processing file: {e}")
@@ -316,9 +339,12 @@ elif submit_skill_analysis:
     if uploaded_file is not None and top_skills:
         try:
             resume_content = process_resume_file(uploaded_file)
-            response = get_gemini_response("", resume_content, input_prompt6, top_skills)
-            st.subheader("Top Skill Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response("", resume_content, input_prompt6, top_skills)
+                st.subheader("Top Skill Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -326,7 +352,11 @@ elif submit_skill_analysis:
 
 elif submit_jd_summarization:
     if input_text:
-        response = get_gemini_response(input_text, "", input_prompt5)
+        # JD-only: computed once per JD and reused by every session
+        response = get_requisition_library().requisition(input_text).artifact(
+            SUMMARY, prompt_version(GEMINI_MODEL, input_prompt5),
+            lambda: get_gemini_response(input_text, "", input_prompt5),
+        )
         st.subheader("Job Description Summary")
         st.write(response)
     else:
@@ -335,7 +365,10 @@ elif submit_jd_summarization:
 elif submit_jd_clarification:
     if input_text:
         try:
-            response = get_gemini_response(input_text, "", input_prompt_jd_clarification)
+            response = get_requisition_library().requisition(input_text).artifact(
+                CLARIFICATION_QUESTIONS, prompt_version(GEMINI_MODEL, input_prompt_jd_clarification),
+                lambda: get_gemini_response(input_text, "", input_prompt_jd_clarification),
+            )
             st.subheader("JD Clarification Questions")
             st.write(response)
         except Exception as e:
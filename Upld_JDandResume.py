@@ -2,17 +2,31 @@ import streamlit as st
 import google.generativeai as genai
 import os
 import fitz # PyMuPDF for PDF processing
-import docx # python-docx for DOCX processing
-import io
+from doc_extraction import extract_doc_text
+from docx_extraction import extract_docx_text
 from dotenv import load_dotenv
+from langchain_community.embeddings.fastembed import FastEmbedEmbeddings
+from requisition_library import CLARIFICATION_QUESTIONS, CLOSED, SUMMARY, RequisitionLibrary, prompt_version
+from requisition_matcher import RequisitionMatcher
+from embedding_engine import configured_embeddings
 
 # Load environment variables
 load_dotenv()
 os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+GEMINI_MODEL = 'gemini-2.5-flash-lite'
+
+@st.cache_resource
+def get_requisition_library():
+    return RequisitionLibrary()
+
+@st.cache_resource
+def get_requisition_matcher():
+    # Local embeddings: ranking every stored JD costs no LLM calls
+    return RequisitionMatcher(get_requisition_library(), configured_embeddings(FastEmbedEmbeddings))
 
 def get_gemini_response(input_jd, resume_content, prompt, additional_input=""):
-    model = genai.GenerativeModel('gemini-2.5-flash-lite')
+    model = genai.GenerativeModel(GEMINI_MODEL)
     if additional_input:
         response = model.generate_content([input_jd, resume_content, prompt, additional_input])
     else:
@@ -21,20 +35,25 @@ def get_gemini_response(input_jd, resume_content, prompt, additional_input=""):
 
 def extract_text_from_pdf(file_bytes):
     try:
-        document = fitz.open(stream=file_bytes, filetype="pdf")
-        text_parts = [page.get_text() for page in document]
+        # Close the document deterministically instead of waiting for GC
+        with fitz.open(stream=file_bytes, filetype="pdf") as document:
+            text_parts = [page.get_text() for page in document]
         return " ".join(text_parts)
     except Exception as e:
         raise ValueError(f"Failed to open PDF: {e}")
 
 def extract_text_from_docx(file_bytes):
     try:
-        doc = docx.Document(io.BytesIO(file_bytes))
-        text_parts = [paragraph.text for paragraph in doc.paragraphs]
-        return " ".join(text_parts)
+        return extract_docx_text(file_bytes, separator=" ")
     except Exception as e:
         raise ValueError(f"Failed to open DOCX: {e}")
 
+def extract_text_from_doc(file_bytes):
+    try:
+        return extract_doc_text(file_bytes)
+    except Exception as e:
+        raise ValueError(f"Failed to open DOC: {e}")
+
 def extract_text_from_txt(file_bytes):
     try:
         return file_bytes.decode('utf-8')
@@ -56,12 +75,11 @@ def process_file(uploaded_file):
     elif file_extension == 'docx':
         return extract_text_from_docx(file_bytes)
     elif file_extension == 'doc':
-        st.warning("DOC format has limited support. For best results, consider converting to DOCX or PDF.")
         try:
-            return extract_text_from_docx(file_bytes)
+            return extract_text_from_doc(file_bytes)
         except Exception as e:
             st.error(f"Error processing DOC file: {e}")
-            return "Error processing DOC file. Please convert to DOCX or PDF for better results."
+            return ""
     elif file_extension == 'txt':
         return extract_text_from_txt(file_bytes)
     else:
@@ -228,11 +246,21 @@ if uploaded_jd is not None:
     file_type = uploaded_jd.name.split('.')[-1].upper()
     st.write(f"{file_type} Job Description Uploaded Successfully")
     jd_content = process_file(uploaded_jd)
+    if jd_content:
+        # Every uploaded JD becomes a requisition that resumes can be reverse-matched against
+        requisition = get_requisition_library().requisition(jd_content, title=uploaded_jd.name)
+        if get_requisition_library().status(requisition.jd_hash) == CLOSED:
+            st.info("This requisition is closed and is left out of reverse matching.")
+            if st.button("Reopen Requisition", key="reopen_requisition"):
+                get_requisition_library().reopen(requisition.jd_hash)
+                st.rerun()
 
 if uploaded_resume is not None:
     file_type = uploaded_resume.name.split('.')[-1].upper()
     st.write(f"{file_type} Resume Uploaded Successfully")
     resume_content = process_file(uploaded_resume)
+    if not resume_content:
+        st.error("No text could be extracted from the resume.")
 
 submit_recruiter = st.button("Technical Recruiter Analysis", key="submit_recruiter")
 submit_technical_questions = st.button("Technical Questions", key="submit_technical_questions")
@@ -243,6 +271,7 @@ top_skills = st.text_input("Top Skills Required for the Job (comma-separated):",
 submit_skill_analysis = st.button("Skill Analysis", key="submit_skill_analysis")
 input_promp = st.text_input("Queries: Feel Free to Ask here", key="custom_query_input")
 submit_general_query = st.button("Answer My Query", key="submit_general_query")
+submit_reverse_match = st.button("Match Resume to Stored Requisitions", key="submit_reverse_match")
 
 if submit_recruiter:
     if jd_content and resume_content:
@@ -297,7 +326,11 @@ elif submit_manager:
 elif submit_jd_summarization:
     if jd_content:
         try:
-            response = get_gemini_response(jd_content, "", input_prompt5)
+            # JD-only: computed once per JD and reused by every session
+            response = get_requisition_library().requisition(jd_content).artifact(
+                SUMMARY, prompt_version(GEMINI_MODEL, input_prompt5),
+                lambda: get_gemini_response(jd_content, "", input_prompt5),
+            )
             st.subheader("Job Description Summary")
             st.write(response)
         except Exception as e:
@@ -307,7 +340,10 @@ elif submit_jd_summarization:
 elif submit_jd_clarification:
     if jd_content:
         try:
-            response = get_gemini_response(jd_content, "", input_prompt_jd_clarification)
+            response = get_requisition_library().requisition(jd_content).artifact(
+                CLARIFICATION_QUESTIONS, prompt_version(GEMINI_MODEL, input_prompt_jd_clarification),
+                lambda: get_gemini_response(jd_content, "", input_prompt_jd_clarification),
+            )
             st.subheader("JD Clarification Questions")
             st.write(response)
         except Exception as e:
@@ -318,9 +354,12 @@ elif submit_skill_analysis:
     if uploaded_resume is not None and top_skills:
         try:
             resume_content = process_file(uploaded_resume)
-            response = get_gemini_response("", resume_content, input_prompt6, top_skills)
-            st.subheader("Top Skill Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response("", resume_content, input_prompt6, top_skills)
+                st.subheader("Top Skill Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -329,9 +368,12 @@ elif submit_general_query:
     if jd_content or resume_content:
         try:
             resume_content = process_file(uploaded_resume) if uploaded_resume is not None else ""
-            response = get_gemini_response(jd_content, resume_content, input_prompt_query, input_promp)
-            st.subheader("Query Response")
-            st.write(response)
+            if uploaded_resume is not None and not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_gemini_response(jd_content, resume_content, input_prompt_query, input_promp)
+                st.subheader("Query Response")
+                st.write(response)
         except Exception as e:
             if "No file uploaded" not in str(e):
                 st.error(f"Error processing file: {e}")
@@ -339,6 +381,52 @@ elif submit_general_query:
                 st.write("Please upload a resume file or enter a Job Description to proceed.")
     else:
         st.write("Please upload a resume file or enter a Job Description to proceed.")
+elif submit_reverse_match:
+    if resume_content:
+        try:
+            matches = get_requisition_matcher().top_requisitions(resume_content)
+            st.session_state.reverse_matches = (uploaded_resume.name, matches)
+            if not matches:
+                st.write("No open requisitions stored yet. Upload job descriptions to build the library.")
+        except Exception as e:
+            st.error(f"Error matching requisitions: {e}")
+    else:
+        st.write("Please upload a resume to proceed.")
+
+# Reverse-match results stay on screen for the loaded resume, for the deep dive below
+reverse_matches = st.session_state.get("reverse_matches")
+if resume_content and reverse_matches and reverse_matches[0] == uploaded_resume.name and reverse_matches[1]:
+    matches = reverse_matches[1]
+    st.subheader("Best Matching Requisitions")
+    st.dataframe([
+        {
+            "Requisition": match["title"],
+            "Score": round(match["score"], 3),
+            "Similarity": round(match["similarity"], 3),
+            "Skill Coverage": "N/A" if match["skill_coverage"] is None else f"{match['skill_coverage']:.0%}",
+            "Matched Skills": ", ".join(match["matched_skills"]),
+            "Missing Skills": ", ".join(match["missing_skills"]),
+        }
+        for match in matches
+    ])
+    selected = st.selectbox(
+        "Requisition for a detailed analysis", range(len(matches)),
+        format_func=lambda i: matches[i]["title"], key="reverse_match_selected",
+    )
+    if st.button("Deep Dive", key="submit_reverse_deep_dive"):
+        try:
+            jd_text = get_requisition_library().jd_text(matches[selected]["jd_hash"])
+            response = get_gemini_response(jd_text, resume_content, input_prompt1)
+            st.subheader(f"Technical Recruiter Analysis: {matches[selected]['title']}")
+            st.write(response)
+        except Exception as e:
+            st.error(f"Error processing request: {e}")
+    if st.button("Close Requisition", key="close_requisition", help="Filled or cancelled: stop matching resumes against it"):
+        get_requisition_library().close(matches[selected]["jd_hash"])
+        st.session_state.reverse_matches = (
+            reverse_matches[0], [match for i, match in enumerate(matches) if i != selected]
+        )
+        st.rerun()
 
 
 
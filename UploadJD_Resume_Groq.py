@@ -2,10 +2,11 @@
 import streamlit as st
 import os
 import fitz  # PyMuPDF for PDF processing
-import docx  # python-docx for DOCX processing
-import io
+from doc_extraction import extract_doc_text
+from docx_extraction import extract_docx_text
 from dotenv import load_dotenv
 from groq import Groq
+from requisition_library import CLARIFICATION_QUESTIONS, SUMMARY, RequisitionLibrary, prompt_version
 
 # Load environment variables
 load_dotenv()
@@ -17,6 +18,13 @@ if not GROQ_API_KEY:
         "GROQ_API_KEY not found. Please set it in your environment or .env file."
     )
 groq_client = Groq(api_key=GROQ_API_KEY)
+GROQ_MODEL = "llama-3.3-70b-versatile"
+# Sampling settings; part of the version of cached JD artifacts
+GROQ_SETTINGS = dict(temperature=0.2, top_p=0.9, max_tokens=3000)
+
+@st.cache_resource
+def get_requisition_library():
+    return RequisitionLibrary()
 
 def get_groq_response(input_jd, resume_content, prompt, additional_input=""):
     """
@@ -42,14 +50,12 @@ def get_groq_response(input_jd, resume_content, prompt, additional_input=""):
 
     try:
         completion = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",   # You can switch models here if needed
+            model=GROQ_MODEL,   # You can switch models here if needed
             messages=[
                 {"role": "system", "content": prompt},
                 {"role": "user", "content": user_content},
             ],
-            temperature=0.2,
-            top_p=0.9,
-            max_tokens=3000,
+            **GROQ_SETTINGS,
         )
         return completion.choices[0].message.content
     except Exception as e:
@@ -57,20 +63,25 @@ def get_groq_response(input_jd, resume_content, prompt, additional_input=""):
 
 def extract_text_from_pdf(file_bytes):
     try:
-        document = fitz.open(stream=file_bytes, filetype="pdf")
-        text_parts = [page.get_text() for page in document]
+        # Close the document deterministically instead of waiting for GC
+        with fitz.open(stream=file_bytes, filetype="pdf") as document:
+            text_parts = [page.get_text() for page in document]
         return " ".join(text_parts)
     except Exception as e:
         raise ValueError(f"Failed to open PDF: {e}")
 
 def extract_text_from_docx(file_bytes):
     try:
-        doc = docx.Document(io.BytesIO(file_bytes))
-        text_parts = [paragraph.text for paragraph in doc.paragraphs]
-        return " ".join(text_parts)
+        return extract_docx_text(file_bytes, separator=" ")
     except Exception as e:
         raise ValueError(f"Failed to open DOCX: {e}")
 
+def extract_text_from_doc(file_bytes):
+    try:
+        return extract_doc_text(file_bytes)
+    except Exception as e:
+        raise ValueError(f"Failed to open DOC: {e}")
+
 def extract_text_from_txt(file_bytes):
     try:
         return file_bytes.decode('utf-8')
@@ -92,12 +103,11 @@ def process_file(uploaded_file):
     elif file_extension == 'docx':
         return extract_text_from_docx(file_bytes)
     elif file_extension == 'doc':
-        st.warning("DOC format has limited support. For best results, convert to DOCX or PDF.")
         try:
-            return extract_text_from_docx(file_bytes)
+            return extract_text_from_doc(file_bytes)
         except Exception as e:
             st.error(f"Error processing DOC file: {e}")
-            return "Error processing DOC file. Please convert to DOCX or PDF for better results."
+            return ""
     elif file_extension == 'txt':
         return extract_text_from_txt(file_bytes)
     else:
@@ -268,6 +278,8 @@ if uploaded_resume is not None:
     file_type = uploaded_resume.name.split('.')[-1].upper()
     st.write(f"{file_type} Resume Uploaded Successfully")
     resume_content = process_file(uploaded_resume)
+    if not resume_content:
+        st.error("No text could be extracted from the resume.")
 
 submit_recruiter = st.button("Technical Recruiter Analysis", key="submit_recruiter")
 submit_technical_questions = st.button("Technical Questions", key="submit_technical_questions")
@@ -332,7 +344,11 @@ elif submit_manager:
 elif submit_jd_summarization:
     if jd_content:
         try:
-            response = get_groq_response(jd_content, "", input_prompt5)
+            # JD-only: computed once per JD and reused by every session
+            response = get_requisition_library().requisition(jd_content).artifact(
+                SUMMARY, prompt_version(GROQ_MODEL, GROQ_SETTINGS, input_prompt5),
+                lambda: get_groq_response(jd_content, "", input_prompt5),
+            )
             st.subheader("Job Description Summary")
             st.write(response)
         except Exception as e:
@@ -342,7 +358,10 @@ elif submit_jd_summarization:
 elif submit_jd_clarification:
     if jd_content:
         try:
-            response = get_groq_response(jd_content, "", input_prompt_jd_clarification)
+            response = get_requisition_library().requisition(jd_content).artifact(
+                CLARIFICATION_QUESTIONS, prompt_version(GROQ_MODEL, GROQ_SETTINGS, input_prompt_jd_clarification),
+                lambda: get_groq_response(jd_content, "", input_prompt_jd_clarification),
+            )
             st.subheader("JD Clarification Questions")
             st.write(response)
         except Exception as e:
@@ -353,9 +372,12 @@ elif submit_skill_analysis:
     if uploaded_resume is not None and top_skills:
         try:
             resume_content = process_file(uploaded_resume)
-            response = get_groq_response("", resume_content, input_prompt6, top_skills)
-            st.subheader("Top Skill Analysis")
-            st.write(response)
+            if not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_groq_response("", resume_content, input_prompt6, top_skills)
+                st.subheader("Top Skill Analysis")
+                st.write(response)
         except Exception as e:
             st.error(f"Error processing file: {e}")
     else:
@@ -364,9 +386,12 @@ elif submit_general_query:
     if jd_content or resume_content:
         try:
             resume_content = process_file(uploaded_resume) if uploaded_resume is not None else ""
-            response = get_groq_response(jd_content, resume_content, input_prompt_query, input_promp)
-            st.subheader("Query Response")
-            st.write(response)
+            if uploaded_resume is not None and not resume_content:
+                st.error("No text could be extracted from the resume.")
+            else:
+                response = get_groq_response(jd_content, resume_content, input_prompt_query, input_promp)
+                st.subheader("Query Response")
+                st.write(response)
         except Exception as e:
             if "No file uploaded" not in str(e):
                 st.error(f"Error processing file: {e}")
@@ -0,0 +1,297 @@
+"""
+Persistent local store of analysed candidates.
+
+Every resume that passes through a matcher is saved once, keyed on the SHA-256 of
+the uploaded file: the extracted text, the identity fields from contact_extractor,
+the skills found in it (see skill_index) and, optionally, embedding vectors per
+model. Re-uploading a file that is already
+stored skips extraction, and the whole historical pool can be searched without any
+upload through an SQLite FTS5 index ranked with BM25:
+
+    store = CandidateStore()
+    record = store.get(file_digest(file_bytes))
+    if record is None:
+        record = store.add(file_digest(file_bytes), file_name, text, identity)
+    for candidate in store.search("kafka AND terraform", limit=50):
+        print(candidate["name"], candidate["rank"], candidate["snippet"])
+
+Queries use the FTS5 syntax: implicit AND between terms, AND / OR / NOT (upper
+case), "quoted phrases", prefix* terms and NEAR(). A query that is not valid FTS5
+(for example "c++" or "node-js") is retried with each term quoted as a phrase.
+
+Run this module directly for a search benchmark on a synthetic pool:
+    python candidate_store.py
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+DEFAULT_CANDIDATE_STORE_PATH = os.getenv("CANDIDATE_STORE", "candidate_store.sqlite3")
+DEFAULT_SEARCH_LIMIT = 50
+# '+' and '#' are part of tokens so C++ and C# stay searchable
+FTS_TOKENIZER = "unicode61 remove_diacritics 2 tokenchars '+#'"
+# bm25() column weights for (name, location, text)
+BM25_WEIGHTS = (4.0, 1.0, 1.0)
+IDENTITY_FIELDS = ("name", "phones", "emails", "linkedin", "github", "location")
+
+_QUERY_TERM = re.compile(r"[^\s\"]+")
+
+
+def file_digest(file_bytes):
+    """Content hash identifying an uploaded resume file."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def _quoted_query(query):
+    """Every term of `query` as a quoted FTS5 phrase, joined with implicit AND."""
+    return " ".join('"{}"'.format(term) for term in _QUERY_TERM.findall(query))
+
+
+class CandidateStore:
+    """Candidate records, an FTS5 index over them and per-model embeddings in SQLite."""
+
+    def __init__(self, path=DEFAULT_CANDIDATE_STORE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            # Readers in other Streamlit sessions do not block writers
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS candidates (
+                       id INTEGER PRIMARY KEY,
+                       file_hash TEXT NOT NULL UNIQUE,
+                       file_name TEXT NOT NULL,
+                       name TEXT,
+                       location TEXT,
+                       identity TEXT NOT NULL,
+                       text TEXT NOT NULL,
+                       added_at REAL NOT NULL,
+                       updated_at REAL NOT NULL,
+                       skills TEXT
+                   )"""
+            )
+            # Stores created before skills were recorded
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(candidates)")}
+            if "skills" not in columns:
+                conn.execute("ALTER TABLE candidates ADD COLUMN skills TEXT")
+            # External-content index: the text is stored once, in `candidates`
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS candidates_fts USING fts5("
+                "name, location, text, content='candidates', content_rowid='id', "
+                f'tokenize="{FTS_TOKENIZER}")'
+            )
+            conn.executescript(
+                """
+                CREATE TRIGGER IF NOT EXISTS candidates_ai AFTER INSERT ON candidates BEGIN
+                    INSERT INTO candidates_fts(rowid, name, location, text)
+                    VALUES (new.id, new.name, new.location, new.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS candidates_ad AFTER DELETE ON candidates BEGIN
+                    INSERT INTO candidates_fts(candidates_fts, rowid, name, location, text)
+                    VALUES ('delete', old.id, old.name, old.location, old.text);
+                END;
+                CREATE TRIGGER IF NOT EXISTS candidates_au AFTER UPDATE ON candidates BEGIN
+                    INSERT INTO candidates_fts(candidates_fts, rowid, name, location, text)
+                    VALUES ('delete', old.id, old.name, old.location, old.text);
+                    INSERT INTO candidates_fts(rowid, name, location, text)
+                    VALUES (new.id, new.name, new.location, new.text);
+                END;
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    file_hash TEXT NOT NULL REFERENCES candidates(file_hash) ON DELETE CASCADE,
+                    model TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (file_hash, model)
+                );
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # Off by default per connection; without it ON DELETE CASCADE does nothing
+        conn.execute("PRAGMA foreign_keys=ON")
+        try:
+            with conn:  # commits on success
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _record(row):
+        record = {"id": row["id"], "file_hash": row["file_hash"], "file_name": row["file_name"],
+                  "text": row["text"]}
+        record.update(json.loads(row["identity"]))
+        record["skills"] = json.loads(row["skills"]) if row["skills"] else []
+        record["updated_at"] = row["updated_at"]
+        return record
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def get(self, file_hash):
+        """The stored record for `file_hash`, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM candidates WHERE file_hash = ?", (file_hash,)).fetchone()
+        return self._record(row) if row else None
+
+    def get_by_ids(self, ids):
+        """Records for candidate ids, in the order given; unknown ids are skipped."""
+        ids = [int(candidate_id) for candidate_id in ids]
+        rows = {}
+        with self._connect() as conn:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for row in conn.execute(f"SELECT * FROM candidates WHERE id IN ({placeholders})", batch):
+                    rows[row["id"]] = row
+        return [self._record(rows[candidate_id]) for candidate_id in ids if candidate_id in rows]
+
+    def add(self, file_hash, file_name, text, identity, skills=None):
+        """
+        Insert or refresh a candidate and return its record.
+        identity: the dict returned by contact_extractor.extract_identity().
+        skills: skill names found in the text; None keeps the stored ones.
+        """
+        identity = {field: identity.get(field) for field in IDENTITY_FIELDS}
+        now = time.time()
+        with self._connect() as conn:
+            # ON CONFLICT ... DO UPDATE fires the update trigger; REPLACE would not
+            conn.execute(
+                """INSERT INTO candidates
+                       (file_hash, file_name, name, location, identity, text, added_at, updated_at, skills)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(file_hash) DO UPDATE SET
+                       file_name = excluded.file_name, name = excluded.name,
+                       location = excluded.location, identity = excluded.identity,
+                       text = excluded.text, updated_at = excluded.updated_at,
+                       skills = COALESCE(excluded.skills, candidates.skills)""",
+                (file_hash, file_name, identity["name"], identity["location"],
+                 json.dumps(identity), text, now, now,
+                 None if skills is None else json.dumps(sorted(skills))),
+            )
+        return self.get(file_hash)
+
+    def set_skills(self, file_hash, skills):
+        """Replace the skills recorded for a stored candidate."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE candidates SET skills = ? WHERE file_hash = ?",
+                (json.dumps(sorted(skills)), file_hash),
+            )
+
+    def iter_skills(self):
+        """(id, skills) of every candidate with recorded skills, to build a SkillIndex."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT id, skills FROM candidates WHERE skills IS NOT NULL").fetchall()
+        return [(candidate_id, json.loads(skills)) for candidate_id, skills in rows]
+
+    def search(self, query, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Records matching the FTS5 `query`, best first. Each record also has `rank`
+        (BM25, lower is better) and `snippet` (matched terms in **bold**).
+        Raises ValueError if the query cannot be parsed even after quoting its terms.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+        sql = (
+            f"SELECT c.*, bm25(candidates_fts, {weights}) AS rank, "
+            "snippet(candidates_fts, 2, '**', '**', ' … ', 16) AS snippet "
+            "FROM candidates_fts JOIN candidates c ON c.id = candidates_fts.rowid "
+            "WHERE candidates_fts MATCH ? ORDER BY rank LIMIT ?"
+        )
+        with self._connect() as conn:
+            try:
+                rows = conn.execute(sql, (query, limit)).fetchall()
+            except sqlite3.OperationalError:
+                try:
+                    rows = conn.execute(sql, (_quoted_query(query), limit)).fetchall()
+                except sqlite3.OperationalError as error:
+                    raise ValueError(f"Invalid search query: {error}") from error
+        results = []
+        for row in rows:
+            record = self._record(row)
+            record["rank"] = row["rank"]
+            record["snippet"] = row["snippet"]
+            results.append(record)
+        return results
+
+    def put_embedding(self, file_hash, model, vector):
+        """Store a float32 embedding of a stored candidate for `model`."""
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                (file_hash, model, len(vector), vector.tobytes()),
+            )
+
+    def get_embeddings(self, model, file_hashes=None):
+        """
+        (file_hashes, matrix) of the stored `model` embeddings, optionally limited to
+        `file_hashes`; matrix is a float32 array with one row per returned hash.
+        """
+        sql = "SELECT file_hash, dim, vector FROM embeddings WHERE model = ?"
+        with self._connect() as conn:
+            if file_hashes is None:
+                rows = conn.execute(sql, (model,)).fetchall()
+            else:
+                keys, rows = list(file_hashes), []
+                # Stay well below SQLite's bound-parameter limit
+                for start in range(0, len(keys), 500):
+                    batch = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows.extend(conn.execute(f"{sql} AND file_hash IN ({placeholders})", [model, *batch]))
+        if not rows:
+            return [], np.empty((0, 0), dtype=np.float32)
+        matrix = np.vstack([np.frombuffer(row["vector"], dtype=np.float32, count=row["dim"]) for row in rows])
+        return [row["file_hash"] for row in rows], matrix
+
+
+def _synthetic_resume(rng, skills, words):
+    chosen = rng.choice(skills, 8, replace=False)
+    body = " ".join(rng.choice(words, 400))
+    return f"Experienced engineer skilled in {', '.join(chosen)}. {body}"
+
+
+def benchmark(pool_size=20_000, queries=("kafka AND terraform", "python NOT java", '"data lake"', "c++")):
+    import tempfile
+
+    rng = np.random.default_rng(11)
+    skills = ["kafka", "terraform", "python", "java", "spark", "aws", "azure", "c++", "c#",
+              "react", "kubernetes", "snowflake", "airflow", "golang", "sql", "data lake"]
+    words = np.array(["".join(rng.choice(list("abcdefghijklmnopqrstuvwxyz"), 7)) for _ in range(5_000)])
+    resumes = [_synthetic_resume(rng, skills, words) for _ in range(pool_size)]
+    with tempfile.TemporaryDirectory() as directory:
+        store = CandidateStore(os.path.join(directory, "bench.sqlite3"))
+        started = time.perf_counter()
+        with store._connect() as conn:
+            conn.executemany(
+                "INSERT INTO candidates (file_hash, file_name, name, location, identity, text, added_at, updated_at) "
+                "VALUES (?, ?, ?, NULL, ?, ?, 0, 0)",
+                (
+                    (f"{i:064x}", f"resume_{i}.pdf", f"Candidate {i}",
+                     json.dumps({"name": f"Candidate {i}"}), text)
+                    for i, text in enumerate(resumes)
+                ),
+            )
+        print(f"indexed {pool_size} resumes in {time.perf_counter() - started:.1f}s")
+        print(f"{'query':>22}{'hits':>7}{'ms':>8}")
+        for query in queries:
+            started = time.perf_counter()
+            hits = store.search(query, limit=DEFAULT_SEARCH_LIMIT)
+            elapsed = (time.perf_counter() - started) * 1000
+            print(f"{query:>22}{len(hits):>7}{elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    benchmark()
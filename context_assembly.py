@@ -0,0 +1,247 @@
+"""
+Context assembly for the RAG prompts: deduplicate, compress, fit a token budget.
+
+The retrieved chunks of a JD and a resume repeat themselves: splitter overlaps cut
+the same sentence into two chunks, bullet lists are pasted into several roles, and
+JDs end in equal-opportunity boilerplate. assemble_context() takes the chunks of
+each section in retrieval (relevance) order and keeps every sentence once:
+
+    context, stats = assemble_context([jd_chunks, resume_chunks], budget_tokens=3_000)
+    print(f"{stats['output_tokens']} of {stats['input_tokens']} tokens ({stats['ratio']:.0%})")
+
+Chunks and lines are split into sentence units. A unit is dropped when it is
+    boilerplate   legal / application text that matches BOILERPLATE_PATTERNS
+    a duplicate   the same words as a unit kept earlier in the section
+    a fragment    contained in a kept unit (a splitter overlap); a kept fragment is
+                  replaced by the full sentence when that comes later
+    near-duplicate  word-set Jaccard >= NEAR_DUPLICATE_JACCARD with a kept unit
+Units under MIN_DEDUP_WORDS words (headings, single skills, dates) are always kept.
+The first occurrence wins, so the copy in the more relevant chunk stays.
+
+Sections then share the token budget: each gets an equal part, and what a section
+does not need goes to the others. Within a section, chunks are filled in relevance
+order until the budget runs out, so the least relevant chunks are cut first. Kept
+units are emitted in their original order and layout; sections are joined with the
+"---" separator the prompts already use.
+
+Run this module directly for the golden-set check (no content sentence lost) and
+the token savings on overlapping, repetitive chunks:
+    python context_assembly.py
+"""
+import re
+import time
+
+from qbr_summarization import estimate_tokens
+
+DEFAULT_CONTEXT_TOKENS = 4_000
+SECTION_SEPARATOR = "\n\n---\n\n"
+# A single changed word in a 12-word bullet (Jaccard 0.85) is a different fact
+NEAR_DUPLICATE_JACCARD = 0.9
+# Shorter units are never deduplicated
+MIN_DEDUP_WORDS = 4
+BOILERPLATE_PATTERNS = (
+    r"equal (?:employment )?opportunity",
+    r"without regard to (?:race|age|sex|gender|religion|color)",
+    r"reasonable accommodations?",
+    r"all qualified applicants",
+    r"\be-?verify\b",
+    r"click (?:on )?(?:the )?apply",
+    r"\bapply (?:now|today|online)\b",
+    r"privacy (?:policy|notice)",
+    r"references (?:are )?available (?:up)?on request",
+    r"^page \d+ (?:of \d+)?$",
+)
+
+_BOILERPLATE = re.compile("|".join(BOILERPLATE_PATTERNS), re.IGNORECASE)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9(\"'•-])")
+_WORD = re.compile(r"[a-z0-9+#]+(?:[.'][a-z0-9+#]+)*")
+
+
+def _units(chunk):
+    """A chunk as lines of sentence units."""
+    return [_SENTENCE_END.split(line.strip()) for line in chunk.splitlines() if line.strip()]
+
+
+class _Unit:
+    __slots__ = ("text", "key", "words", "tokens", "kept")
+
+    def __init__(self, text):
+        self.text = text
+        words = _WORD.findall(text.lower())
+        self.key = f" {' '.join(words)} "
+        self.words = frozenset(words)
+        self.tokens = estimate_tokens(text)
+        self.kept = True
+
+
+def _deduplicate(chunks, stats):
+    """[[[ _Unit ]]] per chunk and line, with dropped units marked kept=False."""
+    kept = []
+    structured = []
+    for chunk in chunks:
+        lines = []
+        for sentences in _units(chunk):
+            line = []
+            for text in sentences:
+                unit = _Unit(text)
+                line.append(unit)
+                if _BOILERPLATE.search(text):
+                    unit.kept = False
+                    stats["boilerplate"] += 1
+                    continue
+                if len(unit.key.split()) < MIN_DEDUP_WORDS:
+                    continue
+                for other in kept:
+                    if not other.kept:
+                        continue
+                    if unit.key in other.key:
+                        unit.kept = False
+                        stats["duplicates"] += 1
+                        break
+                    if other.key in unit.key:
+                        # The earlier copy was a fragment of this sentence
+                        other.kept = False
+                        stats["duplicates"] += 1
+                        continue
+                    union = len(unit.words | other.words)
+                    if union and len(unit.words & other.words) / union >= NEAR_DUPLICATE_JACCARD:
+                        unit.kept = False
+                        stats["near_duplicates"] += 1
+                        break
+                if unit.kept:
+                    kept.append(unit)
+            lines.append(line)
+        structured.append(lines)
+    return structured
+
+
+def _section_budgets(needs, budget):
+    """Equal shares of `budget`, with what a section does not need given to the others."""
+    budgets = [0] * len(needs)
+    open_sections = [i for i, need in enumerate(needs) if need]
+    while open_sections and budget > 0:
+        share = budget // len(open_sections)
+        if not share:
+            break
+        for i in list(open_sections):
+            granted = min(share, needs[i] - budgets[i])
+            budgets[i] += granted
+            budget -= granted
+            if budgets[i] >= needs[i]:
+                open_sections.remove(i)
+    return budgets
+
+
+def assemble_context(sections, budget_tokens=DEFAULT_CONTEXT_TOKENS, separator=SECTION_SEPARATOR):
+    """
+    (context, stats) for `sections`, each a list of chunk texts in relevance order.
+    stats: input/output token estimates, their ratio, the counts of dropped
+    boilerplate, duplicate and near-duplicate units, whether the budget cut the
+    context, and the time taken.
+    """
+    started = time.perf_counter()
+    sections = [[chunk for chunk in chunks if chunk and chunk.strip()] for chunks in sections]
+    stats = {"chunks": sum(len(chunks) for chunks in sections), "boilerplate": 0,
+             "duplicates": 0, "near_duplicates": 0, "truncated": False}
+    original = separator.join("\n\n".join(chunks) for chunks in sections if chunks)
+    stats["input_tokens"] = estimate_tokens(original) if original else 0
+
+    deduplicated = [_deduplicate(chunks, stats) for chunks in sections]
+    needs = [sum(unit.tokens for lines in chunks for line in lines for unit in line if unit.kept)
+             for chunks in deduplicated]
+    budgets = _section_budgets(needs, max(0, budget_tokens))
+
+    texts = []
+    for chunks, budget in zip(deduplicated, budgets):
+        used, chunk_texts, full = 0, [], False
+        for lines in chunks:
+            kept_lines = []
+            for line in lines:
+                kept = []
+                for unit in line:
+                    if not unit.kept:
+                        continue
+                    if used + unit.tokens > budget:
+                        # The rest of the section is less relevant: stop here
+                        full = True
+                        break
+                    used += unit.tokens
+                    kept.append(unit.text)
+                if kept:
+                    kept_lines.append(" ".join(kept))
+                if full:
+                    break
+            if kept_lines:
+                chunk_texts.append("\n".join(kept_lines))
+            if full:
+                break
+        stats["truncated"] = stats["truncated"] or full
+        if chunk_texts:
+            texts.append("\n\n".join(chunk_texts))
+
+    context = separator.join(texts)
+    stats["output_tokens"] = estimate_tokens(context) if context else 0
+    stats["ratio"] = stats["output_tokens"] / stats["input_tokens"] if stats["input_tokens"] else 1.0
+    stats["seconds"] = time.perf_counter() - started
+    return context, stats
+
+
+def _golden_set():
+    # A JD and a resume whose sentences are all distinct, and the facts to keep
+    roles = [
+        (f"Data Engineer, Company {i}", f"Jan {2014 + 2 * i} - Dec {2015 + 2 * i}", [
+            f"Built the {topic} pipeline on Spark and Kafka for {i + 2} business units.",
+            f"Reduced {topic} job runtime by {20 + 5 * i}% with partitioning and caching.",
+            "Mentored junior engineers and ran code reviews for the data platform team."
+            if i % 2 else "Mentored junior engineers and ran code reviews for the platform team.",
+        ])
+        for i, topic in enumerate(["billing", "claims", "pricing", "inventory", "marketing"])
+    ]
+    resume_lines = ["Professional Summary:", "Data engineer with 10 years on AWS and Azure platforms.",
+                    "Experience:"]
+    for title, dates, bullets in roles:
+        resume_lines += [title, dates] + [f"• {bullet}" for bullet in bullets]
+    jd_lines = ["Responsibilities:"] + [
+        f"- Design and operate the {area} data pipelines on AWS with Spark and Airflow."
+        for area in ("ingestion", "reporting", "forecasting")
+    ] + ["Requirements:", "- 5+ years of experience with Python and SQL.",
+         "- Hands-on experience with Kafka, Snowflake and Terraform.",
+         "Benefits:", "TEKsystems is an equal opportunity employer. All qualified applicants will "
+         "receive consideration without regard to race, color or religion."]
+    return "\n".join(jd_lines), "\n".join(resume_lines)
+
+
+def _windows(text, size=400, overlap=150):
+    # Fixed windows with overlap, as the character splitter produced
+    return [text[start:start + size] for start in range(0, len(text), size - overlap)]
+
+
+def benchmark(budget_tokens=DEFAULT_CONTEXT_TOKENS):
+    jd, resume = _golden_set()
+    # Retrieval returns overlapping windows, and chunks with repeated bullets
+    jd_chunks = _windows(jd)
+    resume_chunks = _windows(resume) + [chunk for chunk in _windows(resume)[::2]]
+    context, stats = assemble_context([jd_chunks, resume_chunks], budget_tokens=budget_tokens)
+    print(f"{stats['chunks']} chunks: {stats['input_tokens']} -> {stats['output_tokens']} tokens "
+          f"({stats['ratio']:.0%}) in {stats['seconds'] * 1000:.1f} ms; dropped {stats['duplicates']} "
+          f"duplicates/fragments, {stats['near_duplicates']} near-duplicates, "
+          f"{stats['boilerplate']} boilerplate")
+
+    flat = " ".join(context.split())
+    facts = [sentence for text in (jd, resume) for line in text.splitlines()
+             for sentence in _SENTENCE_END.split(line.lstrip("•- "))
+             if not _BOILERPLATE.search(sentence)]
+    # The two wordings of the mentoring bullet count as one fact
+    lost = [fact for fact in facts if fact not in flat and "Mentored" not in fact]
+    assert "Mentored" in flat
+    print(f"golden set: {len(facts) - len(lost)}/{len(facts)} content sentences kept")
+    assert not lost, lost
+
+    tight, tight_stats = assemble_context([jd_chunks, resume_chunks], budget_tokens=200)
+    jd_part, resume_part = tight.split(SECTION_SEPARATOR)
+    print(f"200-token budget: {tight_stats['output_tokens']} tokens, "
+          f"jd {estimate_tokens(jd_part)} / resume {estimate_tokens(resume_part)}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,222 @@
+"""
+Pure-Python text extraction for legacy Word 97-2003 (.doc) files.
+
+A .doc file is an OLE2 compound file (a small FAT file system inside one file).
+OleFile reads its streams; extract_doc_text then follows the Word File Information
+Block (FIB) to the piece table in the 0Table/1Table stream and decodes the text
+pieces of the WordDocument stream.
+
+References: [MS-CFB] Compound File Binary File Format, [MS-DOC] Word (.doc) Binary
+File Format.
+"""
+import re
+import struct
+
+from docx_extraction import extract_docx_text
+
+OLE_SIGNATURE = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+ZIP_SIGNATURE = b"PK\x03\x04"
+
+FREESECT = 0xFFFFFFFF
+ENDOFCHAIN = 0xFFFFFFFE
+NOSTREAM = 0xFFFFFFFF
+
+WORD_IDENT = 0xA5EC
+# Word 6/95 FIBs (nFib 101-105) carry their own ident (0xA5DC) and no piece table
+WORD97_MIN_FIB = 106
+
+
+class OleFile:
+    """Minimal read-only OLE2 compound file reader ([MS-CFB])."""
+
+    def __init__(self, data):
+        if data[:8] != OLE_SIGNATURE:
+            raise ValueError("Not an OLE2 compound file")
+        self.data = data
+        self.sector_size = 1 << struct.unpack_from("<H", data, 0x1E)[0]
+        self.mini_sector_size = 1 << struct.unpack_from("<H", data, 0x20)[0]
+        (num_fat_sectors, first_dir_sector, _, self.mini_cutoff,
+         first_minifat_sector, num_minifat_sectors,
+         first_difat_sector, num_difat_sectors) = struct.unpack_from("<8I", data, 0x2C)
+
+        self.fat = self._read_fat(num_fat_sectors, first_difat_sector, num_difat_sectors)
+        self.entries = self._read_directory(first_dir_sector)
+
+        root = self.entries[0]
+        self.mini_stream = self._read_chain(root["start"], self.fat)[:root["size"]]
+        minifat_bytes = self._read_chain(first_minifat_sector, self.fat) if num_minifat_sectors else b""
+        self.minifat = list(struct.unpack(f"<{len(minifat_bytes) // 4}I", minifat_bytes))
+
+    def _sector(self, index):
+        offset = (index + 1) * self.sector_size
+        if offset >= len(self.data):
+            raise ValueError(f"Sector {index} is outside the file")
+        return self.data[offset:offset + self.sector_size]
+
+    def _read_fat(self, num_fat_sectors, difat_sector, num_difat_sectors):
+        difat = list(struct.unpack_from("<109I", self.data, 0x4C))
+        per_sector = self.sector_size // 4
+        for _ in range(num_difat_sectors):
+            if difat_sector in (ENDOFCHAIN, FREESECT):
+                break
+            values = struct.unpack(f"<{per_sector}I", self._sector(difat_sector))
+            difat.extend(values[:-1])
+            difat_sector = values[-1]
+
+        fat = []
+        for sector in difat[:num_fat_sectors]:
+            if sector == FREESECT:
+                continue
+            fat.extend(struct.unpack(f"<{per_sector}I", self._sector(sector)))
+        return fat
+
+    def _chain(self, start, table):
+        sector = start
+        # A chain can never be longer than the table; guards against cyclic chains
+        for _ in range(len(table) + 1):
+            if sector in (ENDOFCHAIN, FREESECT) or sector >= len(table):
+                return
+            yield sector
+            sector = table[sector]
+        raise ValueError("Cyclic sector chain")
+
+    def _read_chain(self, start, table):
+        return b"".join(self._sector(sector) for sector in self._chain(start, table))
+
+    def _read_mini_chain(self, start):
+        size = self.mini_sector_size
+        return b"".join(
+            self.mini_stream[sector * size:(sector + 1) * size]
+            for sector in self._chain(start, self.minifat)
+        )
+
+    def _read_directory(self, first_dir_sector):
+        raw = self._read_chain(first_dir_sector, self.fat)
+        entries = []
+        for offset in range(0, len(raw) - 127, 128):
+            name_length, entry_type = struct.unpack_from("<HB", raw, offset + 64)
+            left, right, child = struct.unpack_from("<3I", raw, offset + 68)
+            start, size = struct.unpack_from("<IQ", raw, offset + 116)
+            if self.sector_size == 512:
+                # Version 3 files only define the low 32 bits of the stream size
+                size &= 0xFFFFFFFF
+            name = raw[offset:offset + max(0, name_length - 2)].decode("utf-16-le", "replace")
+            entries.append({
+                "name": name, "type": entry_type, "left": left, "right": right,
+                "child": child, "start": start, "size": size,
+            })
+        return entries
+
+    def root_streams(self):
+        """Map of stream name -> directory entry for the root storage's children."""
+        children = {}
+        pending = [self.entries[0]["child"]]
+        while pending:
+            sid = pending.pop()
+            if sid == NOSTREAM or sid >= len(self.entries) or self.entries[sid]["name"] in children:
+                continue
+            entry = self.entries[sid]
+            children[entry["name"]] = entry
+            pending.extend((entry["left"], entry["right"]))
+        return children
+
+    def read_stream(self, name):
+        entry = self.root_streams().get(name)
+        if entry is None or entry["type"] != 2:
+            raise KeyError(f"Stream not found: {name}")
+        if entry["size"] < self.mini_cutoff:
+            data = self._read_mini_chain(entry["start"])
+        else:
+            data = self._read_chain(entry["start"], self.fat)
+        return data[:entry["size"]]
+
+
+def _piece_table_text(word_stream, table_stream, fc_clx, lcb_clx):
+    clx = table_stream[fc_clx:fc_clx + lcb_clx]
+    position = 0
+    # Skip Prc entries (property modifiers) until the Pcdt that holds the piece table
+    while position < len(clx) and clx[position] == 0x01:
+        cb_grpprl = struct.unpack_from("<h", clx, position + 1)[0]
+        position += 3 + cb_grpprl
+    if position >= len(clx) or clx[position] != 0x02:
+        raise ValueError("Piece table not found")
+    lcb = struct.unpack_from("<I", clx, position + 1)[0]
+    plc = clx[position + 5:position + 5 + lcb]
+
+    pieces = (lcb - 4) // 12
+    cps = struct.unpack_from(f"<{pieces + 1}I", plc, 0)
+    parts = []
+    for i in range(pieces):
+        fc = struct.unpack_from("<I", plc, (pieces + 1) * 4 + i * 8 + 2)[0]
+        chars = cps[i + 1] - cps[i]
+        if fc & 0x40000000:
+            # Compressed piece: one byte per character in cp1252
+            start = (fc & ~0x40000000) // 2
+            parts.append(word_stream[start:start + chars].decode("cp1252", "replace"))
+        else:
+            parts.append(word_stream[fc:fc + chars * 2].decode("utf-16-le", "replace"))
+    return "".join(parts)
+
+
+def _clean_word_text(text):
+    # Fields: drop the instruction (between 0x13 and 0x14), keep the displayed result.
+    # Nested fields are resolved innermost first.
+    previous = None
+    while previous != text:
+        previous = text
+        text = re.sub(r"\x13[^\x13\x14\x15]*\x14([^\x13\x14\x15]*)\x15", r"\1", text)
+        text = re.sub(r"\x13[^\x13\x14\x15]*\x15", "", text)
+    # Table cells end with 0x07 and rows with an extra 0x07
+    text = text.replace("\x07\x07", "\n").replace("\x07", " | ")
+    text = re.sub(r"[\r\x0b\x0c]", "\n", text)
+    text = text.replace("\x1e", "-").replace("\xa0", " ")
+    # Object anchors, pictures, optional hyphens and other control characters
+    text = re.sub(r"[\x00-\x08\x0e-\x1f]", "", text)
+    text = re.sub(r"( \| )+\n", "\n", text)
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+
+def extract_doc_text(file_bytes, include_text_boxes=True):
+    """
+    Extract the text of a Word 97-2003 .doc file.
+
+    DOCX files saved with a .doc extension are detected and handed to the DOCX
+    extractor. Raises ValueError for encrypted or unrecognised files.
+    """
+    if file_bytes[:4] == ZIP_SIGNATURE:
+        return extract_docx_text(file_bytes)
+
+    ole = OleFile(file_bytes)
+    word_stream = ole.read_stream("WordDocument")
+    ident, n_fib = struct.unpack_from("<HH", word_stream, 0)
+    if n_fib >= WORD97_MIN_FIB and ident != WORD_IDENT:
+        raise ValueError("WordDocument stream has no Word FIB")
+    flags = struct.unpack_from("<H", word_stream, 0x0A)[0]
+    if flags & 0x0100:
+        raise ValueError("Encrypted .doc files are not supported")
+
+    if n_fib < WORD97_MIN_FIB:
+        # Word 6/95: no piece table, the text runs from fcMin to fcMac in cp1252
+        fc_min, fc_mac = struct.unpack_from("<II", word_stream, 0x18)
+        return _clean_word_text(word_stream[fc_min:fc_mac].decode("cp1252", "replace"))
+
+    table_stream = ole.read_stream("1Table" if flags & 0x0200 else "0Table")
+
+    # FibBase (32 bytes), then the variable-length FibRgW, FibRgLw and FibRgFcLcb
+    csw = struct.unpack_from("<H", word_stream, 32)[0]
+    rg_lw = 32 + 2 + csw * 2 + 2
+    cslw = struct.unpack_from("<H", word_stream, rg_lw - 2)[0]
+    ccp = struct.unpack_from("<8i", word_stream, rg_lw + 12)  # ccpText .. ccpHdrTxbx
+    ccp_text = ccp[0]
+    rg_fc_lcb = rg_lw + cslw * 4 + 2
+    fc_clx, lcb_clx = struct.unpack_from("<II", word_stream, rg_fc_lcb + 33 * 8)
+
+    text = _piece_table_text(word_stream, table_stream, fc_clx, lcb_clx)
+    body = text[:ccp_text]
+    if include_text_boxes:
+        # Stories follow the main text in a fixed order: footnotes, headers,
+        # macros, annotations, endnotes, then text boxes
+        txbx_start = ccp_text + sum(ccp[1:6])
+        body += "\n" + text[txbx_start:txbx_start + ccp[6]]
+    return _clean_word_text(body)
@@ -0,0 +1,193 @@
+"""
+Streaming DOCX text extraction.
+
+Reads word/document.xml (plus header/footer parts) straight out of the zip with an
+incremental XML parser instead of building the python-docx object model. Paragraphs,
+table rows (cells joined with " | ") and text boxes are emitted in reading order, so
+skills matrices kept in tables are no longer dropped.
+
+Run this module directly to benchmark it against python-docx:
+    python docx_extraction.py [file.docx ...]
+"""
+import io
+import mmap
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
+HEADER_PART = re.compile(r"^word/header\d*\.xml$")
+FOOTER_PART = re.compile(r"^word/footer\d*\.xml$")
+
+
+def _iter_part_blocks(stream):
+    """Yield text blocks from one WordprocessingML part, in document order."""
+    # Frames: paragraph ("p"), table row ("tr"), table cell ("tc"), text box ("txbx")
+    stack = [{"kind": "root", "parts": [], "after": []}]
+    ready = []
+    fallback_depth = 0
+    body = None
+
+    def deliver(block):
+        if not block:
+            return
+        parent = stack[-1]
+        if parent["kind"] == "root":
+            ready.append(block)
+        elif parent["kind"] == "p":
+            # Text box anchored in a paragraph: emit right after that paragraph
+            parent["after"].append(block)
+        else:
+            parent["parts"].append(block)
+
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = elem.tag
+        if tag == MC_FALLBACK:
+            # VML fallback duplicates the text box content of mc:Choice
+            fallback_depth += 1 if event == "start" else -1
+            continue
+        if fallback_depth:
+            if event == "end":
+                elem.clear()
+            continue
+
+        if event == "start":
+            if tag == W + "body":
+                body = elem
+            elif tag == W + "p":
+                stack.append({"kind": "p", "parts": [], "after": []})
+            elif tag == W + "tr":
+                stack.append({"kind": "tr", "parts": []})
+            elif tag == W + "tc":
+                stack.append({"kind": "tc", "parts": []})
+            elif tag == W + "txbxContent":
+                stack.append({"kind": "txbx", "parts": []})
+            continue
+
+        if tag == W + "t":
+            if stack[-1]["kind"] == "p" and elem.text:
+                stack[-1]["parts"].append(elem.text)
+        elif tag == W + "tab":
+            if stack[-1]["kind"] == "p":
+                stack[-1]["parts"].append("\t")
+        elif tag in (W + "br", W + "cr"):
+            if stack[-1]["kind"] == "p":
+                stack[-1]["parts"].append("\n")
+        elif tag == W + "p":
+            frame = stack.pop()
+            deliver("".join(frame["parts"]).strip())
+            for block in frame["after"]:
+                deliver(block)
+            elem.clear()
+        elif tag == W + "tc":
+            frame = stack.pop()
+            stack[-1]["parts"].append(" ".join(frame["parts"]))
+        elif tag == W + "tr":
+            frame = stack.pop()
+            deliver(" | ".join(cell for cell in frame["parts"] if cell))
+            elem.clear()
+        elif tag == W + "txbxContent":
+            frame = stack.pop()
+            deliver("\n".join(frame["parts"]))
+        elif tag == W + "tbl":
+            elem.clear()
+
+        if ready:
+            yield from ready
+            ready.clear()
+            if body is not None and len(stack) == 1:
+                # Drop already-emitted (cleared) children so memory stays flat
+                body.clear()
+
+
+def iter_docx_blocks(source, include_headers=True):
+    """
+    Yield text blocks (paragraphs, table rows, text boxes) from a DOCX file.
+
+    source: bytes (or an mmap/memoryview), a path, or a binary file-like object.
+    Header parts are emitted before the body and footer parts after it; identical
+    headers/footers (first/even/default variants) are emitted once.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as archive:
+        names = archive.namelist()
+        headers = sorted(n for n in names if HEADER_PART.match(n)) if include_headers else []
+        footers = sorted(n for n in names if FOOTER_PART.match(n)) if include_headers else []
+
+        seen_decorations = set()
+        for part in headers + ["word/document.xml"] + footers:
+            is_decoration = part != "word/document.xml"
+            with archive.open(part) as stream:
+                for block in _iter_part_blocks(stream):
+                    if is_decoration:
+                        if block in seen_decorations:
+                            continue
+                        seen_decorations.add(block)
+                    yield block
+
+
+def extract_docx_text(file_bytes, separator="\n", include_headers=True):
+    """Return the full text of a DOCX file, blocks joined with `separator`."""
+    return separator.join(iter_docx_blocks(file_bytes, include_headers=include_headers))
+
+
+def _build_sample_docx(paragraphs, tables):
+    import docx  # python-docx, only needed for the benchmark
+
+    document = docx.Document()
+    for i in range(paragraphs):
+        document.add_paragraph(f"Paragraph {i}: delivered data pipelines in Python, Spark and SQL.")
+        if tables and i % max(1, paragraphs // tables) == 0:
+            table = document.add_table(rows=5, cols=3)
+            for row in table.rows:
+                for col, cell in enumerate(row.cells):
+                    cell.text = ["Python", "5 years", "Databricks"][col]
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def benchmark(samples, repeat=3):
+    """
+    Compare this extractor with python-docx on each (label, file_bytes) sample.
+    Prints best-of-`repeat` wall time and the tracemalloc peak (measured in a
+    separate run, since tracing slows extraction down).
+    """
+    import time
+    import tracemalloc
+
+    import docx
+
+    def python_docx_text(file_bytes):
+        document = docx.Document(io.BytesIO(file_bytes))
+        return "\n".join(p.text for p in document.paragraphs)
+
+    print(f"{'sample':<30}{'extractor':<14}{'seconds':>10}{'peak MiB':>10}{'chars':>10}")
+    for label, file_bytes in samples:
+        for name, extract in (("streaming", extract_docx_text), ("python-docx", python_docx_text)):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                text = extract(file_bytes)
+                timings.append(time.perf_counter() - started)
+            tracemalloc.start()
+            extract(file_bytes)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{label:<30}{name:<14}{min(timings):>10.3f}{peak / 2**20:>10.1f}{len(text):>10}")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        samples = [(path, open(path, "rb").read()) for path in sys.argv[1:]]
+    else:
+        samples = [
+            (f"{n} paragraphs, {n // 100} tables", _build_sample_docx(n, n // 100))
+            for n in (1_000, 10_000, 50_000)
+        ]
+    benchmark(samples)
@@ -0,0 +1,197 @@
+"""
+CPU embedding engine on an int8-quantized ONNX export of the embedding model.
+
+FastEmbedEmbeddings() runs with its default batch size and threading. OnnxEmbeddings
+runs the model with onnxruntime directly, with the batch size and the number of
+intra-op threads set explicitly, and by default on an int8 copy of the weights
+(dynamic quantization: int8 weights, activations quantized per batch):
+
+    quantize_model("models/bge-small-en-v1.5")           # once: writes model_int8.onnx
+    embeddings = OnnxEmbeddings("models/bge-small-en-v1.5", batch_size=64, threads=4)
+    vectors = embeddings.embed_documents(chunks)          # LangChain Embeddings interface
+
+The model directory is a transformer ONNX export with its tokenizer, e.g. from
+`optimum-cli export onnx --model BAAI/bge-small-en-v1.5 models/bge-small-en-v1.5`:
+model.onnx (full precision) and tokenizer.json. Texts are sorted by length before
+batching so each batch pads to similar lengths, and results come back in input
+order. Vectors are pooled (CLS for BGE models, mean for sentence-transformers) and
+normalized. model_name names the precision too, so stored embeddings of the int8
+and full-precision models never mix.
+
+The apps use this engine instead of FastEmbed when EMBEDDING_MODEL_DIR is set (see
+configured_embeddings()), with EMBEDDING_BATCH_SIZE and EMBEDDING_THREADS.
+Quantization needs the `onnx` package besides onnxruntime. onnxruntime and
+tokenizers are imported only when the engine is used, so the apps that import
+configured_embeddings() run without them when EMBEDDING_MODEL_DIR is not set.
+
+Run this module with a model directory for chunks/sec over batch sizes and
+thread counts, and cosine agreement with the full-precision model:
+    python embedding_engine.py models/bge-small-en-v1.5
+"""
+import os
+import time
+
+import numpy as np
+
+FULL_PRECISION_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_MAX_LENGTH = 512
+POOLING = ("cls", "mean")
+
+
+def quantize_model(model_dir, source=FULL_PRECISION_FILE, target=INT8_FILE):
+    """Write an int8 dynamically quantized copy of the model; returns its path."""
+    # Imported here: only needed once per model, and it requires the onnx package
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source_path = os.path.join(model_dir, source)
+    target_path = os.path.join(model_dir, target)
+    quantize_dynamic(source_path, target_path, weight_type=QuantType.QInt8, per_channel=True)
+    return target_path
+
+
+def configured_embeddings(default_factory):
+    """
+    OnnxEmbeddings for the model in EMBEDDING_MODEL_DIR (int8 unless
+    EMBEDDING_QUANTIZED=0), or default_factory() when it is not set.
+    """
+    model_dir = os.getenv("EMBEDDING_MODEL_DIR")
+    if not model_dir:
+        return default_factory()
+    return OnnxEmbeddings(
+        model_dir,
+        quantized=os.getenv("EMBEDDING_QUANTIZED", "1") != "0",
+        batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        threads=int(os.getenv("EMBEDDING_THREADS", 0)) or None,
+        pooling=os.getenv("EMBEDDING_POOLING", "cls"),
+    )
+
+
+def default_threads():
+    """Physical-ish core count: onnxruntime gains little from hyper-threads."""
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+class OnnxEmbeddings:
+    """LangChain-compatible embeddings computed by an ONNX model on the CPU."""
+
+    def __init__(self, model_dir, quantized=True, batch_size=DEFAULT_BATCH_SIZE, threads=None,
+                 max_length=DEFAULT_MAX_LENGTH, pooling="cls"):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        if pooling not in POOLING:
+            raise ValueError(f"pooling must be one of {POOLING}, not {pooling!r}")
+        model_file = INT8_FILE if quantized else FULL_PRECISION_FILE
+        model_path = os.path.join(model_dir, model_file)
+        if quantized and not os.path.exists(model_path):
+            model_path = quantize_model(model_dir)
+        self.batch_size = batch_size
+        self.threads = threads or default_threads()
+        self.pooling = pooling
+        self.model_name = f"{os.path.basename(os.path.normpath(model_dir))}-{'int8' if quantized else 'fp32'}"
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.threads
+        # Batches run one at a time; all threads go to the operators of the batch
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._inputs = {node.name for node in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()  # to the longest text of each batch
+
+    def _embed_batch(self, texts):
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        output = self.session.run(None, {name: value for name, value in feeds.items() if name in self._inputs})[0]
+        if output.ndim == 3:  # token embeddings: (batch, tokens, dim)
+            if self.pooling == "cls":
+                output = output[:, 0]
+            else:
+                mask = attention_mask[..., None].astype(np.float32)
+                output = (output * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        norms = np.linalg.norm(output, axis=1, keepdims=True)
+        return (output / np.where(norms > 0, norms, 1)).astype(np.float32)
+
+    def embed(self, texts):
+        """float32 array with one unit-length row per text, in input order."""
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        # Batches of similar lengths waste little compute on padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = None
+        for start in range(0, len(order), self.batch_size):
+            batch = order[start:start + self.batch_size]
+            embedded = self._embed_batch([texts[i] for i in batch])
+            if vectors is None:
+                vectors = np.empty((len(texts), embedded.shape[1]), dtype=np.float32)
+            vectors[batch] = embedded
+        return vectors
+
+    def embed_documents(self, texts):
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text):
+        return self.embed([text])[0].tolist()
+
+
+def _synthetic_chunks(count, words_per_chunk=(60, 220), seed=3):
+    # Resume-like chunks: skills, tools and action verbs in varying lengths
+    vocabulary = (
+        "developed designed implemented migrated automated led managed optimized built deployed "
+        "python java sql spark kafka airflow aws azure gcp docker kubernetes terraform react "
+        "pipelines microservices dashboards models api data platform team clients reporting "
+        "experience years senior engineer analyst architect project delivery agile stakeholders"
+    ).split()
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(*words_per_chunk, size=count)
+    return [" ".join(rng.choice(vocabulary, size=length)) for length in lengths]
+
+
+def benchmark(model_dir, chunks=1_000, batch_sizes=(8, 32, 128), thread_counts=None,
+              chunks_per_resume=6, backlog=10_000, pooling="cls"):
+    texts = _synthetic_chunks(chunks)
+    thread_counts = thread_counts or sorted({1, default_threads(), os.cpu_count() or 1})
+    reference = OnnxEmbeddings(model_dir, quantized=False, threads=max(thread_counts), pooling=pooling)
+    started = time.perf_counter()
+    exact = reference.embed(texts)
+    print(f"full precision, batch {reference.batch_size}, {reference.threads} threads: "
+          f"{chunks / (time.perf_counter() - started):.1f} chunks/s")
+
+    print(f"{'model':>6}{'batch':>7}{'threads':>9}{'chunks/s':>10}{'backlog h':>11}")
+    best = (0, None)
+    for threads in thread_counts:
+        for batch_size in batch_sizes:
+            engine = OnnxEmbeddings(model_dir, batch_size=batch_size, threads=threads, pooling=pooling)
+            engine.embed(texts[:batch_size])  # warm-up
+            started = time.perf_counter()
+            vectors = engine.embed(texts)
+            rate = chunks / (time.perf_counter() - started)
+            hours = backlog * chunks_per_resume / rate / 3600
+            print(f"{'int8':>6}{batch_size:>7}{threads:>9}{rate:>10.1f}{hours:>11.2f}")
+            best = max(best, (rate, (batch_size, threads)))
+
+    agreement = (vectors * exact).sum(axis=1)
+    print(f"cosine(int8, full precision): mean {agreement.mean():.4f}, min {agreement.min():.4f}")
+    rate, (batch_size, threads) = best
+    print(f"best: batch {batch_size}, {threads} threads; a {backlog}-resume backlog at "
+          f"{chunks_per_resume} chunks per resume takes {backlog * chunks_per_resume / rate / 60:.0f} min")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        sys.exit("usage: python embedding_engine.py MODEL_DIR [cls|mean]")
+    benchmark(sys.argv[1], pooling=sys.argv[2] if len(sys.argv) > 2 else "cls")
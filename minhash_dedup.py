@@ -0,0 +1,415 @@
+"""
+Near-duplicate detection with MinHash signatures and LSH banding.
+
+Texts are reduced to shingle sets (character n-grams for short names, hashed word
+n-grams for documents), each set to a fixed-size MinHash signature, and signatures are
+bucketed band by band so only texts that collide in some band become candidates.
+Candidates are screened on their estimated similarity (the fraction of agreeing
+signature slots) before the exact shingle Jaccard is computed, so finding the pairs
+above a threshold costs roughly linear time in the number of texts instead of
+comparing every pair.
+
+    sets = [char_shingles(name) for name in names]
+    pairs = near_duplicate_pairs(sets, threshold=0.6)   # [(i, j, jaccard), ...]
+    labels = cluster_labels(len(names), pairs)
+
+    # Documents: hashed word 5-grams, tokenized in numpy batches and
+    # signed by one-permutation hashing
+    groups = duplicate_groups(word_shingle_hashes(resumes), threshold=0.8)
+
+Run this module directly for benchmarks on synthetic project names and resumes:
+    python minhash_dedup.py
+"""
+import re
+import time
+import zlib
+
+import numpy as np
+
+DEFAULT_NUM_PERM = 128
+MAX_HASH = np.uint64(0xFFFFFFFF)
+# Signature cells computed per numpy batch (num_perm x shingles), bounds memory
+BATCH_CELLS = 4_000_000
+# Members of larger buckets are only paired with their next MAX_BUCKET_SIZE - 1
+# neighbours; they stay connected for clustering without m^2 pairs
+MAX_BUCKET_SIZE = 50
+# Candidates whose estimated similarity is this far below the threshold are dropped
+ESTIMATE_SLACK = 0.1
+# Text bytes tokenized per numpy batch by word_shingle_hashes(), bounds memory
+BATCH_BYTES = 2_000_000
+# Shingle hashes keep 64 - TEXT_BITS bits; the rest index the text within a batch
+TEXT_BITS = 16
+
+# Bytes that belong to words: digits, lower-case ASCII letters and every byte of a
+# non-ASCII character
+_WORD_BYTE = np.zeros(256, dtype=bool)
+_WORD_BYTE[ord("0"):ord("9") + 1] = _WORD_BYTE[ord("a"):ord("z") + 1] = _WORD_BYTE[128:] = True
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def char_shingles(text, k=3):
+    """Character k-grams of the lower-cased text with spaces and punctuation removed."""
+    compact = _NON_ALNUM.sub("", str(text).lower())
+    if len(compact) <= k:
+        return {compact} if compact else set()
+    return {compact[i:i + k] for i in range(len(compact) - k + 1)}
+
+
+def word_shingles(text, k=3):
+    """Word k-grams of the lower-cased text (punctuation ignored)."""
+    words = _NON_ALNUM.sub(" ", str(text).lower()).split()
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def _mix64(values):
+    """splitmix64 finalizer: spreads structured uint64 values over all 64 bits."""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values ^= values >> np.uint64(27)
+    values *= np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def _odd_weights(count, salt):
+    return _mix64(np.arange(count, dtype=np.uint64) + np.uint64(salt)) | np.uint64(1)
+
+
+def _shingle_batch(texts, k):
+    encoded = [text.encode("utf-8") for text in texts]
+    data = np.frombuffer(b" ".join(encoded), dtype=np.uint8)
+    empty = np.empty(0, dtype=np.uint64)
+    is_word = np.zeros(len(data) + 2, dtype=bool)
+    is_word[1:-1] = _WORD_BYTE[data]
+    # Word boundaries alternate: start, end, start, end, ...
+    boundaries = np.flatnonzero(is_word[1:] != is_word[:-1])
+    starts, ends = boundaries[0::2], boundaries[1::2]
+    if len(starts) < k:
+        return [empty] * len(texts)
+    # Word hash: sum of byte * weight of its position within the word (wraps mod 2**64)
+    lengths = ends - starts
+    offsets = np.cumsum(lengths) - lengths
+    positions = np.arange(int(lengths.sum()), dtype=np.int32) - np.repeat(offsets, lengths).astype(np.int32)
+    weighted = data[is_word[1:-1]].astype(np.uint64) * _odd_weights(int(lengths.max()), 1)[positions]
+    word_hashes = _mix64(np.add.reduceat(weighted, offsets))
+    text_starts = np.cumsum([0] + [len(raw) + 1 for raw in encoded[:-1]])
+    word_text = np.searchsorted(text_starts, starts, side="right") - 1
+
+    count = len(word_hashes) - k + 1
+    combined = np.zeros(count, dtype=np.uint64)
+    for offset, weight in enumerate(_odd_weights(k, 2)):
+        combined += word_hashes[offset:offset + count] * weight
+    # Drop k-grams that run across two texts
+    valid = word_text[:count] == word_text[k - 1:]
+    # Sort by (text, hash) in one pass: the text index fills the top bits of the key
+    # and the hash is truncated to the remaining ones
+    shift = np.uint64(64 - TEXT_BITS)
+    keys = (word_text[:count][valid].astype(np.uint64) << shift) | (
+        _mix64(combined[valid]) >> np.uint64(TEXT_BITS)
+    )
+    keys.sort()
+    keys = keys[np.r_[True, keys[1:] != keys[:-1]]]
+    hashes = keys & np.uint64((1 << (64 - TEXT_BITS)) - 1)
+    bounds = np.searchsorted(keys >> shift, np.arange(len(texts) + 1, dtype=np.uint64))
+    return [hashes[bounds[i]:bounds[i + 1]] for i in range(len(texts))]
+
+
+def word_shingle_hashes(texts, k=5, batch_bytes=BATCH_BYTES):
+    """
+    Word k-grams of many long texts as one sorted array of unique 48-bit hashes
+    (uint64) per text. Texts are lower-cased and split on anything but letters and digits;
+    tokenizing and hashing run as numpy operations over the raw bytes of a batch
+    of texts, so there is no per-word Python work. Texts with fewer than k words
+    get an empty array.
+    """
+    results, batch, size = [], [], 0
+    for text in texts:
+        text = str(text).lower()
+        batch.append(text)
+        size += len(text)
+        if size >= batch_bytes or len(batch) == 1 << TEXT_BITS:
+            results.extend(_shingle_batch(batch, k))
+            batch, size = [], 0
+    if batch:
+        results.extend(_shingle_batch(batch, k))
+    return results
+
+
+def jaccard(a, b):
+    """Jaccard similarity of two shingle sets or two sorted unique hash arrays."""
+    if isinstance(a, np.ndarray):
+        common = np.intersect1d(a, b, assume_unique=True).size
+        union = a.size + b.size - common
+        return common / union if union else 1.0
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """Computes MinHash signatures with `num_perm` universal hash permutations."""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        # Odd multipliers for multiply-shift hashing
+        self.a = rng.integers(0, 2**63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+
+    def signatures(self, shingle_sets):
+        """Return a (len(shingle_sets), num_perm) uint32 array; empty sets get MAX_HASH."""
+        result = np.full((len(shingle_sets), self.num_perm), MAX_HASH, dtype=np.uint32)
+        # Shingles repeat heavily across texts: hash each distinct one only once
+        vocabulary, ids, lengths = {}, [], []
+        for shingles in shingle_sets:
+            ids.extend(vocabulary.setdefault(shingle, len(vocabulary)) for shingle in shingles)
+            lengths.append(len(shingles))
+        if not vocabulary:
+            return result
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in vocabulary),
+            dtype=np.uint64, count=len(vocabulary),
+        )
+        # Multiply-shift: (a*x + b) mod 2**64, keep the high 32 bits. Avoids a slow
+        # 64-bit modulo and wraps on overflow by design
+        table = ((np.outer(hashes, self.a) + self.b) >> np.uint64(32)).astype(np.uint32)
+
+        ids = np.asarray(ids, dtype=np.int64)
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+        rows = np.flatnonzero(np.asarray(lengths))
+        ends = offsets[rows + 1]
+        budget = max(1, BATCH_CELLS // self.num_perm)
+        start = 0
+        while start < len(rows):
+            low = offsets[rows[start]]
+            stop = max(start + 1, int(np.searchsorted(ends, low + budget, side="right")))
+            high = ends[stop - 1]
+            # Each row's shingle ids form one contiguous run of `ids`
+            result[rows[start:stop]] = np.minimum.reduceat(
+                table[ids[low:high]], offsets[rows[start:stop]] - low, axis=0
+            )
+            start = stop
+        return result
+
+
+def one_permutation_signatures(hash_arrays, num_perm=DEFAULT_NUM_PERM):
+    """
+    (len(hash_arrays), num_perm) uint32 signatures of 64-bit shingle hashes by
+    one-permutation hashing: each hash selects one of num_perm bins and every bin
+    keeps its minimum, so the cost is linear in the number of shingles instead of
+    shingles x num_perm. Bins left empty borrow the next non-empty bin (rotation
+    densification); texts without shingles get MAX_HASH throughout.
+    """
+    count = len(hash_arrays)
+    result = np.full((count, num_perm), MAX_HASH, dtype=np.uint32)
+    lengths = np.fromiter((len(hashes) for hashes in hash_arrays), dtype=np.int64, count=count)
+    if not lengths.any():
+        return result
+    mixed = _mix64(np.concatenate(hash_arrays).astype(np.uint64))
+    bins = ((mixed >> np.uint64(32)) * np.uint64(num_perm)) >> np.uint64(32)
+    cells = np.repeat(np.arange(count), lengths) * num_perm + bins.astype(np.int64)
+    np.minimum.at(result.reshape(-1), cells, (mixed & np.uint64(0xFFFFFFFF)).astype(np.uint32))
+
+    filled = result != MAX_HASH
+    rows = np.flatnonzero(filled.any(axis=1) & ~filled.all(axis=1))
+    if len(rows):
+        doubled = np.tile(result[rows], 2)
+        positions = np.where(np.tile(filled[rows], 2), np.arange(2 * num_perm), 2 * num_perm)
+        following = np.minimum.accumulate(positions[:, ::-1], axis=1)[:, ::-1][:, :num_perm]
+        result[rows] = np.take_along_axis(doubled, following, axis=1)
+    return result
+
+
+def bands_for_threshold(threshold, num_perm=DEFAULT_NUM_PERM):
+    """
+    Pick (bands, rows) with bands * rows == num_perm whose LSH threshold
+    (1/bands) ** (1/rows) is closest to, but not above, `threshold`, favouring recall.
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    pool = below or options
+    return min(pool, key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold))
+
+
+def candidate_pairs(signatures, bands):
+    """
+    Index pairs whose signatures agree on every row of at least one band, as an
+    (n, 2) int64 array with i < j in each row and no duplicate rows.
+    """
+    count, num_perm = signatures.shape
+    rows = num_perm // bands
+    codes = np.empty(0, dtype=np.int64)
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        _, inverse, sizes = np.unique(keys, return_inverse=True, return_counts=True)
+        largest = min(int(sizes.max(initial=0)), MAX_BUCKET_SIZE)
+        if largest < 2:
+            continue
+        inverse = inverse.ravel()
+        order = np.argsort(inverse, kind="stable")
+        buckets = inverse[order]
+        # Items of one bucket are adjacent in `order`: pair each with the ones
+        # `offset` places later, for every offset up to the largest bucket
+        band_codes = []
+        for offset in range(1, largest):
+            same = buckets[:-offset] == buckets[offset:]
+            first, second = order[:-offset][same], order[offset:][same]
+            low, high = np.minimum(first, second), np.maximum(first, second)
+            band_codes.append(low.astype(np.int64) * count + high)
+        # Deduplicate band by band so memory follows the number of distinct pairs
+        codes = np.union1d(codes, np.concatenate(band_codes))
+    return np.column_stack((codes // count, codes % count))
+
+
+def estimated_similarity(signatures, pairs, batch=100_000):
+    """MinHash estimate of the Jaccard similarity for each row of `pairs`."""
+    estimates = np.empty(len(pairs))
+    for start in range(0, len(pairs), batch):
+        chunk = pairs[start:start + batch]
+        estimates[start:start + batch] = (
+            signatures[chunk[:, 0]] == signatures[chunk[:, 1]]
+        ).mean(axis=1)
+    return estimates
+
+
+def near_duplicate_pairs(shingle_sets, threshold, num_perm=DEFAULT_NUM_PERM, signatures=None):
+    """
+    Return [(i, j, jaccard)] for pairs whose exact shingle Jaccard is >= threshold,
+    using LSH to choose which pairs to compare. Empty sets are never matched.
+    """
+    # Empty sets would all share one bucket; leave them out of the index
+    present = np.flatnonzero([len(shingles) > 0 for shingles in shingle_sets])
+    if len(present) < 2:
+        return []
+    if signatures is None:
+        signatures = MinHasher(num_perm).signatures([shingle_sets[i] for i in present])
+    else:
+        signatures = signatures[present]
+    bands, _ = bands_for_threshold(threshold, signatures.shape[1])
+    pairs = candidate_pairs(signatures, bands)
+    pairs = pairs[estimated_similarity(signatures, pairs) >= threshold - ESTIMATE_SLACK]
+    found = []
+    for i, j in present[pairs].tolist():
+        similarity = jaccard(shingle_sets[i], shingle_sets[j])
+        if similarity >= threshold:
+            found.append((i, j, similarity))
+    return found
+
+
+def cluster_labels(count, pairs):
+    """Union-find over `pairs`; returns a label (the root index) for every item."""
+    parent = list(range(count))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, *_ in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+    return [find(x) for x in range(count)]
+
+
+def duplicate_groups(items, threshold, num_perm=DEFAULT_NUM_PERM):
+    """
+    Group near-duplicate items (shingle sets or hash arrays) transitively. Returns
+    one list of indices per group in order of first appearance, each list starting
+    with its lowest index; items without duplicates form groups of one.
+    """
+    signatures = None
+    if any(isinstance(item, np.ndarray) for item in items):
+        signatures = one_permutation_signatures(items, num_perm)
+    labels = cluster_labels(len(items), near_duplicate_pairs(items, threshold, num_perm, signatures))
+    groups = {}
+    for index, label in enumerate(labels):
+        groups.setdefault(label, []).append(index)
+    return list(groups.values())
+
+
+def _synthetic_names(count, seed=3):
+    rng = np.random.default_rng(seed)
+    stems = ["Data", "Lake", "Migration", "Cloud", "Platform", "Payments", "Portal", "Claims",
+             "Analytics", "Modernization", "CRM", "Mobile", "Upgrade", "Integration", "Billing"]
+    # Suffixed stems give a realistic vocabulary of a few thousand distinct words
+    words = [f"{stem}{suffix}" for stem in stems for suffix in ("", "ix", "ora", "um", "ex", "ant")]
+    words += ["".join(rng.choice(list("abcdefghijklmnopqrstuvwxyz"), 7)) for _ in range(3_000)]
+    # Four spellings of every project: original, lower-cased, joined words + phase, tagged
+    bases = [" ".join(rng.choice(words, 3)).title() for _ in range(count // 4 + 1)]
+    names = []
+    for i in range(count):
+        base = bases[i // 4]
+        variant = i % 4
+        if variant == 1:
+            base = base.lower()
+        elif variant == 2:
+            base = base.replace(" ", "", 1) + " - Phase 2"
+        elif variant == 3:
+            base = base + " (QBR)"
+        names.append(base)
+    return names
+
+
+def _synthetic_resumes(count, words_per_resume=600, copies=3, seed=5):
+    """Resumes where every `copies` consecutive ones are lightly edited versions of one."""
+    rng = np.random.default_rng(seed)
+    vocabulary = ["".join(rng.choice(list("abcdefghijklmnopqrstuvwxyz"), 6)) for _ in range(20_000)]
+    resumes = []
+    for i in range(count):
+        if i % copies == 0:
+            words = list(rng.choice(vocabulary, words_per_resume))
+            base = words
+        else:
+            # A few replaced words and a changed phone number line
+            words = list(base)
+            for position in rng.integers(0, len(words), 4):
+                words[position] = rng.choice(vocabulary)
+            words.append(f"phone {rng.integers(10**9, 10**10)}")
+        resumes.append(" ".join(words))
+    return resumes
+
+
+def benchmark_resumes(sizes=(1_000, 5_000), threshold=0.8, copies=3):
+    print(f"{'resumes':>8}{'shingle s':>11}{'group s':>9}{'groups':>8}{'expected':>10}")
+    for size in sizes:
+        resumes = _synthetic_resumes(size, copies=copies)
+        started = time.perf_counter()
+        items = word_shingle_hashes(resumes)
+        shingle_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        groups = duplicate_groups(items, threshold)
+        group_seconds = time.perf_counter() - started
+        print(f"{size:>8}{shingle_seconds:>11.2f}{group_seconds:>9.2f}{len(groups):>8}"
+              f"{-(-size // copies):>10}")
+
+
+def benchmark(sizes=(1_000, 10_000, 50_000), threshold=0.6, brute_force_limit=5_000):
+    print(f"{'names':>8}{'minhash+lsh s':>15}{'pairs':>8}{'brute force s':>15}{'recall':>8}")
+    for size in sizes:
+        names = _synthetic_names(size)
+        started = time.perf_counter()
+        sets = [char_shingles(name) for name in names]
+        pairs = near_duplicate_pairs(sets, threshold)
+        lsh_seconds = time.perf_counter() - started
+
+        brute_seconds, recall = "skipped", "-"
+        if size <= brute_force_limit:
+            started = time.perf_counter()
+            exact = {
+                (i, j) for i in range(size) for j in range(i + 1, size)
+                if jaccard(sets[i], sets[j]) >= threshold
+            }
+            brute_seconds = f"{time.perf_counter() - started:.2f}"
+            recall = f"{len({(i, j) for i, j, _ in pairs} & exact) / max(1, len(exact)):.3f}"
+        print(f"{size:>8}{lsh_seconds:>15.2f}{len(pairs):>8}{brute_seconds:>15}{recall:>8}")
+
+
+if __name__ == "__main__":
+    benchmark()
+    print()
+    benchmark_resumes()
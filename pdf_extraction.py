@@ -0,0 +1,200 @@
+"""
+Page-parallel PDF text extraction with an early-stop budget.
+
+PyMuPDF documents cannot be shared across threads, so large PDFs are split into
+page batches that are extracted in a process pool. The pool is started once per
+process with the "spawn" method (forking the multithreaded Streamlit server could
+copy locks held by other threads) and reused by every upload. Workers receive a
+file path and keep the document open between batches; PDFs given as bytes are
+written to a temporary file once instead of being shipped with every task. Pages
+are streamed back in order and extraction stops as soon as the page or character
+budget is reached, so appended boilerplate in 80-page documents is never parsed.
+
+Every function accepts the PDF as bytes or as a file path; paths let large uploads
+be read from disk without another copy.
+"""
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+
+# Below this many pages the hand-off to the pool costs more than it saves
+PARALLEL_PAGE_THRESHOLD = 16
+PAGES_PER_TASK = 4
+# Documents a worker keeps open, for batches of concurrent uploads
+WORKER_OPEN_DOCUMENTS = 4
+
+_pools = {}  # workers -> ProcessPoolExecutor, shared by all sessions
+_pools_lock = threading.Lock()
+_worker_documents = OrderedDict()
+
+
+def _open(source):
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+
+def _text_flags():
+    # Plain text only: skip image decoding entirely
+    return fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+def _get_pool(workers):
+    with _pools_lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pools[workers]
+
+
+def _discard_pool(workers, pool):
+    with _pools_lock:
+        if _pools.get(workers) is pool:
+            del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _worker_document(key):
+    # key: (path, mtime_ns, size), so a rewritten file is opened again
+    document = _worker_documents.pop(key, None)
+    if document is None:
+        document = fitz.open(key[0])
+        while len(_worker_documents) >= WORKER_OPEN_DOCUMENTS:
+            _worker_documents.popitem(last=False)[1].close()
+    _worker_documents[key] = document
+    return document
+
+
+def _extract_page_range(key, start, stop):
+    document = _worker_document(key)
+    flags = _text_flags()
+    results = []
+    for page_number in range(start, stop):
+        started = time.perf_counter()
+        text = document[page_number].get_text(flags=flags)
+        results.append((page_number, text, time.perf_counter() - started))
+    return results
+
+
+def _iter_serial(document, page_limit):
+    flags = _text_flags()
+    for page_number in range(page_limit):
+        started = time.perf_counter()
+        text = document[page_number].get_text(flags=flags)
+        yield page_number, text, time.perf_counter() - started
+
+
+def _iter_parallel(source, page_limit, workers):
+    temp_path = None
+    if not isinstance(source, (str, os.PathLike)):
+        handle, temp_path = tempfile.mkstemp(prefix="pdf_", suffix=".pdf")
+        with os.fdopen(handle, "wb") as file:
+            file.write(source)
+        source = temp_path
+    path = os.path.abspath(source)
+    info = os.stat(path)
+    key = (path, info.st_mtime_ns, info.st_size)
+    ranges = [
+        (start, min(start + PAGES_PER_TASK, page_limit))
+        for start in range(0, page_limit, PAGES_PER_TASK)
+    ]
+    pool = _get_pool(workers)
+    pending = []
+    try:
+        # Keep a bounded window of batches in flight so an early stop wastes little work
+        window = workers * 2
+        pending = [pool.submit(_extract_page_range, key, *r) for r in ranges[:window]]
+        next_range = len(pending)
+        while pending:
+            batch = pending.pop(0).result()
+            if next_range < len(ranges):
+                pending.append(pool.submit(_extract_page_range, key, *ranges[next_range]))
+                next_range += 1
+            yield from batch
+    except BrokenProcessPool:
+        # A crashed worker breaks the pool; the next document gets a new one
+        _discard_pool(workers, pool)
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
+        if temp_path is not None:
+            # Workers keep an open handle; the file goes once they drop the document
+            os.remove(temp_path)
+
+
+def _iter_pages(document, source, page_limit, max_chars, workers, separator_chars):
+    workers = workers or min(8, os.cpu_count() or 1)
+    if workers > 1 and page_limit >= PARALLEL_PAGE_THRESHOLD:
+        pages = _iter_parallel(source, page_limit, workers)
+    else:
+        pages = _iter_serial(document, page_limit)
+
+    chars = 0
+    try:
+        for page_number, text, seconds in pages:
+            if chars and separator_chars:
+                # The separator before this page is part of the output too
+                chars += separator_chars
+            if max_chars is not None and chars + len(text) >= max_chars:
+                if max_chars > chars:
+                    yield page_number, text[:max_chars - chars], seconds
+                return
+            chars += len(text)
+            yield page_number, text, seconds
+    finally:
+        pages.close()
+
+
+def iter_pdf_pages(source, max_pages=None, max_chars=None, workers=None):
+    """
+    Yield (page_number, text, seconds) for each page in order.
+
+    max_pages / max_chars: optional budget; iteration stops once either is reached
+    and the last page's text is cut to fit max_chars.
+    workers: process count for large documents (default: CPU count, capped at 8).
+    """
+    with _open(source) as document:
+        page_limit = document.page_count
+        if max_pages is not None:
+            page_limit = min(page_limit, max_pages)
+        yield from _iter_pages(document, source, page_limit, max_chars, workers, 0)
+
+
+def extract_pdf_text(source, max_pages=None, max_chars=None, workers=None, page_separator=" "):
+    """
+    Extract PDF text within a page/character budget, pages joined with
+    `page_separator` (line breaks within a page are kept). The separators count
+    towards max_chars, so the text is never longer than max_chars.
+
+    Returns (text, stats) where stats holds total/extracted page counts, whether
+    the budget stopped extraction early, and per-page timings as
+    [{"page": n, "seconds": s, "chars": c}, ...].
+    """
+    started = time.perf_counter()
+    text_parts = []
+    page_timings = []
+    with _open(source) as document:
+        total_pages = document.page_count
+        page_limit = total_pages if max_pages is None else min(total_pages, max_pages)
+        pages = _iter_pages(document, source, page_limit, max_chars, workers, len(page_separator))
+        for page_number, text, seconds in pages:
+            text_parts.append(text)
+            page_timings.append({"page": page_number + 1, "seconds": seconds, "chars": len(text)})
+
+    stats = {
+        "total_pages": total_pages,
+        "extracted_pages": len(page_timings),
+        "stopped_early": len(page_timings) < total_pages,
+        "seconds": time.perf_counter() - started,
+        "page_timings": page_timings,
+    }
+    return page_separator.join(text_parts).strip(), stats
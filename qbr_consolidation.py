@@ -0,0 +1,374 @@
+"""
+Vectorized consolidation of QBR project entries.
+
+Every column is normalized once for the whole frame, rows are grouped by a
+normalized project key (lower-cased, trimmed name) and the unique non-empty values
+of each column are aggregated with groupby. Only the final text formatting loops in
+Python, once per project instead of once per row and column.
+
+suggest_project_merges() proposes merging projects whose names (or descriptions)
+are near-duplicates beyond case and whitespace, e.g. "Data Lake Migration" and
+"Datalake migration - Phase 2", using MinHash/LSH so it stays fast on tens of
+thousands of names; apply_project_merges() applies the merges the user accepted.
+
+split_project_text() cuts a project whose consolidated text is too long for one
+prompt into parts of bounded size, for hierarchical (map-reduce) summarization.
+
+Run this module directly for a benchmark at 10k/100k/1M rows:
+    python qbr_consolidation.py
+"""
+import time
+
+import pandas as pd
+
+from minhash_dedup import char_shingles, cluster_labels, jaccard, near_duplicate_pairs, word_shingles
+
+MISSING_VALUES = ["nan", "none", ""]
+
+NAME_SIMILARITY = 0.6
+DESCRIPTION_SIMILARITY = 0.8
+# Descriptions shorter than this many words are too generic to merge projects on
+MIN_DESCRIPTION_WORDS = 8
+# Identical descriptions shared by more projects than this are treated as boilerplate
+MAX_SHARED_DESCRIPTIONS = 3
+# Description matches also need this much name similarity, so a shared template
+# never merges unrelated projects
+DESCRIPTION_NAME_FLOOR = 0.3
+MERGE_COLUMNS = ["Merge", "Project_Name", "Merge_Into", "Similarity", "Matched_On", "Entries"]
+
+# Columns joined with " | " in first-seen order
+TEXT_FIELDS = {
+    "problem_statements": "Project_Problem_Statement",
+    "descriptions": "Project_Description",
+    "skills": "Project_Brief_Skill",
+    "achievements": "Acheivements_ValueAdds",
+    "value_adds": "Value_Add",
+}
+# Columns listed as sorted, comma-separated names
+NAME_FIELDS = {
+    "business_units": "Business_Unit_Name",
+    "team_leads": "Team_Lead",
+    "employees": "Created By",
+}
+
+
+def _normalized(df, column):
+    """Stripped string values of `column`, with missing/placeholder values as ""."""
+    if column not in df.columns:
+        return pd.Series("", index=df.index)
+    # Missing values become "" first: str(NaN) differs across pandas versions, and the
+    # string dtype also accepts "" for categorical columns from qbr_ingestion
+    values = df[column].astype("string").fillna("").str.strip()
+    return values.where(~values.str.lower().isin(MISSING_VALUES), "")
+
+
+def project_keys(df):
+    """
+    (valid, names, keys): the boolean mask of rows that have a project name, and
+    for those rows the stripped display spelling and the lower-cased grouping key.
+    """
+    names = df["Project_Name"].astype("string").fillna("").str.strip()
+    valid = (names != "") & (names.str.lower() != "nan")
+    names = names[valid]
+    return valid, names, names.str.lower()
+
+
+def normalized_fields(df):
+    """All consolidated columns, normalized as in the summaries, keyed by field name."""
+    return pd.DataFrame(
+        {field: _normalized(df, column) for field, column in {**TEXT_FIELDS, **NAME_FIELDS}.items()},
+        index=df.index,
+    )
+
+
+def _unique_values(keys, values):
+    """Map project key -> unique non-empty values, in first-seen order."""
+    frame = pd.DataFrame({"key": keys, "value": values})
+    frame = frame[frame["value"] != ""].drop_duplicates()
+    # groupby().indices is computed in C; agg(list) would call back into Python per group
+    values = frame["value"].to_numpy()
+    return {
+        key: values[positions].tolist()
+        for key, positions in frame.groupby("key", sort=False).indices.items()
+    }
+
+
+def format_consolidated_text(display_name, entry_count, values):
+    """Render one project's aggregated values as the text sent to the LLM."""
+    def entries(field):
+        items = values.get(field) or []
+        return " | ".join(items) if items else "Not specified"
+
+    def names(field):
+        items = sorted(values.get(field) or [])
+        return ", ".join(items) if items else "Not specified"
+
+    lines = [
+        f"Project Name: {display_name}",
+        f"Number of Entries Consolidated: {entry_count}",
+        f"Business Units: {names('business_units')}",
+        f"Team Leads: {names('team_leads')}",
+        f"Employees: {names('employees')}",
+        "",
+        "Project Problem Statements:",
+        entries("problem_statements"),
+        "",
+        "Project Descriptions:",
+        entries("descriptions"),
+        "",
+        "Technical Skills Used:",
+        entries("skills"),
+        "",
+        "Key Achievements:",
+        entries("achievements"),
+        "",
+        "Value Delivered:",
+        entries("value_adds"),
+    ]
+    # Same layout (8-space indent, leading/trailing newline) as the original f-string
+    indent = " " * 8
+    return "\n" + "\n".join(indent + line for line in lines) + "\n" + indent
+
+
+def aggregate_projects(filtered_df):
+    """
+    Group entries by normalized project name.
+
+    Returns {display_name: {"entry_count": n, <field>: [unique values], ...}} in
+    first-appearance order; the display name is the first occurrence's spelling.
+    """
+    if "Project_Name" not in filtered_df.columns:
+        return {}
+    valid, names, keys = project_keys(filtered_df)
+    df = filtered_df[valid]
+
+    grouped_names = names.groupby(keys, sort=False)
+    display_names = grouped_names.first()
+    entry_counts = grouped_names.size()
+
+    field_values = {
+        field: _unique_values(keys, _normalized(df, column))
+        for field, column in {**TEXT_FIELDS, **NAME_FIELDS}.items()
+    }
+
+    projects = {}
+    for key, display_name in display_names.items():
+        values = {field: by_key.get(key, []) for field, by_key in field_values.items()}
+        values["entry_count"] = int(entry_counts[key])
+        projects[display_name] = values
+    return projects
+
+
+def format_projects(aggregated):
+    """Render the output of aggregate_projects() as {display_name: consolidated_text}."""
+    return {
+        display_name: format_consolidated_text(display_name, values["entry_count"], values)
+        for display_name, values in aggregated.items()
+    }
+
+
+def consolidate_projects(filtered_df):
+    """Return {display_name: consolidated_text} for every project in the frame."""
+    return format_projects(aggregate_projects(filtered_df))
+
+
+def suggest_project_merges(df, name_similarity=NAME_SIMILARITY,
+                           description_similarity=DESCRIPTION_SIMILARITY):
+    """
+    Propose merges between near-duplicate project names.
+
+    Names are compared on character 3-gram Jaccard (spaces and punctuation ignored),
+    and descriptions, when long enough and not boilerplate, on word 3-gram Jaccard
+    (with a lower bar on name similarity still required). Matching projects are
+    clustered and each is proposed for merging into the cluster's project with the
+    most entries. Returns a DataFrame with MERGE_COLUMNS, one row per project to
+    merge, for review (e.g. in st.data_editor) before apply_project_merges().
+    """
+    if "Project_Name" not in df.columns:
+        return pd.DataFrame(columns=MERGE_COLUMNS)
+    valid, names, keys = project_keys(df)
+
+    # Display each project under its most frequent spelling
+    spellings = pd.DataFrame({"key": keys, "display": names}).value_counts().reset_index()
+    projects = (
+        spellings.drop_duplicates("key")
+        .set_index("key")
+        .assign(entries=keys.value_counts())
+        .loc[keys.unique()]
+    )
+    if len(projects) < 2:
+        return pd.DataFrame(columns=MERGE_COLUMNS)
+
+    descriptions = _unique_values(keys, _normalized(df[valid], "Project_Description"))
+    name_sets = [char_shingles(name) for name in projects["display"]]
+    description_texts = [" ".join(descriptions.get(key, [])) for key in projects.index]
+    shared = pd.Series(description_texts).value_counts()
+    description_sets = [
+        word_shingles(text)
+        if len(text.split()) >= MIN_DESCRIPTION_WORDS and shared[text] <= MAX_SHARED_DESCRIPTIONS
+        else set()
+        for text in description_texts
+    ]
+
+    matches = {}
+    for i, j, similarity in near_duplicate_pairs(name_sets, name_similarity):
+        matches[(i, j)] = (similarity, "name")
+    for i, j, similarity in near_duplicate_pairs(description_sets, description_similarity):
+        if (i, j) not in matches and jaccard(name_sets[i], name_sets[j]) >= DESCRIPTION_NAME_FLOOR:
+            matches[(i, j)] = (similarity, "description")
+    if not matches:
+        return pd.DataFrame(columns=MERGE_COLUMNS)
+
+    labels = cluster_labels(len(projects), list(matches))
+    entries = projects["entries"].to_numpy()
+    displays = projects["display"].tolist()
+    clusters = {}
+    for index, label in enumerate(labels):
+        clusters.setdefault(label, []).append(index)
+
+    rows = []
+    for members in clusters.values():
+        if len(members) < 2:
+            continue
+        target = max(members, key=lambda index: (entries[index], -index))
+        for index in members:
+            if index == target:
+                continue
+            pair = (min(index, target), max(index, target))
+            similarity, matched_on = matches.get(pair, (None, "cluster"))
+            if similarity is None:
+                # Linked through another project: report the direct name similarity
+                similarity = jaccard(name_sets[index], name_sets[target])
+            rows.append({
+                "Merge": True,
+                "Project_Name": displays[index],
+                "Merge_Into": displays[target],
+                "Similarity": round(similarity, 2),
+                "Matched_On": matched_on,
+                "Entries": int(entries[index]),
+            })
+    merges = pd.DataFrame(rows, columns=MERGE_COLUMNS)
+    return merges.sort_values(["Merge_Into", "Similarity"], ascending=[True, False], ignore_index=True)
+
+
+def apply_project_merges(df, merges):
+    """
+    Rename Project_Name for the rows of `merges` with Merge checked. Matching is on
+    the normalized (lower-cased, trimmed) name, so every spelling of a merged project
+    follows it. Returns a new frame; `df` is not modified.
+    """
+    if merges is None or merges.empty or "Project_Name" not in df.columns:
+        return df
+    accepted = merges[merges["Merge"].astype(bool)]
+    targets = {
+        str(name).strip().lower(): str(target).strip()
+        for name, target in zip(accepted["Project_Name"], accepted["Merge_Into"])
+        if str(target).strip()
+    }
+    if not targets:
+        return df
+
+    def rename(name):
+        if not isinstance(name, str):
+            return name
+        return targets.get(name.strip().lower(), name)
+
+    # On a categorical column map() only visits the categories, not every row
+    renamed = df["Project_Name"].map(rename)
+    if isinstance(df["Project_Name"].dtype, pd.CategoricalDtype):
+        renamed = renamed.astype("category")
+    return df.assign(Project_Name=renamed)
+
+
+def split_project_text(display_name, values, max_chars):
+    """
+    Split one aggregated project into consolidated texts of about `max_chars` each.
+
+    Every part repeats the project name and entry count and carries a contiguous run
+    of the field values (business units, leads and employees first, then the text
+    entries); fields a part does not reach read "Not specified". A value longer than
+    a whole part is truncated. Returns a one-element list when the project fits.
+    """
+    entry_count = values["entry_count"]
+    full_text = format_consolidated_text(display_name, entry_count, values)
+    if len(full_text) <= max_chars:
+        return [full_text]
+
+    header_chars = len(format_consolidated_text(display_name, entry_count, {}))
+    budget = max(200, max_chars - header_chars)
+
+    parts, current, used = [], {}, 0
+    for field in (*NAME_FIELDS, *TEXT_FIELDS):
+        for entry in values.get(field) or []:
+            entry = entry[:budget]
+            if used and used + len(entry) + 3 > budget:
+                parts.append(current)
+                current, used = {}, 0
+            current.setdefault(field, []).append(entry)
+            used += len(entry) + 3  # " | " or ", " separator
+    if current:
+        parts.append(current)
+    return [format_consolidated_text(display_name, entry_count, part) for part in parts]
+
+
+def _consolidate_projects_iterrows(filtered_df):
+    """Row-by-row reference implementation, kept for the benchmark's baseline."""
+    groups = {}
+    for _, row in filtered_df.iterrows():
+        project_name = str(row.get("Project_Name", "")).strip()
+        if not project_name or project_name.lower() == "nan":
+            continue
+        entry = groups.setdefault(project_name.lower(), {"name": project_name, "rows": []})
+        entry["rows"].append(row)
+
+    projects = {}
+    for entry in groups.values():
+        values = {}
+        for field, column in {**TEXT_FIELDS, **NAME_FIELDS}.items():
+            seen = []
+            for row in entry["rows"]:
+                value = str(row.get(column, "")).strip()
+                if value.lower() not in MISSING_VALUES and value not in seen:
+                    seen.append(value)
+            values[field] = seen
+        projects[entry["name"]] = format_consolidated_text(entry["name"], len(entry["rows"]), values)
+    return projects
+
+
+def _synthetic_qbr(rows, projects=2_000, seed=7):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    project_ids = rng.integers(0, projects, rows)
+    return pd.DataFrame({
+        "Project_Name": [f"Project {i}" if i % 3 else f"project {i} " for i in project_ids],
+        "Business_Unit_Name": rng.choice(["BU-East", "BU-West", "BU-Central", None], rows),
+        "Team_Lead": [f"Lead {i % 50}" for i in project_ids],
+        "Created By": [f"Employee {i}" for i in rng.integers(0, 5_000, rows)],
+        "Project_Description": [f"Migrate workload {i} to the cloud" for i in project_ids],
+        "Acheivements_ValueAdds": [f"Cut runtime by {i % 60}%" for i in rng.integers(0, 600, rows)],
+        "Value_Add": rng.choice(["Lower cost", "Faster delivery", "", None], rows),
+        "Project_Brief_Skill": rng.choice(["Python", "Spark", "Azure", "nan"], rows),
+        "Project_Problem_Statement": [f"Legacy system {i % 40} is slow" for i in project_ids],
+    })
+
+
+def benchmark(sizes=(10_000, 100_000, 1_000_000), baseline_limit=100_000):
+    print(f"{'rows':>10}{'projects':>10}{'vectorized s':>14}{'iterrows s':>12}{'same output':>13}")
+    for rows in sizes:
+        df = _synthetic_qbr(rows)
+        started = time.perf_counter()
+        fast = consolidate_projects(df)
+        fast_seconds = time.perf_counter() - started
+
+        slow_seconds, same = "skipped", "-"
+        if rows <= baseline_limit:
+            started = time.perf_counter()
+            slow = _consolidate_projects_iterrows(df)
+            slow_seconds = f"{time.perf_counter() - started:.2f}"
+            same = str(fast == slow)
+        print(f"{rows:>10}{len(fast):>10}{fast_seconds:>14.2f}{slow_seconds:>12}{same:>13}")
+
+
+if __name__ == "__main__":
+    benchmark()
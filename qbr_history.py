@@ -0,0 +1,166 @@
+"""
+Quarter-over-quarter history for QBR uploads.
+
+Every export is cumulative, so most of it was already summarized last quarter.
+Each row is fingerprinted (a 64-bit hash of its normalized fields) and each project
+by the multiset of its rows' fingerprints. QBRHistory keeps both in SQLite together
+with the digest of the summary generated for each project, so a new upload can be
+diffed against the last run: only new and changed projects need to be consolidated
+and summarized, and unchanged ones are served from the stored summaries.
+
+    fingerprints = project_fingerprints(df)
+    status = history.project_status(fingerprints, prompt_version)
+    ...summarize the projects whose status is "new" or "changed"...
+    history.record_projects(...)
+"""
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from qbr_consolidation import normalized_fields, project_keys
+
+DEFAULT_HISTORY_PATH = os.getenv("QBR_HISTORY", "qbr_history.sqlite3")
+# Statuses returned by project_status()
+NEW, CHANGED, UNCHANGED = "new", "changed", "unchanged"
+
+
+def row_fingerprints(df):
+    """
+    64-bit fingerprint of every row with a project name, as a uint64 Series indexed
+    like `df`. Only the fields used in summaries count, after normalization, so
+    reordered columns or extra whitespace do not register as changes.
+    """
+    valid, names, _ = project_keys(df)
+    fields = normalized_fields(df[valid])
+    fields.insert(0, "project_name", names)
+    return pd.util.hash_pandas_object(fields, index=False)
+
+
+def project_fingerprints(df):
+    """
+    DataFrame indexed by project key with display_name, fingerprint (int64) and
+    rows, in first-appearance order. The fingerprint is the wrapping sum of the
+    project's row fingerprints, so it ignores row order but not added, removed
+    or edited rows.
+    """
+    _, names, keys = project_keys(df)
+    hashes = row_fingerprints(df).to_numpy(dtype=np.uint64)
+    codes, uniques = pd.factorize(keys)
+    totals = np.zeros(len(uniques), dtype=np.uint64)
+    np.add.at(totals, codes, hashes)  # uint64 addition wraps, as intended
+    grouped = names.groupby(keys, sort=False)
+    return pd.DataFrame(
+        {
+            "display_name": grouped.first().reindex(uniques).to_numpy(),
+            # SQLite integers are signed 64-bit
+            "fingerprint": totals.view(np.int64),
+            "rows": np.bincount(codes, minlength=len(uniques)),
+        },
+        index=pd.Index(uniques, name="project_key"),
+    )
+
+
+class QBRHistory:
+    """Row and project fingerprints of previous runs, stored in a SQLite file."""
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS row_fingerprints (fingerprint INTEGER PRIMARY KEY)")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS projects (
+                       project_key TEXT PRIMARY KEY,
+                       display_name TEXT NOT NULL,
+                       fingerprint INTEGER NOT NULL,
+                       summary_digest TEXT NOT NULL,
+                       prompt_version TEXT NOT NULL,
+                       updated_at REAL NOT NULL
+                   )"""
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commits on success
+                yield conn
+        finally:
+            conn.close()
+
+    def diff_rows(self, fingerprints):
+        """Counts of new, unchanged and no longer present rows against the last run."""
+        current = np.unique(fingerprints.to_numpy(dtype=np.uint64).view(np.int64))
+        with self._connect() as conn:
+            previous = np.fromiter(
+                (row[0] for row in conn.execute("SELECT fingerprint FROM row_fingerprints")),
+                dtype=np.int64,
+            )
+        seen = np.isin(current, previous, assume_unique=True)
+        return {
+            "new": int((~seen).sum()),
+            "unchanged": int(seen.sum()),
+            "removed": int(len(previous) - seen.sum()),
+            "first_run": len(previous) == 0,
+        }
+
+    def record_rows(self, fingerprints):
+        """Replace the stored row fingerprints with those of the current file."""
+        current = np.unique(fingerprints.to_numpy(dtype=np.uint64).view(np.int64))
+        with self._connect() as conn:
+            conn.execute("DELETE FROM row_fingerprints")
+            conn.executemany(
+                "INSERT INTO row_fingerprints VALUES (?)", ((int(value),) for value in current)
+            )
+
+    def stored_projects(self, project_keys):
+        """{project_key: (fingerprint, summary_digest, prompt_version)} for known projects."""
+        keys = list(project_keys)
+        found = {}
+        with self._connect() as conn:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    "SELECT project_key, fingerprint, summary_digest, prompt_version "
+                    f"FROM projects WHERE project_key IN ({placeholders})",
+                    batch,
+                )
+                found.update((key, (fingerprint, digest, version)) for key, fingerprint, digest, version in rows)
+        return found
+
+    def project_status(self, fingerprints, prompt_version):
+        """
+        Compare project_fingerprints() with the last run. Returns (status, digests):
+        status is a Series of NEW / CHANGED / UNCHANGED by project key, digests maps
+        each unchanged project to the digest of its stored summary. Projects last
+        summarized with another prompt version count as changed.
+        """
+        stored = self.stored_projects(fingerprints.index)
+        status, digests = {}, {}
+        for key, fingerprint in fingerprints["fingerprint"].items():
+            previous = stored.get(key)
+            if previous is None:
+                status[key] = NEW
+            elif previous[0] == fingerprint and previous[2] == prompt_version:
+                status[key] = UNCHANGED
+                digests[key] = previous[1]
+            else:
+                status[key] = CHANGED
+        return pd.Series(status, dtype="string"), digests
+
+    def record_projects(self, records, prompt_version):
+        """Store (project_key, display_name, fingerprint, summary_digest) tuples."""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO projects VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (key, display_name, int(fingerprint), digest, prompt_version, now)
+                    for key, display_name, fingerprint, digest in records
+                ),
+            )
@@ -0,0 +1,145 @@
+"""
+Typed, cached ingestion of QBR CSV exports.
+
+The low-cardinality columns the apps filter on are parsed straight into categorical
+dtypes, so filter options come from the category list instead of a full scan and the
+frame is a fraction of its object-dtype size. Files up to CHUNKED_READ_BYTES are
+parsed by pyarrow's multithreaded CSV reader, which dictionary-encodes those columns
+while parsing; larger ones are read in row chunks so the raw text of the whole file
+is never materialised as Python strings at once.
+
+The parsing is keyed on file_digest(), so a Streamlit app can cache the parsed
+frame per file and reruns triggered by widget changes skip the CSV entirely
+(cache_resource hands back the same frame without a pickle round-trip):
+
+    @st.cache_resource(max_entries=4)
+    def load_qbr_frame(file_hash, _file_bytes):
+        return read_qbr_csv(_file_bytes)
+
+Run this module directly for a benchmark against a default pd.read_csv:
+    python qbr_ingestion.py
+"""
+import hashlib
+import io
+import time
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CATEGORICAL_COLUMNS = ("Business_Unit_Name", "Project_Name", "Team_Lead")
+CHUNKED_READ_BYTES = 256 * 1024 * 1024
+CHUNK_ROWS = 200_000
+
+
+def file_digest(file_bytes):
+    """Content hash used as the cache key for a parsed upload."""
+    return hashlib.sha256(file_bytes).hexdigest()
+
+
+def _read_pyarrow(file_bytes):
+    """Parse with pyarrow.csv; returns None when pyarrow is not installed."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        return None
+    dictionary = pa.dictionary(pa.int32(), pa.string())
+    options = pa_csv.ConvertOptions(
+        column_types={column: dictionary for column in CATEGORICAL_COLUMNS},
+        # Empty fields become NaN, as with pd.read_csv
+        strings_can_be_null=True,
+    )
+    table = pa_csv.read_csv(io.BytesIO(file_bytes), convert_options=options)
+    return table.to_pandas()  # dictionary columns arrive as pandas categoricals
+
+
+def _concat_chunks(chunks):
+    """Concatenate chunk frames, keeping categorical columns categorical."""
+    if len(chunks) == 1:
+        return chunks[0]
+    categorical = [
+        column for column in chunks[0].columns
+        if isinstance(chunks[0][column].dtype, pd.CategoricalDtype)
+    ]
+    # Each chunk has its own category set; plain concat would fall back to object
+    merged = {
+        column: union_categoricals([chunk[column] for chunk in chunks], ignore_order=True)
+        for column in categorical
+    }
+    frame = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for column in categorical:
+        frame[column] = pd.Categorical(merged[column])
+    return frame[chunks[0].columns]
+
+
+def read_qbr_csv(file_bytes, chunked_read_bytes=CHUNKED_READ_BYTES, chunk_rows=CHUNK_ROWS):
+    """
+    Parse a QBR export into a DataFrame with categorical filter columns.
+
+    file_bytes: the raw CSV (e.g. UploadedFile.getvalue()).
+    Columns in CATEGORICAL_COLUMNS that are missing from the file are ignored.
+    """
+    if len(file_bytes) <= chunked_read_bytes:
+        frame = _read_pyarrow(file_bytes)
+        if frame is not None:
+            return frame
+    dtype = {column: "category" for column in CATEGORICAL_COLUMNS}
+    reader = pd.read_csv(io.BytesIO(file_bytes), dtype=dtype, chunksize=chunk_rows)
+    return _concat_chunks(list(reader))
+
+
+def sorted_values(df, column):
+    """Sorted unique non-null values of `column`, read from the categories when possible."""
+    if column not in df.columns:
+        return []
+    series = df[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Categories are already unique; drop ones no longer present after filtering
+        return sorted(series.cat.remove_unused_categories().cat.categories)
+    return sorted(series.dropna().unique())
+
+
+def entry_counts(df, column):
+    """value_counts() of `column` without the zero counts of unused categories."""
+    counts = df[column].value_counts()
+    return counts[counts > 0]
+
+
+def _synthetic_csv(rows, projects=2_000, seed=7):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    project_ids = rng.integers(0, projects, rows)
+    frame = pd.DataFrame({
+        "Business_Unit_Name": rng.choice(["BU-East", "BU-West", "BU-Central"], rows),
+        "Project_Name": [f"Project {i}" for i in project_ids],
+        "Team_Lead": [f"Lead {i % 50}" for i in project_ids],
+        "Created By": [f"Employee {i}" for i in rng.integers(0, 5_000, rows)],
+        "Project_Description": [f"Migrate workload {i} to the cloud" for i in project_ids],
+        "Acheivements_ValueAdds": [f"Cut runtime by {i % 60}%" for i in rng.integers(0, 600, rows)],
+    })
+    return frame.to_csv(index=False).encode("utf-8")
+
+
+def benchmark(sizes=(10_000, 100_000, 1_000_000)):
+    print(f"{'rows':>10}{'MiB':>8}{'default s':>11}{'typed s':>9}{'chunked s':>11}"
+          f"{'default MiB':>13}{'typed MiB':>11}")
+    for rows in sizes:
+        data = _synthetic_csv(rows)
+        timings = {}
+        frames = {}
+        for label, parse in (
+            ("default", lambda: pd.read_csv(io.BytesIO(data))),
+            ("typed", lambda: read_qbr_csv(data)),
+            ("chunked", lambda: read_qbr_csv(data, chunked_read_bytes=0)),
+        ):
+            started = time.perf_counter()
+            frames[label] = parse()
+            timings[label] = time.perf_counter() - started
+        size_mb = {label: frames[label].memory_usage(deep=True).sum() / 2**20 for label in frames}
+        print(f"{rows:>10}{len(data) / 2**20:>8.1f}{timings['default']:>11.2f}{timings['typed']:>9.2f}"
+              f"{timings['chunked']:>11.2f}{size_mb['default']:>13.1f}{size_mb['typed']:>11.1f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,269 @@
+"""
+Bounded-concurrency summary generation for QBR projects.
+
+Gemini calls are network-bound, so a thread pool issues several at once while a
+shared rate limiter keeps request starts under the per-minute quota. Results are
+yielded as they complete (so the UI can update its progress bar) together with the
+project's position, letting the caller render cards in a stable order. A failing
+project is retried with backoff and then reported on its own without stopping the
+rest of the batch.
+
+Many short items (e.g. one QBR row each) can instead be packed several to a request
+with pack_batches(); the model answers with one JSON object keyed by item id, read
+back by parse_batch_response().
+
+Projects too long for one prompt can be passed as a list of text parts and are then
+summarized hierarchically by MapReduce: every part is condensed in parallel, and the
+partial notes are merged `fan_in` at a time until one summary is left. Each prompt
+stays bounded and the number of sequential rounds grows with log(parts), so latency
+on huge projects grows logarithmically rather than with their size.
+
+SummaryCache persists finished summaries in SQLite, keyed on a digest of the
+consolidated text and the prompt version, so re-filtering or re-running an updated
+CSV only sends new or changed projects to Gemini.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_REQUESTS_PER_MINUTE = 60
+# Projects above this many (estimated) tokens are summarized with MapReduce
+DEFAULT_MAP_REDUCE_TOKENS = 8_000
+DEFAULT_CHUNK_TOKENS = 3_000
+CHARS_PER_TOKEN = 4  # rough ratio for English prose
+DEFAULT_ROWS_PER_BATCH = 10
+# Upper bound on the packed text of one batch request
+DEFAULT_BATCH_CHARS = 24_000
+DEFAULT_CACHE_PATH = os.getenv("QBR_SUMMARY_CACHE", "qbr_summary_cache.sqlite3")
+
+
+class RateLimiter:
+    """Spaces request starts evenly so at most `requests_per_minute` begin per minute."""
+
+    def __init__(self, requests_per_minute=None):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def _call_with_retries(fn, limiter, retries, backoff, *args):
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            return fn(*args)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+def estimate_tokens(text):
+    """Rough token count, good enough to decide when to split a project."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class MapReduce:
+    """
+    Hierarchical summarization of one project split into several text parts.
+
+    summarize_part: callable(part_text) -> notes for that part.
+    combine: callable(list_of_notes, final) -> merged notes; with final=True it must
+    return the finished project summary.
+    """
+
+    def __init__(self, summarize_part, combine, fan_in=4, max_workers=4):
+        self.summarize_part = summarize_part
+        self.combine = combine
+        self.fan_in = max(2, fan_in)
+        self.max_workers = max(1, max_workers)
+
+    def run(self, parts, limiter, retries=2, backoff=2.0):
+        def call(fn, *args):
+            return _call_with_retries(fn, limiter, retries, backoff, *args)
+
+        # A pool of its own: waiting on the project-level pool could deadlock it.
+        # The shared limiter still caps the overall request rate.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            level = list(executor.map(lambda part: call(self.summarize_part, part), parts))
+            while True:
+                groups = [level[i:i + self.fan_in] for i in range(0, len(level), self.fan_in)]
+                final = len(groups) == 1
+                level = list(executor.map(lambda group: call(self.combine, group, final), groups))
+                if final:
+                    return level[0]
+
+
+def _summarize_project(work, summarize, map_reduce, limiter, retries, backoff):
+    if not isinstance(work, list):
+        return _call_with_retries(summarize, limiter, retries, backoff, work)
+    if len(work) == 1:
+        return _call_with_retries(summarize, limiter, retries, backoff, work[0])
+    if map_reduce is None:
+        raise ValueError("Project was split into parts but no MapReduce was given")
+    return map_reduce.run(work, limiter, retries, backoff)
+
+
+def generate_summaries(projects, summarize, max_workers=DEFAULT_MAX_WORKERS,
+                       requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, retries=2, backoff=2.0,
+                       map_reduce=None):
+    """
+    Summarize every project concurrently.
+
+    projects: {project_name: consolidated_text or [text parts]}, in display order;
+    projects given as several parts are summarized with `map_reduce` (a MapReduce).
+    Any other value (e.g. a batch from pack_batches) is passed to summarize as is.
+    summarize: callable(text) -> summary; may raise.
+    Yields (index, project_name, summary, error) in completion order, where index is
+    the project's position in `projects` and exactly one of summary/error is None.
+    """
+    limiter = RateLimiter(requests_per_minute)
+    items = list(projects.items())
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(
+                _summarize_project, work, summarize, map_reduce, limiter, retries, backoff
+            ): index
+            for index, (_, work) in enumerate(items)
+        }
+        try:
+            for future in as_completed(futures):
+                index = futures[future]
+                error = future.exception()
+                summary = None if error else future.result()
+                yield index, items[index][0], summary, error
+        finally:
+            # Caller stopped early (e.g. Streamlit rerun): drop queued requests
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def pack_batches(items, rows_per_batch=DEFAULT_ROWS_PER_BATCH, max_chars=DEFAULT_BATCH_CHARS):
+    """
+    Group {item_id: text} into batches of at most `rows_per_batch` items and about
+    `max_chars` characters, in order. Returns a list of {item_id: text} dicts.
+    """
+    batches, current, used = [], {}, 0
+    for item_id, text in items.items():
+        if current and (len(current) >= rows_per_batch or used + len(text) > max_chars):
+            batches.append(current)
+            current, used = {}, 0
+        current[item_id] = text
+        used += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def format_batch(batch):
+    """Render a batch as delimited records for a prompt asking for JSON keyed by id."""
+    return "\n\n".join(f"### Record {item_id}\n{text.strip()}" for item_id, text in batch.items())
+
+
+def parse_batch_response(response_text, item_ids):
+    """
+    Read the model's JSON answer ({"<id>": "<summary>", ...}, optionally inside a
+    ```json fence) and return {item_id: summary} for the ids it covers. Ids are
+    matched as strings; unknown ids are ignored. Raises ValueError if it is not JSON.
+    """
+    text = response_text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1)
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Batch response is not valid JSON: {error}") from error
+    if isinstance(payload, list):
+        # Tolerate [{"id": ..., "summary": ...}] as well
+        payload = {str(entry.get("id")): entry.get("summary") for entry in payload if isinstance(entry, dict)}
+    if not isinstance(payload, dict):
+        raise ValueError("Batch response is not a JSON object")
+    by_key = {str(item_id): item_id for item_id in item_ids}
+    return {
+        by_key[str(key)]: value
+        for key, value in payload.items()
+        if str(key) in by_key and isinstance(value, str) and value.strip()
+    }
+
+
+class SummaryCache:
+    """Persistent {digest: summary} store backed by a local SQLite file."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS summaries (
+                       digest TEXT PRIMARY KEY,
+                       project_name TEXT,
+                       summary TEXT NOT NULL,
+                       created_at REAL NOT NULL
+                   )"""
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commits on success
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def digest(consolidated_text, prompt_version):
+        payload = f"{prompt_version}\0{consolidated_text}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get_many(self, digests):
+        """Return {digest: summary} for the digests already stored."""
+        digests = list(digests)
+        found = {}
+        with self._connect() as conn:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(digests), 500):
+                batch = digests[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT digest, summary FROM summaries WHERE digest IN ({placeholders})", batch
+                )
+                found.update(rows)
+        return found
+
+    def put(self, digest, project_name, summary):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)",
+                (digest, project_name, summary, time.time()),
+            )
+
+
+def split_cached(projects, cache, prompt_version):
+    """
+    Look every project up in the cache.
+
+    Returns (digests, cached, pending): digests maps project name -> cache key,
+    cached holds {name: summary} for hits and pending {name: text} for misses,
+    both in the original order.
+    """
+    digests = {name: cache.digest(text, prompt_version) for name, text in projects.items()}
+    stored = cache.get_many(digests.values())
+    cached = {name: stored[d] for name, d in digests.items() if d in stored}
+    pending = {name: text for name, text in projects.items() if name not in cached}
+    return digests, cached, pending
@@ -0,0 +1,262 @@
+"""
+Library of JD-only artifacts, computed once per requisition.
+
+The JD summary, the hiring-manager clarification questions, the skills found in a
+JD and the embeddings of its chunks depend on the JD alone, yet each app session
+used to recompute them, for every candidate. RequisitionLibrary stores them in
+SQLite under the hash of the JD text, so every session and every candidate
+evaluated against the same requisition reuses them:
+
+    library = RequisitionLibrary()
+    requisition = library.requisition(jd_text)
+    summary = requisition.artifact(SUMMARY, prompt_version(MODEL, PROMPT),
+                                   lambda: generate(jd_text, PROMPT))
+
+Artifacts are keyed by (JD hash, kind, version); the version should identify
+everything besides the JD that shapes the result (model, prompt, parameters), see
+prompt_version(). Values are stored as JSON. Concurrent requests for the same
+missing artifact in one process wait for a single computation, and failures are
+not stored.
+
+Requisitions are open when registered. close(jd_hash) takes a filled or cancelled
+requisition out of iter_requisitions() (and so out of reverse matching) without
+deleting its artifacts; reopen(jd_hash) brings it back.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+DEFAULT_LIBRARY_PATH = os.getenv("REQUISITION_LIBRARY", "requisition_library.sqlite3")
+# Artifact kinds used by the apps
+SUMMARY = "summary"
+CLARIFICATION_QUESTIONS = "clarification_questions"
+SKILLS = "skills"
+# Requisition statuses
+OPEN = "open"
+CLOSED = "closed"
+
+
+def jd_digest(jd_text):
+    """Hash of the JD text with whitespace normalized, the requisition key."""
+    return hashlib.sha256(" ".join(jd_text.split()).encode("utf-8")).hexdigest()
+
+
+def prompt_version(*parts):
+    """Short digest of the model, prompt and settings that produce an artifact."""
+    payload = "\0".join(str(part) for part in parts).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+class CachedChunkEmbeddings:
+    """
+    LangChain-compatible embeddings that serve known texts (e.g. JD chunks from the
+    library) from `vectors` and delegate everything else to `embeddings`.
+    """
+
+    def __init__(self, embeddings, vectors):
+        self.embeddings = embeddings
+        self.vectors = dict(vectors)
+
+    def embed_documents(self, texts):
+        missing = list(dict.fromkeys(text for text in texts if text not in self.vectors))
+        if missing:
+            self.vectors.update(zip(missing, self.embeddings.embed_documents(missing)))
+        return [self.vectors[text] for text in texts]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+
+class Requisition:
+    """Handle on one JD in the library."""
+
+    def __init__(self, library, jd_hash):
+        self.library = library
+        self.jd_hash = jd_hash
+
+    def artifact(self, kind, version, compute):
+        return self.library.artifact(self.jd_hash, kind, version, compute)
+
+    def chunk_embeddings(self, model, chunks, embed_documents):
+        return self.library.chunk_embeddings(self.jd_hash, model, chunks, embed_documents)
+
+
+class RequisitionLibrary:
+    """JD artifacts and chunk embeddings keyed by JD hash, in a SQLite file."""
+
+    def __init__(self, path=DEFAULT_LIBRARY_PATH):
+        self.path = path
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS requisitions (
+                    jd_hash TEXT PRIMARY KEY,
+                    jd_text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used_at REAL NOT NULL,
+                    title TEXT,
+                    status TEXT NOT NULL DEFAULT 'open'
+                );
+                CREATE TABLE IF NOT EXISTS artifacts (
+                    jd_hash TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (jd_hash, kind, version)
+                );
+                CREATE TABLE IF NOT EXISTS chunk_embeddings (
+                    jd_hash TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    chunk_digest TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vector BLOB NOT NULL,
+                    PRIMARY KEY (jd_hash, model, chunk_digest)
+                );
+                """
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(requisitions)")}
+            if "title" not in columns:
+                conn.execute("ALTER TABLE requisitions ADD COLUMN title TEXT")
+            if "status" not in columns:
+                conn.execute("ALTER TABLE requisitions ADD COLUMN status TEXT NOT NULL DEFAULT 'open'")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commits on success
+                yield conn
+        finally:
+            conn.close()
+
+    def _lock(self, key):
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def requisition(self, jd_text, title=None):
+        """
+        Register `jd_text` (or touch it if known) and return its Requisition. `title`
+        (e.g. the JD file name) is kept for display; None keeps the stored one.
+        """
+        jd_hash = jd_digest(jd_text)
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """INSERT INTO requisitions (jd_hash, jd_text, created_at, last_used_at, title)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(jd_hash) DO UPDATE SET
+                       last_used_at = excluded.last_used_at,
+                       title = COALESCE(excluded.title, requisitions.title)""",
+                (jd_hash, jd_text, now, now, title),
+            )
+        return Requisition(self, jd_hash)
+
+    def jd_text(self, jd_hash):
+        """The registered JD text, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT jd_text FROM requisitions WHERE jd_hash = ?", (jd_hash,)).fetchone()
+        return row[0] if row else None
+
+    def status(self, jd_hash):
+        """OPEN or CLOSED, or None for an unknown requisition."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT status FROM requisitions WHERE jd_hash = ?", (jd_hash,)).fetchone()
+        return row[0] if row else None
+
+    def _set_status(self, jd_hash, status):
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE requisitions SET status = ? WHERE jd_hash = ?", (status, jd_hash)
+            ).rowcount
+        if not updated:
+            raise KeyError(jd_hash)
+
+    def close(self, jd_hash):
+        """Mark a requisition filled or cancelled; its artifacts are kept."""
+        self._set_status(jd_hash, CLOSED)
+
+    def reopen(self, jd_hash):
+        self._set_status(jd_hash, OPEN)
+
+    def closed_hashes(self):
+        """Set of the hashes of closed requisitions."""
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT jd_hash FROM requisitions WHERE status = ?", (CLOSED,))}
+
+    def iter_requisitions(self, after=0, include_closed=False):
+        """
+        (rowid, jd_hash, title, jd_text) of the open requisitions (all of them with
+        `include_closed`) registered after rowid `after`, in registration order, so
+        indexes over the library can catch up incrementally.
+        """
+        sql = "SELECT rowid, jd_hash, title, jd_text FROM requisitions WHERE rowid > ?"
+        if not include_closed:
+            sql += f" AND status = '{OPEN}'"
+        with self._connect() as conn:
+            return conn.execute(f"{sql} ORDER BY rowid", (after,)).fetchall()
+
+    def get_artifact(self, jd_hash, kind, version):
+        """The stored artifact value, or None."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value FROM artifacts WHERE jd_hash = ? AND kind = ? AND version = ?",
+                (jd_hash, kind, version),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_artifact(self, jd_hash, kind, version, value):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?)",
+                (jd_hash, kind, version, json.dumps(value), time.time()),
+            )
+
+    def artifact(self, jd_hash, kind, version, compute):
+        """Stored artifact, or compute() it once, store and return it."""
+        value = self.get_artifact(jd_hash, kind, version)
+        if value is not None:
+            return value
+        with self._lock((jd_hash, kind, version)):
+            # Another session may have finished it while this one waited
+            value = self.get_artifact(jd_hash, kind, version)
+            if value is None:
+                value = compute()
+                self.put_artifact(jd_hash, kind, version, value)
+        return value
+
+    def chunk_embeddings(self, jd_hash, model, chunks, embed_documents):
+        """
+        Embedding vectors (lists of floats) for the JD's `chunks`, in order. Chunks
+        not stored for `model` yet are embedded with embed_documents(list_of_texts)
+        in one call and stored.
+        """
+        digests = [hashlib.sha256(chunk.encode("utf-8")).hexdigest() for chunk in chunks]
+        with self._lock((jd_hash, "chunk_embeddings", model)):
+            with self._connect() as conn:
+                stored = {
+                    digest: np.frombuffer(vector, dtype=np.float32, count=dim).tolist()
+                    for digest, dim, vector in conn.execute(
+                        "SELECT chunk_digest, dim, vector FROM chunk_embeddings WHERE jd_hash = ? AND model = ?",
+                        (jd_hash, model),
+                    )
+                }
+            missing = {digest: chunk for digest, chunk in zip(digests, chunks) if digest not in stored}
+            if missing:
+                vectors = embed_documents(list(missing.values()))
+                rows = []
+                for digest, vector in zip(missing, vectors):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    stored[digest] = vector.tolist()
+                    rows.append((jd_hash, model, digest, len(vector), vector.tobytes()))
+                with self._connect() as conn:
+                    conn.executemany("INSERT OR REPLACE INTO chunk_embeddings VALUES (?, ?, ?, ?, ?)", rows)
+        return [stored[digest] for digest in digests]
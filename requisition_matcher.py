@@ -0,0 +1,237 @@
+"""
+Reverse matching: rank every stored requisition for a single resume.
+
+The matchers go from one JD to many resumes. RequisitionMatcher goes the other way
+without calling an LLM: it scores one resume against all the JDs registered in the
+RequisitionLibrary with a matrix-vector product of normalized embeddings plus the
+share of each JD's skills that the resume mentions, and returns the top N. Only
+those few are worth an LLM deep dive:
+
+    matcher = RequisitionMatcher(RequisitionLibrary(), FastEmbedEmbeddings())
+    for match in matcher.top_requisitions(resume_text, n=10):
+        print(match["title"], match["score"], match["missing_skills"])
+
+A JD is represented by the normalized mean of its chunk embeddings. The chunk
+vectors and the JD skills are stored in the library, so a restarted app only
+re-reads them. JDs registered after the matcher was built are picked up on the
+next query (see refresh()), and closed requisitions are left out of the ranking
+from then on.
+
+Run this module directly for a benchmark on a synthetic set of requisitions:
+    python requisition_matcher.py
+"""
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from requisition_library import Requisition, RequisitionLibrary, prompt_version
+from skill_index import DEFAULT_SKILLS, find_skills, normalize_skill
+
+DEFAULT_TOP_N = 10
+# Weight of embedding similarity in the score; skill coverage gets the rest
+SEMANTIC_WEIGHT = 0.6
+# Words per embedded chunk, below the 512-token window of the small embedding models
+CHUNK_WORDS = 200
+# Artifact kind of the JD skills found with skill_index.find_skills
+MATCHED_SKILLS = "matched_skills"
+
+
+def chunk_words(text, size=CHUNK_WORDS):
+    """`text` split into chunks of at most `size` words."""
+    words = text.split()
+    return [" ".join(words[start:start + size]) for start in range(0, len(words), size)]
+
+
+def document_vector(chunk_vectors):
+    """Unit-length mean of a document's chunk embeddings."""
+    vector = np.asarray(chunk_vectors, dtype=np.float32).mean(axis=0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class RequisitionMatcher:
+    """In-memory embedding and skill matrices over the requisitions of a library."""
+
+    def __init__(self, library, embeddings, model=None, skills=DEFAULT_SKILLS,
+                 semantic_weight=SEMANTIC_WEIGHT):
+        self.library = library
+        self.embeddings = embeddings
+        self.model = model or getattr(embeddings, "model_name", None) or type(embeddings).__name__
+        self.skills = tuple(sorted({normalize_skill(skill) for skill in skills if str(skill).strip()}))
+        self.semantic_weight = semantic_weight
+        self._skill_ids = {skill: i for i, skill in enumerate(self.skills)}
+        self._skills_version = prompt_version(*self.skills)
+        self._lock = threading.RLock()
+        self._last_rowid = 0
+        self._hashes = []
+        self._titles = []
+        self._vectors = None                                   # (requisitions, dim) float32
+        self._open = np.zeros(0, dtype=bool)
+        self._skill_matrix = np.zeros((0, len(self.skills)), dtype=np.float32)
+
+    def __len__(self):
+        """Number of open requisitions that rank() scores."""
+        return int(self._open.sum())
+
+    def _skill_vector(self, skills):
+        vector = np.zeros(len(self.skills), dtype=np.float32)
+        vector[[self._skill_ids[skill] for skill in skills if skill in self._skill_ids]] = 1
+        return vector
+
+    def refresh(self):
+        """
+        Index the requisitions registered since the last refresh and pick up closed
+        and reopened ones; returns how many were indexed.
+        """
+        with self._lock:
+            # Closed requisitions are indexed too, so reopening one needs no rebuild
+            rows = self.library.iter_requisitions(after=self._last_rowid, include_closed=True)
+            if rows:
+                self._index(rows)
+            closed = self.library.closed_hashes()
+            self._open = np.array([jd_hash not in closed for jd_hash in self._hashes], dtype=bool)
+            return len(rows)
+
+    def _index(self, rows):
+        vectors, skill_rows = [], []
+        for rowid, jd_hash, title, jd_text in rows:
+            requisition = Requisition(self.library, jd_hash)
+            chunks = chunk_words(jd_text) or [jd_text]
+            vectors.append(document_vector(requisition.chunk_embeddings(
+                self.model, chunks, self.embeddings.embed_documents
+            )))
+            skills = requisition.artifact(
+                MATCHED_SKILLS, self._skills_version, lambda: find_skills(jd_text, self.skills)
+            )
+            skill_rows.append(self._skill_vector(skills))
+            self._hashes.append(jd_hash)
+            self._titles.append(title or " ".join(jd_text.split()[:12]))
+            self._last_rowid = rowid
+        vectors = np.vstack(vectors)
+        self._vectors = vectors if self._vectors is None else np.vstack([self._vectors, vectors])
+        self._skill_matrix = np.vstack([self._skill_matrix, skill_rows])
+
+    def resume_profile(self, resume_text):
+        """(unit embedding, skills) of a resume, the input of rank()."""
+        chunks = chunk_words(resume_text) or [resume_text]
+        vector = document_vector(self.embeddings.embed_documents(chunks))
+        return vector, find_skills(resume_text, self.skills)
+
+    def rank(self, resume_vector, resume_skills, n=DEFAULT_TOP_N):
+        """
+        Top `n` requisitions for a resume profile, best first. Each match has the JD
+        hash and title, the combined score, the embedding similarity, the share of
+        the JD skills the resume covers (None when no known skill is in the JD) and
+        the matched and missing skill names.
+        """
+        with self._lock:
+            if not self._open.any():
+                return []
+            similarity = self._vectors @ np.asarray(resume_vector, dtype=np.float32)
+            required = self._skill_matrix.sum(axis=1)
+            matched = self._skill_matrix @ self._skill_vector(resume_skills)
+            coverage = np.divide(matched, required, out=np.zeros_like(matched), where=required > 0)
+            # JDs without any known skill are ranked on similarity alone
+            weight = np.where(required > 0, self.semantic_weight, 1.0)
+            scores = weight * similarity + (1 - weight) * coverage
+            scores = np.where(self._open, scores, -np.inf)
+
+            n = min(n, len(self))
+            top = np.argpartition(-scores, n - 1)[:n]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            resume_skills = set(resume_skills)
+            matches = []
+            for i in top.tolist():
+                jd_skills = [self.skills[j] for j in np.flatnonzero(self._skill_matrix[i])]
+                matches.append({
+                    "jd_hash": self._hashes[i],
+                    "title": self._titles[i],
+                    "score": float(scores[i]),
+                    "similarity": float(similarity[i]),
+                    "skill_coverage": float(coverage[i]) if required[i] else None,
+                    "matched_skills": [skill for skill in jd_skills if skill in resume_skills],
+                    "missing_skills": [skill for skill in jd_skills if skill not in resume_skills],
+                })
+            return matches
+
+    def top_requisitions(self, resume_text, n=DEFAULT_TOP_N):
+        """Refresh, then rank all requisitions for `resume_text`."""
+        self.refresh()
+        return self.rank(*self.resume_profile(resume_text), n=n)
+
+
+class _HashingEmbeddings:
+    """Deterministic bag-of-words embeddings for the benchmark, no model download."""
+
+    model_name = "benchmark-hashing-384"
+
+    def __init__(self, dim=384):
+        self.dim = dim
+        self._words = {}
+
+    def _word(self, word):
+        if word not in self._words:
+            seed = int.from_bytes(word.encode("utf-8")[:8].ljust(8, b"\0"), "little") ^ len(word)
+            self._words[word] = np.random.default_rng(seed).standard_normal(self.dim, dtype=np.float32)
+        return self._words[word]
+
+    def embed_documents(self, texts):
+        return [np.sum([self._word(word) for word in text.lower().split()], axis=0).tolist()
+                for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def benchmark(requisitions=2_000, repeat=50):
+    rng = np.random.default_rng(7)
+    skills = list(DEFAULT_SKILLS)
+    filler = [f"word{i}" for i in range(2_000)]
+
+    def document(skill_count, words):
+        picked = rng.choice(len(skills), size=skill_count, replace=False)
+        body = rng.choice(filler, size=words).tolist() + [skills[i] for i in picked]
+        rng.shuffle(body)
+        return " ".join(body)
+
+    with tempfile.TemporaryDirectory() as directory:
+        library = RequisitionLibrary(os.path.join(directory, "library.sqlite3"))
+        for i in range(requisitions):
+            library.requisition(document(12, 300), title=f"REQ-{i:05d}")
+        matcher = RequisitionMatcher(library, _HashingEmbeddings())
+        started = time.perf_counter()
+        matcher.refresh()
+        print(f"indexed {len(matcher)} requisitions in {time.perf_counter() - started:.1f}s "
+              "(embeddings and skills stored in the library)")
+
+        rebuilt = RequisitionMatcher(library, _HashingEmbeddings())
+        started = time.perf_counter()
+        rebuilt.refresh()
+        print(f"reloaded them in a fresh matcher in {time.perf_counter() - started:.1f}s")
+
+        resume = document(15, 600)
+        started = time.perf_counter()
+        profile = matcher.resume_profile(resume)
+        print(f"resume profile: {(time.perf_counter() - started) * 1000:.1f} ms")
+        started = time.perf_counter()
+        for _ in range(repeat):
+            matches = matcher.rank(*profile, n=DEFAULT_TOP_N)
+        print(f"ranked {len(matcher)} requisitions in "
+              f"{(time.perf_counter() - started) / repeat * 1000:.2f} ms per resume")
+        best = matches[0]
+        print(f"best: {best['title']} score {best['score']:.3f} "
+              f"(similarity {best['similarity']:.3f}, coverage {best['skill_coverage']:.2f})")
+
+        # A closed requisition drops out of the ranking and comes back when reopened
+        library.close(best["jd_hash"])
+        assert best["jd_hash"] not in [match["jd_hash"] for match in matcher.top_requisitions(resume)]
+        library.reopen(best["jd_hash"])
+        assert matcher.top_requisitions(resume)[0]["jd_hash"] == best["jd_hash"]
+        print(f"closing {best['title']} removed it from the ranking; reopening restored it")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,119 @@
+"""
+Paginated rendering of large result sets.
+
+Results are kept server-side in a ResultStore (a pyarrow Table), and only the page
+being viewed is converted to pandas and sent to the browser. Search and sort run
+as Arrow compute kernels over the whole table, so the websocket payload and the
+number of rendered elements depend on the page size, not on the batch size.
+
+    store = ResultStore.from_pandas(results_df)
+    st.session_state["results"] = store          # survives paging reruns
+    page = paginate(store, key="results", sort_columns=["Score", "Name"],
+                    search_columns=["Name"])
+    st.dataframe(page)
+
+Card-style views can keep only titles and keys in the store and load each card's
+body for the current page (see ProjectUpdate_Sales_Download.py).
+"""
+import math
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import streamlit as st
+
+DEFAULT_PAGE_SIZE = 25
+PAGE_SIZE_OPTIONS = (10, 25, 50, 100)
+
+
+class ResultStore:
+    """Immutable columnar result set with server-side search, sort and slicing."""
+
+    def __init__(self, table):
+        self.table = table
+
+    @classmethod
+    def from_pandas(cls, df):
+        return cls(pa.Table.from_pandas(df, preserve_index=False))
+
+    @classmethod
+    def from_records(cls, records, columns):
+        """Build from a list of row lists (or tuples) and the column names."""
+        return cls(pa.table({
+            name: [record[i] for record in records] for i, name in enumerate(columns)
+        }))
+
+    def __len__(self):
+        return self.table.num_rows
+
+    @property
+    def columns(self):
+        return self.table.column_names
+
+    def query(self, search=None, search_columns=None, sort_by=None, descending=False):
+        """
+        Rows containing `search` (case-insensitive substring) in any of
+        `search_columns`, ordered by `sort_by`. Nulls sort last. Returns a Table.
+        """
+        table = self.table
+        if search and search_columns:
+            mask = None
+            for column in search_columns:
+                values = pc.cast(table[column], pa.string())
+                hit = pc.fill_null(pc.match_substring(values, search, ignore_case=True), False)
+                mask = hit if mask is None else pc.or_(mask, hit)
+            table = table.filter(mask)
+        if sort_by:
+            order = "descending" if descending else "ascending"
+            # Nulls are placed last by default
+            indices = pc.sort_indices(table, sort_keys=[(sort_by, order)])
+            table = table.take(indices)
+        return table
+
+    @staticmethod
+    def page(table, page, page_size):
+        """Rows of 1-based `page` as a pandas DataFrame."""
+        return table.slice((page - 1) * page_size, page_size).to_pandas()
+
+
+def paginate(store, key, sort_columns=None, search_columns=None, default_sort=None,
+             descending=True, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Draw search / sort / page controls for `store` and return the current page as
+    a DataFrame. `key` namespaces the widget state, so several pagers can coexist.
+    """
+    sort_columns = list(sort_columns or [])
+    search_columns = list(search_columns or [])
+    search_col, sort_col, order_col, size_col = st.columns([3, 2, 1, 1])
+    search = search_col.text_input(
+        "Search", key=f"{key}_search", disabled=not search_columns,
+        placeholder=f"Filter by {', '.join(search_columns)}" if search_columns else "",
+    )
+    sort_by = None
+    if sort_columns:
+        default_index = sort_columns.index(default_sort) if default_sort in sort_columns else 0
+        sort_by = sort_col.selectbox("Sort by", sort_columns, index=default_index, key=f"{key}_sort")
+    descending = order_col.checkbox("Descending", value=descending, key=f"{key}_desc")
+    page_size = size_col.selectbox(
+        "Per page", PAGE_SIZE_OPTIONS,
+        index=PAGE_SIZE_OPTIONS.index(page_size) if page_size in PAGE_SIZE_OPTIONS else 1,
+        key=f"{key}_size",
+    )
+
+    view = store.query(search.strip(), search_columns, sort_by, descending)
+    pages = max(1, math.ceil(view.num_rows / page_size))
+    # A narrower search can leave the stored page number past the end
+    page_key = f"{key}_page"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+
+    start = (page - 1) * page_size
+    end = min(start + page_size, view.num_rows)
+    if view.num_rows:
+        st.caption(
+            f"Page {page} of {pages} · showing {start + 1}-{end} of {view.num_rows} matching "
+            f"({len(store)} total)"
+        )
+    else:
+        st.caption(f"No matching results ({len(store)} total)")
+    return store.page(view, page, page_size)
@@ -0,0 +1,284 @@
+"""
+Section-aware chunking of resumes and job descriptions for the RAG index.
+
+Fixed 1200-character windows with a 150-character overlap cut across roles and
+sections and embed the overlap twice. chunk_document() follows the document's own
+structure instead, read from its line layout:
+
+    section headings  known names ("Professional Experience", "Requirements",
+                      "What you'll do", ...) and heading-shaped lines: short,
+                      ALL CAPS or ending in ":"
+    entries           inside experience / projects, a line with a date range
+                      ("Jan 2019 - Present", "2016 – 2018") starts a new role,
+                      together with the title line just above it
+    lines             bullets and list items are never split
+
+Entries are packed into chunks of at most max_chars without overlap and never
+across a section boundary, except that sections too small to embed on their own
+(contact header, a two-line summary) are merged with their neighbour. Every chunk
+starts with its section heading and carries metadata for retrieval filters:
+
+    for text, metadata in chunk_document(resume_text, "resume"):
+        ...   # metadata: {"source": "resume", "section": "experience",
+              #            "heading": "Professional Experience", "chunk": 3}
+
+Text with its line breaks flattened away still chunks, on sentence boundaries,
+but the structure comes from the lines: extract with newline separators.
+
+Run this module directly to compare it with fixed windows on a synthetic resume
+and JD:
+    python section_chunker.py
+"""
+import re
+
+# bge-small and MiniLM read 512 tokens, about 2000 characters of English
+DEFAULT_MAX_CHARS = 1_800
+# Smaller sections are merged into a neighbouring chunk
+MIN_CHUNK_CHARS = 300
+# Heading-shaped lines are at most this long
+MAX_HEADING_WORDS = 6
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me", "overview", "career summary"),
+    "skills": ("skills", "technical skills", "key skills", "core competencies", "competencies",
+               "technologies", "technical expertise", "expertise", "tools", "skill set", "tech stack"),
+    "experience": ("experience", "professional experience", "work experience", "employment history",
+                   "work history", "career history", "relevant experience", "employment"),
+    "projects": ("projects", "key projects", "project experience", "project details",
+                 "selected projects"),
+    "education": ("education", "academic background", "educational qualifications",
+                  "academic qualifications", "education and training"),
+    "certifications": ("certifications", "certificates", "licenses and certifications",
+                       "certifications and training", "training"),
+    "achievements": ("achievements", "awards", "accomplishments", "honors"),
+    "responsibilities": ("responsibilities", "key responsibilities", "duties", "job responsibilities",
+                         "roles and responsibilities", "what you will do", "what you'll do",
+                         "the role", "role", "job description", "your role"),
+    "requirements": ("requirements", "qualifications", "required qualifications", "minimum qualifications",
+                     "required skills", "skills required", "must have", "must haves", "what you bring",
+                     "what we are looking for", "what we're looking for", "who you are", "mandatory skills"),
+    "preferred": ("preferred qualifications", "preferred skills", "nice to have", "good to have",
+                  "desired skills", "bonus points", "pluses"),
+    "benefits": ("benefits", "perks", "what we offer", "compensation", "compensation and benefits"),
+    "company": ("about us", "about the company", "who we are", "company overview", "our company"),
+}
+# In a resume, a bare "Qualifications" heading means education
+SOURCE_OVERRIDES = {"resume": {"qualifications": "education"}}
+# Name of the text before the first heading
+PREAMBLE_SECTION = {"resume": "header", "jd": "overview"}
+# Sections whose entries are roles, delimited by date ranges
+ENTRY_SECTIONS = {"experience", "projects"}
+
+_HEADING_NAMES = {name: section for section, names in SECTION_HEADINGS.items() for name in names}
+_BULLET = re.compile(r"^\s*(?:[-*•·▪◦●○■□➢➤►✓✔]|\d{1,2}[.)]|[a-z][.)])\s+", re.IGNORECASE)
+_MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE = rf"(?:{_MONTH}\s*'?\d{{2,4}}|\d{{1,2}}/\d{{2,4}}|(?:19|20)\d{{2}})"
+_DATE_RANGE = re.compile(
+    rf"{_DATE}\s*(?:-|–|—|to|till|until)\s*(?:{_DATE}|present|current|now|date|today)", re.IGNORECASE
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+
+
+def _heading_key(line):
+    return " ".join(re.sub(r"[^\w\s'&/]", " ", line.lower()).split())
+
+
+def classify_heading(line, source=None):
+    """
+    (section, heading) when `line` is a section heading, else None. Known names map
+    to their canonical section; other heading-shaped lines use their own name.
+    """
+    text = line.strip().strip("#*_=").strip()
+    if not text or _BULLET.match(line) or len(text) > 60:
+        return None
+    key = _heading_key(text.rstrip(":"))
+    words = key.split()
+    if not words or len(words) > MAX_HEADING_WORDS:
+        return None
+    overrides = SOURCE_OVERRIDES.get(source, {})
+    if key in overrides or key in _HEADING_NAMES:
+        return overrides.get(key) or _HEADING_NAMES[key], text.rstrip(":").strip()
+    letters = [c for c in text if c.isalpha()]
+    shaped = (len(letters) >= 4 and text.upper() == text) or (
+        text.endswith(":") and text[0].isupper() and "," not in text
+    )
+    if shaped and not _DATE_RANGE.search(text) and not any(c.isdigit() for c in text):
+        return key, text.rstrip(":").strip()
+    return None
+
+
+def _split_long(line, max_chars):
+    """A line longer than max_chars split on sentences, then on words."""
+    pieces, current = [], ""
+    for sentence in _SENTENCE_END.split(line):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _sections(lines, source):
+    """[(section, heading, [line, ...])] in document order."""
+    preamble = PREAMBLE_SECTION.get(source, "overview")
+    sections = [(preamble, preamble.title(), [])]
+    for line in lines:
+        heading = classify_heading(line, source)
+        section = sections[-1][0]
+        unknown = heading and heading[0] not in SECTION_HEADINGS
+        # An unknown ALL CAPS line is the candidate's name on the first line and an
+        # employer inside a role list, not a section
+        if heading and not (unknown and (section in ENTRY_SECTIONS or len(sections) == 1 and not sections[0][2])):
+            sections.append((heading[0], heading[1], []))
+        else:
+            sections[-1][2].append(line)
+    return [section for section in sections if section[2]]
+
+
+def _entries(section, lines):
+    """Lines of a section grouped into entries that must stay together if possible."""
+    if section not in ENTRY_SECTIONS:
+        return [[line] for line in lines]
+    starts = [0]
+    for i, line in enumerate(lines):
+        if i and _DATE_RANGE.search(line):
+            # The title / employer line usually sits just above the dates
+            above = lines[i - 1]
+            start = i - 1 if (not _BULLET.match(above) and len(above.split()) <= 12) else i
+            if start > starts[-1]:
+                starts.append(start)
+    return [lines[start:stop] for start, stop in zip(starts, starts[1:] + [len(lines)])]
+
+
+def chunk_document(text, source, max_chars=DEFAULT_MAX_CHARS, min_chars=MIN_CHUNK_CHARS):
+    """
+    [(chunk_text, metadata)] for a resume or JD (`source` "resume" / "jd").
+    metadata holds source, section, heading and the chunk's position.
+    """
+    lines = [" ".join(line.split()) for line in (text or "").splitlines()]
+    lines = [line for line in lines if line]
+
+    chunks = []  # [section, heading, body_lines]
+    for section, heading, section_lines in _sections(lines, source):
+        current = None
+        # Room for the body lines, each with its newline, after "heading:"
+        budget = max_chars - len(heading) - 1
+        for entry in _entries(section, section_lines):
+            entry_size = sum(len(line) + 1 for line in entry)
+            if current is None or (current[3] + entry_size > budget and current[2]):
+                current = [section, heading, [], 0]
+                chunks.append(current)
+            for line in entry:
+                for piece in _split_long(line, budget - 1) if len(line) >= budget else [line]:
+                    # An entry longer than a chunk continues in the next one
+                    if current[2] and current[3] + len(piece) + 1 > budget:
+                        current = [section, heading, [], 0]
+                        chunks.append(current)
+                    current[2].append(piece)
+                    current[3] += len(piece) + 1
+
+    def merge(into, chunk):
+        # A different heading is kept as a line of its own
+        lines = chunk[2] if chunk[1] == into[1] else [f"{chunk[1]}:"] + chunk[2]
+        into[2].extend(lines)
+        into[3] += sum(len(line) + 1 for line in lines)
+        if chunk[0] not in into[0].split(", "):
+            into[0] = f"{into[0]}, {chunk[0]}"
+
+    def fits(into, chunk):
+        added = chunk[3] + (0 if chunk[1] == into[1] else len(chunk[1]) + 2)
+        return len(into[1]) + 1 + into[3] + added <= max_chars
+
+    # Merge chunks too small to stand alone into the following one
+    merged = []
+    for chunk in chunks:
+        previous = merged[-1] if merged else None
+        if previous and previous[3] < min_chars and fits(previous, chunk):
+            merge(previous, chunk)
+        else:
+            merged.append(list(chunk))
+    if len(merged) > 1 and merged[-1][3] < min_chars and fits(merged[-2], merged[-1]):
+        merge(merged[-2], merged.pop())
+
+    return [
+        ("\n".join([f"{heading}:"] + body), {"source": source, "section": section, "heading": heading, "chunk": i})
+        for i, (section, heading, body, _) in enumerate(merged)
+    ]
+
+
+def _fixed_windows(text, size=1_200, overlap=150):
+    # What RecursiveCharacterTextSplitter produced on flattened text
+    text = " ".join(text.split())
+    windows, start = [], 0
+    while start < len(text):
+        end = min(len(text), start + size)
+        if end < len(text):
+            end = text.rfind(" ", start, end) if text.rfind(" ", start, end) > start else end
+        windows.append((start, end))
+        if end == len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [text[a:b] for a, b in windows]
+
+
+def _synthetic_resume(roles=6, bullets=6):
+    lines = ["JANE DOE", "Data Engineer | jane.doe@example.com | +1 555 010 2000 | Austin, TX", "",
+             "PROFESSIONAL SUMMARY",
+             "Data engineer with 9 years of experience building batch and streaming platforms on AWS and Azure.",
+             "", "TECHNICAL SKILLS",
+             "Languages: Python, SQL, Scala, Java", "Big data: Spark, Kafka, Airflow, Databricks, Snowflake",
+             "Cloud: AWS (Glue, EMR, Redshift), Azure (ADF, Synapse)", "", "PROFESSIONAL EXPERIENCE"]
+    for role in range(roles):
+        lines += [f"Senior Data Engineer, Company {role} Inc.", f"Jan {2023 - 2 * role} - "
+                  + ("Present" if role == 0 else f"Dec {2024 - 2 * role}")]
+        lines += [f"• Built and operated pipeline {role}.{b} processing {b + 1} TB per day with Spark and "
+                  f"Kafka, cutting latency by {10 + b}% and cost by {5 + b}%." for b in range(bullets)]
+    lines += ["", "EDUCATION", "B.S. Computer Science, State University, 2014", "",
+              "CERTIFICATIONS", "AWS Certified Data Analytics - Specialty"]
+    return "\n".join(lines)
+
+
+def _synthetic_jd():
+    return "\n".join([
+        "Senior Data Engineer - Austin, TX (Hybrid)", "", "About the Company",
+        "We build analytics products for healthcare providers across the US.", "",
+        "Responsibilities:"] + [f"- Design, build and maintain data pipeline component {i} on AWS with "
+                                "Spark and Airflow, and own its reliability." for i in range(8)] + [
+        "", "Requirements:"] + [f"- {years}+ years of experience with {tool}" for years, tool in
+                                zip(range(3, 11), ["Python", "SQL", "Spark", "Kafka", "Airflow", "AWS",
+                                                   "Terraform", "Snowflake"])] + [
+        "", "Nice to have:", "- Databricks", "- dbt", "", "Benefits", "Medical, dental, 401(k) and remote days."])
+
+
+def benchmark():
+    for source, text in (("resume", _synthetic_resume()), ("jd", _synthetic_jd())):
+        fixed = _fixed_windows(text)
+        sections = chunk_document(text, source)
+        headings = [line for line in text.splitlines() if classify_heading(line, source)]
+        # Windows containing the end of one section and the start of another
+        straddling = sum(
+            1 for window in fixed
+            if sum(1 for heading in headings if heading.strip().rstrip(":") in window) >= 1
+            and not window.startswith(tuple(heading.strip().rstrip(":") for heading in headings))
+        )
+        duplicated = sum(len(window) for window in fixed) - len(" ".join(text.split()))
+        print(f"{source}: {len(text)} chars")
+        print(f"  fixed 1200/150 windows: {len(fixed)} chunks, {duplicated} chars embedded twice, "
+              f"{straddling} straddle a section heading")
+        print(f"  section chunks:         {len(sections)} chunks, 0 chars embedded twice, "
+              f"sizes {[len(chunk) for chunk, _ in sections]}")
+        for chunk, metadata in sections:
+            print(f"    {metadata['section']:<28} {chunk.splitlines()[1][:60]!r}")
+
+
+if __name__ == "__main__":
+    benchmark()
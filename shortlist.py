@@ -0,0 +1,244 @@
+"""
+Incrementally maintained top-K shortlists per requisition.
+
+Every score a matcher produces for a (requisition, candidate) pair is recorded
+once, and each requisition keeps its best K candidates in a bounded min-heap. A new
+or re-scored candidate costs O(log K), so a dashboard can show the live shortlist
+without re-running the match over the whole pool:
+
+    shortlists = ShortlistStore()
+    shortlists.update_many(jd_digest(jd_text), [(candidate_id, 87.0), ...])
+    for candidate_id, score in shortlists.shortlist(jd_digest(jd_text)):
+        ...
+    shortlists.withdraw(candidate_id)      # leaves every shortlist
+
+Requisitions are keyed by requisition_library.jd_digest() and candidates by their
+candidate_store id. When scores also depend on other inputs, such as the required
+skills, fold them into the key with prompt_version(jd_digest(jd_text), *skills) so
+scores made under different settings are not ranked together. All scores are kept in SQLite, not only the top K, so when a
+shortlisted candidate is withdrawn or re-scored lower the heap is refilled with one
+indexed query, and the shortlists survive restarts (heaps are loaded on first use).
+Ties are broken on the lower candidate id, in memory and in SQL alike.
+
+Run this module directly for a benchmark against re-sorting the whole pool:
+    python shortlist.py
+"""
+import heapq
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+DEFAULT_SHORTLIST_PATH = os.getenv("SHORTLIST_STORE", "shortlist.sqlite3")
+DEFAULT_SHORTLIST_SIZE = 20
+# Rows per executemany batch
+BATCH_ROWS = 5_000
+
+
+class ShortlistStore:
+    """Persisted scores with a top-K heap per requisition."""
+
+    def __init__(self, path=DEFAULT_SHORTLIST_PATH, size=DEFAULT_SHORTLIST_SIZE):
+        self.path = path
+        self.size = size
+        self._lock = threading.RLock()
+        self._heaps = {}  # jd_hash -> min-heap of (score, -candidate_id), at most `size`
+        self._withdrawn = None
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS scores (
+                    jd_hash TEXT NOT NULL,
+                    candidate_id INTEGER NOT NULL,
+                    score REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (jd_hash, candidate_id)
+                );
+                CREATE INDEX IF NOT EXISTS scores_rank ON scores (jd_hash, score DESC, candidate_id);
+                CREATE INDEX IF NOT EXISTS scores_candidate ON scores (candidate_id);
+                CREATE TABLE IF NOT EXISTS withdrawn (
+                    candidate_id INTEGER PRIMARY KEY,
+                    withdrawn_at REAL NOT NULL
+                );
+                """
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commits on success
+                yield conn
+        finally:
+            conn.close()
+
+    def _is_withdrawn(self, candidate_id):
+        if self._withdrawn is None:
+            with self._connect() as conn:
+                self._withdrawn = {row[0] for row in conn.execute("SELECT candidate_id FROM withdrawn")}
+        return candidate_id in self._withdrawn
+
+    def _load(self, conn, jd_hash):
+        rows = conn.execute(
+            """SELECT score, candidate_id FROM scores WHERE jd_hash = ?
+               ORDER BY score DESC, candidate_id LIMIT ?""",
+            (jd_hash, self.size),
+        ).fetchall()
+        heap = [(score, -candidate_id) for score, candidate_id in rows]
+        heapq.heapify(heap)
+        self._heaps[jd_hash] = heap
+        return heap
+
+    def _heap(self, conn, jd_hash):
+        heap = self._heaps.get(jd_hash)
+        return heap if heap is not None else self._load(conn, jd_hash)
+
+    def _apply(self, conn, jd_hash, candidate_id, score):
+        """Update the in-memory heap for a score already written to `scores`."""
+        heap = self._heap(conn, jd_hash)
+        entry = (score, -candidate_id)
+        for i, (old_score, negated_id) in enumerate(heap):
+            if negated_id == -candidate_id:
+                if score >= old_score or len(heap) < self.size:
+                    heap[i] = entry
+                    heapq.heapify(heap)
+                else:
+                    # A lower score may let a candidate outside the heap overtake it
+                    self._load(conn, jd_hash)
+                return
+        if len(heap) < self.size:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def update(self, jd_hash, candidate_id, score):
+        """Record a candidate's score for a requisition; True if the shortlist changed."""
+        return bool(self.update_many(jd_hash, [(candidate_id, score)]))
+
+    def update_many(self, jd_hash, scores):
+        """
+        Record (candidate_id, score) pairs for one requisition in one transaction.
+        Withdrawn candidates are ignored. Returns the ids whose shortlist entry
+        changed (entered, re-scored or pushed out), in no particular order.
+        """
+        with self._lock:
+            rows = [(int(candidate_id), float(score)) for candidate_id, score in scores
+                    if not self._is_withdrawn(int(candidate_id))]
+            if not rows:
+                return []
+            now = time.time()
+            with self._connect() as conn:
+                before = {-negated_id: score for score, negated_id in self._heap(conn, jd_hash)}
+                for start in range(0, len(rows), BATCH_ROWS):
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+                        [(jd_hash, candidate_id, score, now) for candidate_id, score in rows[start:start + BATCH_ROWS]],
+                    )
+                for candidate_id, score in rows:
+                    self._apply(conn, jd_hash, candidate_id, score)
+                after = {-negated_id: score for score, negated_id in self._heaps[jd_hash]}
+            return [candidate_id for candidate_id in before.keys() | after.keys()
+                    if before.get(candidate_id) != after.get(candidate_id)]
+
+    def remove(self, jd_hash, candidate_id):
+        """Drop one candidate's score for one requisition."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM scores WHERE jd_hash = ? AND candidate_id = ?", (jd_hash, int(candidate_id)))
+            if any(negated_id == -int(candidate_id) for _, negated_id in self._heaps.get(jd_hash, ())):
+                self._load(conn, jd_hash)
+
+    def withdraw(self, candidate_id):
+        """
+        Take a candidate out of every shortlist and ignore their future scores until
+        reinstate(). Returns the requisitions whose shortlist changed.
+        """
+        candidate_id = int(candidate_id)
+        with self._lock, self._connect() as conn:
+            self._is_withdrawn(candidate_id)
+            self._withdrawn.add(candidate_id)
+            conn.execute("INSERT OR REPLACE INTO withdrawn VALUES (?, ?)", (candidate_id, time.time()))
+            conn.execute("DELETE FROM scores WHERE candidate_id = ?", (candidate_id,))
+            affected = [jd_hash for jd_hash, heap in self._heaps.items()
+                        if any(negated_id == -candidate_id for _, negated_id in heap)]
+            for jd_hash in affected:
+                self._load(conn, jd_hash)
+            return affected
+
+    def reinstate(self, candidate_id):
+        """Accept scores for a withdrawn candidate again (they must be re-scored)."""
+        candidate_id = int(candidate_id)
+        with self._lock, self._connect() as conn:
+            self._is_withdrawn(candidate_id)
+            self._withdrawn.discard(candidate_id)
+            conn.execute("DELETE FROM withdrawn WHERE candidate_id = ?", (candidate_id,))
+
+    def shortlist(self, jd_hash):
+        """[(candidate_id, score)] of the requisition's top candidates, best first."""
+        with self._lock:
+            heap = self._heaps.get(jd_hash)
+            if heap is None:
+                with self._connect() as conn:
+                    heap = self._load(conn, jd_hash)
+            return [(-negated_id, score) for score, negated_id in sorted(heap, reverse=True)]
+
+    def scored(self, jd_hash):
+        """Number of candidates with a recorded score for the requisition."""
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM scores WHERE jd_hash = ?", (jd_hash,)).fetchone()[0]
+
+
+def benchmark(requisitions=20, pool_size=20_000, batch=50, size=DEFAULT_SHORTLIST_SIZE):
+    rng = np.random.default_rng(11)
+    with tempfile.TemporaryDirectory() as directory:
+        store = ShortlistStore(os.path.join(directory, "shortlist.sqlite3"), size=size)
+        jd_hashes = [f"jd-{i}" for i in range(requisitions)]
+        scores = np.round(rng.uniform(0, 95, size=(requisitions, pool_size)), 1)
+
+        started = time.perf_counter()
+        for jd_index, jd_hash in enumerate(jd_hashes):
+            store.update_many(jd_hash, zip(range(pool_size), scores[jd_index].tolist()))
+        elapsed = time.perf_counter() - started
+        print(f"recorded {requisitions * pool_size} scores in {elapsed:.1f}s")
+
+        # A new batch of resumes arrives for one requisition, a few of them strong
+        new_ids = range(pool_size, pool_size + batch)
+        new_scores = np.round(rng.uniform(0, 95, size=batch), 1)
+        new_scores[:5] = np.round(rng.uniform(95, 100, size=5), 1)
+        new_scores = new_scores.tolist()
+        started = time.perf_counter()
+        changed = store.update_many(jd_hashes[0], zip(new_ids, new_scores))
+        top = store.shortlist(jd_hashes[0])
+        incremental = time.perf_counter() - started
+        print(f"{batch} new resumes: shortlist updated in {incremental * 1000:.1f} ms "
+              f"({len(changed)} shortlist entries changed)")
+
+        # What the apps did before: re-rank the whole pool
+        pool = dict(zip(range(pool_size), scores[0].tolist()))
+        pool.update(zip(new_ids, new_scores))
+        started = time.perf_counter()
+        expected = sorted(pool.items(), key=lambda item: (-item[1], item[0]))[:size]
+        print(f"re-sorting the pool of {len(pool)}: {(time.perf_counter() - started) * 1000:.1f} ms "
+              "(plus re-scoring every resume)")
+        assert top == expected
+
+        started = time.perf_counter()
+        for candidate_id, _ in top[:5]:
+            store.withdraw(candidate_id)
+        print(f"withdrew 5 shortlisted candidates in {(time.perf_counter() - started) * 1000:.1f} ms")
+        assert store.shortlist(jd_hashes[0]) == [item for item in expected if item not in top[:5]] + \
+            sorted(((c, s) for c, s in pool.items() if (c, s) not in expected),
+                   key=lambda item: (-item[1], item[0]))[:5]
+
+        reopened = ShortlistStore(store.path, size=size)
+        started = time.perf_counter()
+        assert reopened.shortlist(jd_hashes[0]) == store.shortlist(jd_hashes[0])
+        print(f"reloaded after restart in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
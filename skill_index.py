@@ -0,0 +1,359 @@
+"""
+Boolean skill search over an inverted index of candidate skills.
+
+Each skill maps to the ids of the candidates whose resumes mention it (the ids of
+candidate_store records). A posting list is kept in whichever form is smaller: a
+sorted uint32 array for rare skills, or a bitmap of 64-bit words once more than
+DENSE_FRACTION of the pool has the skill. Queries are evaluated on bitmaps, so
+AND / OR / NOT are single numpy bitwise operations over pool_size / 64 words:
+
+    index = SkillIndex.build(store.iter_skills())
+    ids = index.query("Python AND (Spark OR Databricks) AND NOT Java")
+
+Query syntax: AND, OR, NOT (any case), parentheses and skill names; adjacent words
+form one skill ("machine learning"), and "quoted names" may contain any character.
+AND binds tighter than OR. Skills are matched after normalize_skill().
+
+New and re-analysed resumes are added with add(); they are merged into the posting
+arrays lazily, on the next query.
+
+Run this module directly for a benchmark on a synthetic pool of a million candidates:
+    python skill_index.py
+"""
+import functools
+import re
+import threading
+import time
+
+import numpy as np
+
+# Postings covering more than this fraction of the pool are stored as bitmaps
+DENSE_FRACTION = 1 / 32
+# Bitmaps grow by at least this many candidate ids at a time
+MIN_CAPACITY = 1 << 16
+DEFAULT_SKILLS = (
+    "python", "java", "scala", "go", "golang", "rust", "c", "c++", "c#", ".net", "javascript",
+    "typescript", "node.js", "react", "angular", "vue", "html", "css", "sql", "pl/sql", "nosql",
+    "postgresql", "mysql", "oracle", "sql server", "mongodb", "cassandra", "redis", "elasticsearch",
+    "kafka", "spark", "pyspark", "hadoop", "hive", "airflow", "dbt", "databricks", "snowflake",
+    "redshift", "bigquery", "data lake", "etl", "tableau", "power bi", "excel", "aws", "azure",
+    "gcp", "docker", "kubernetes", "terraform", "ansible", "jenkins", "git", "ci/cd", "linux",
+    "bash", "powershell", "rest", "graphql", "microservices", "spring", "spring boot", "django",
+    "flask", "fastapi", "pandas", "numpy", "machine learning", "deep learning", "nlp",
+    "pytorch", "tensorflow", "scikit-learn", "llm", "salesforce", "sap", "servicenow",
+    "agile", "scrum", "jira", "selenium", "cypress", "ios", "android", "swift", "kotlin",
+)
+
+_QUERY_TOKEN = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+_KEYWORDS = {"and", "or", "not"}
+
+
+def normalize_skill(skill):
+    """Lower-cased skill name with whitespace collapsed."""
+    return " ".join(str(skill).lower().split())
+
+
+@functools.lru_cache(maxsize=32)
+def _skill_pattern(skills):
+    # Longest names first so "spring boot" wins over "spring"
+    names = sorted(skills, key=len, reverse=True)
+    alternatives = "|".join(r"\s+".join(map(re.escape, name.split())) for name in names)
+    # \b does not work next to '+', '#' or '.', as in c++, c# and .net
+    return re.compile(rf"(?<![\w+#.])(?:{alternatives})(?![\w+#])", re.IGNORECASE)
+
+
+def find_skills(text, skills=DEFAULT_SKILLS):
+    """Sorted normalized names of the `skills` mentioned in `text`, in one regex pass."""
+    vocabulary = tuple(sorted({normalize_skill(skill) for skill in skills if str(skill).strip()}))
+    if not text or not vocabulary:
+        return []
+    return sorted({normalize_skill(match) for match in _skill_pattern(vocabulary).findall(text)})
+
+
+def _bit(candidate_id):
+    return int(candidate_id) >> 6, np.uint64(1 << (int(candidate_id) & 63))
+
+
+class SkillIndex:
+    """Thread-safe inverted index from skill to candidate ids with boolean queries."""
+
+    def __init__(self, dense_fraction=DENSE_FRACTION):
+        self.dense_fraction = dense_fraction
+        self.count = 0
+        self._lock = threading.RLock()
+        self._present = np.zeros(0, dtype=np.uint64)  # bitmap of indexed candidates
+        self._sparse = {}   # skill -> sorted uint32 ids
+        self._dense = {}    # skill -> uint64 bitmap
+        self._pending = {}  # skill -> ids added since the last merge
+
+    @classmethod
+    def build(cls, rows, **kwargs):
+        """Index from (candidate_id, skills) pairs, e.g. CandidateStore.iter_skills()."""
+        index = cls(**kwargs)
+        index.add_many(rows)
+        return index
+
+    @property
+    def skills(self):
+        """Names of all indexed skills."""
+        with self._lock:
+            return set(self._sparse) | set(self._dense) | set(self._pending)
+
+    def __contains__(self, candidate_id):
+        word, mask = _bit(candidate_id)
+        return word < len(self._present) and bool(self._present[word] & mask)
+
+    def _grow(self, candidate_id):
+        words = len(self._present)
+        if candidate_id < words * 64:
+            return
+        # Grow geometrically so the dense bitmaps are reallocated rarely
+        new_words = max(candidate_id // 64 + 1, 2 * words, MIN_CAPACITY // 64)
+        self._present = np.concatenate((self._present, np.zeros(new_words - words, dtype=np.uint64)))
+        for skill, bitmap in self._dense.items():
+            self._dense[skill] = np.concatenate((bitmap, np.zeros(new_words - words, dtype=np.uint64)))
+
+    def add(self, candidate_id, skills):
+        """Index a candidate under `skills`, replacing what was indexed for it before."""
+        candidate_id = int(candidate_id)
+        with self._lock:
+            if candidate_id in self:
+                self.remove(candidate_id)
+            self._grow(candidate_id)
+            word, mask = _bit(candidate_id)
+            self._present[word] |= mask
+            self.count += 1
+            for skill in {normalize_skill(skill) for skill in skills if str(skill).strip()}:
+                if skill in self._dense:
+                    self._dense[skill][word] |= mask
+                else:
+                    self._pending.setdefault(skill, []).append(candidate_id)
+
+    def add_many(self, rows):
+        """Bulk add() of (candidate_id, skills) pairs, grouping the postings with numpy."""
+        codes, raw_codes, id_runs, skill_ids, lengths = {}, {}, [], [], []
+        for candidate_id, skills in rows:
+            # Skill lists repeat the same few hundred names: normalize each raw name once
+            found = set()
+            for skill in skills:
+                code = raw_codes.get(skill)
+                if code is None:
+                    name = normalize_skill(skill)
+                    code = raw_codes[skill] = codes.setdefault(name, len(codes)) if name else -1
+                if code >= 0:
+                    found.add(code)
+            id_runs.append(candidate_id)
+            skill_ids.extend(found)
+            lengths.append(len(found))
+        if not id_runs:
+            return
+        with self._lock:
+            candidate_ids = np.asarray(id_runs, dtype=np.uint32)
+            words = (candidate_ids >> 6).astype(np.intp)
+            known = words < len(self._present)
+            known[known] = (self._present[words[known]] >> (candidate_ids[known] & 63).astype(np.uint64)) & np.uint64(1) == 1
+            for candidate_id in candidate_ids[known].tolist():
+                self.remove(candidate_id)
+            # Later duplicates of an id replace earlier ones, as with add()
+            last = np.unique(candidate_ids[::-1], return_index=True)[1]
+            keep_rows = np.zeros(len(candidate_ids), dtype=bool)
+            keep_rows[len(candidate_ids) - 1 - last] = True
+            self._grow(int(candidate_ids.max()))
+            self._present |= self._bitmap(candidate_ids[keep_rows])
+            self.count += int(keep_rows.sum())
+
+            owners = np.repeat(candidate_ids, lengths)[np.repeat(keep_rows, lengths)]
+            skill_ids = np.asarray(skill_ids, dtype=np.int64)[np.repeat(keep_rows, lengths)]
+            order = np.argsort(skill_ids, kind="stable")
+            skill_ids, owners = skill_ids[order], owners[order]
+            bounds = np.searchsorted(skill_ids, np.arange(len(codes) + 1))
+            for name, code in codes.items():
+                if bounds[code + 1] > bounds[code]:
+                    self._merge(name, owners[bounds[code]:bounds[code + 1]])
+
+    def remove(self, candidate_id):
+        """Drop a candidate from every posting; unknown ids are ignored."""
+        candidate_id = int(candidate_id)
+        with self._lock:
+            if candidate_id not in self:
+                return
+            word, mask = _bit(candidate_id)
+            self._present[word] &= ~mask
+            self.count -= 1
+            for bitmap in self._dense.values():
+                bitmap[word] &= ~mask
+            for skill, ids in self._sparse.items():
+                position = np.searchsorted(ids, candidate_id)
+                if position < len(ids) and ids[position] == candidate_id:
+                    self._sparse[skill] = np.delete(ids, position)
+            for ids in self._pending.values():
+                while candidate_id in ids:
+                    ids.remove(candidate_id)
+
+    def _bitmap(self, ids):
+        bitmap = np.zeros(len(self._present), dtype=np.uint64)
+        ids = ids.astype(np.uint64)
+        np.bitwise_or.at(bitmap, (ids >> np.uint64(6)).astype(np.intp), np.uint64(1) << (ids & np.uint64(63)))
+        return bitmap
+
+    def _merge(self, skill, added):
+        """Add the uint32 ids `added` to the posting of `skill`."""
+        if skill in self._dense:
+            self._dense[skill] |= self._bitmap(added)
+            return
+        ids = np.union1d(self._sparse.pop(skill, np.empty(0, dtype=np.uint32)), added).astype(np.uint32)
+        if len(ids) > self.dense_fraction * self.count:
+            self._dense[skill] = self._bitmap(ids)
+        elif len(ids):
+            self._sparse[skill] = ids
+
+    def _merge_pending(self):
+        for skill, added in self._pending.items():
+            self._merge(skill, np.asarray(added, dtype=np.uint32))
+        self._pending = {}
+
+    def posting(self, skill):
+        """Bitmap of the candidates with `skill` (all zeros if it is not indexed)."""
+        skill = normalize_skill(skill)
+        with self._lock:
+            if self._pending:
+                self._merge_pending()
+            if skill in self._dense:
+                return self._dense[skill]
+            return self._bitmap(self._sparse.get(skill, np.empty(0, dtype=np.uint32)))
+
+    def query(self, expression):
+        """
+        Sorted uint32 ids of the candidates matching a boolean skill expression.
+        Raises ValueError for a malformed expression.
+        """
+        with self._lock:
+            bitmap = _QueryParser(expression, self).parse()
+        # Bit i of word w is candidate 64 * w + i; the uint8 view is little-endian
+        bits = np.unpackbits(bitmap.view(np.uint8), bitorder="little")
+        return np.flatnonzero(bits).astype(np.uint32)
+
+    def query_skills(self, expression):
+        """Normalized skill names referenced by `expression`."""
+        return {value for kind, value in _tokenize(expression) if kind == "skill"}
+
+
+def _tokenize(expression):
+    tokens, position, words = [], 0, []
+
+    def flush_words():
+        if words:
+            tokens.append(("skill", normalize_skill(" ".join(words))))
+            words.clear()
+
+    expression = expression.strip()
+    while position < len(expression):
+        match = _QUERY_TOKEN.match(expression, position)
+        if match is None or match.end() == position:
+            break
+        position = match.end()
+        open_paren, close_paren, quoted, word = match.groups()
+        if word is not None and word.lower() not in _KEYWORDS:
+            words.append(word)
+            continue
+        flush_words()
+        if open_paren:
+            tokens.append(("(", None))
+        elif close_paren:
+            tokens.append((")", None))
+        elif quoted is not None:
+            tokens.append(("skill", normalize_skill(quoted)))
+        else:
+            tokens.append((word.lower(), None))
+    flush_words()
+    return tokens
+
+
+class _QueryParser:
+    """Recursive descent: or := and (OR and)*; and := not (AND not)*; not := NOT not | atom."""
+
+    def __init__(self, expression, index):
+        self.tokens = _tokenize(expression)
+        self.position = 0
+        self.index = index
+
+    def _peek(self):
+        return self.tokens[self.position][0] if self.position < len(self.tokens) else None
+
+    def _take(self, kind):
+        if self._peek() != kind:
+            found = self._peek() or "end of query"
+            raise ValueError(f"Expected {kind!r} but found {found!r} in skill query")
+        self.position += 1
+        return self.tokens[self.position - 1][1]
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Skill query is empty")
+        result = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"Unexpected {self._peek()!r} in skill query")
+        return result
+
+    def _or(self):
+        result = self._and()
+        while self._peek() == "or":
+            self._take("or")
+            result = result | self._and()
+        return result
+
+    def _and(self):
+        result = self._not()
+        while self._peek() == "and":
+            self._take("and")
+            result = result & self._not()
+        return result
+
+    def _not(self):
+        if self._peek() == "not":
+            self._take("not")
+            return self.index._present & ~self._not()
+        return self._atom()
+
+    def _atom(self):
+        if self._peek() == "(":
+            self._take("(")
+            result = self._or()
+            self._take(")")
+            return result
+        return self.index.posting(self._take("skill"))
+
+
+def benchmark(pool_size=1_000_000, skills_per_candidate=8, repeat=20):
+    rng = np.random.default_rng(42)
+    skills = list(DEFAULT_SKILLS)
+    # Zipf-like popularity: a few skills are very common, most are rare
+    weights = 1 / np.arange(1, len(skills) + 1) ** 0.8
+    weights /= weights.sum()
+    choices = rng.choice(len(skills), size=(pool_size, skills_per_candidate), p=weights)
+    rows = [(i, [skills[s] for s in row]) for i, row in enumerate(choices.tolist())]
+    started = time.perf_counter()
+    index = SkillIndex.build(rows)
+    print(f"indexed {pool_size} candidates in {time.perf_counter() - started:.1f}s "
+          f"({len(index._dense)} dense / {len(index._sparse)} sparse postings)")
+
+    print(f"{'query':>52}{'hits':>9}{'ms':>8}")
+    for expression in ("python AND (spark OR databricks) AND NOT java",
+                       "kafka AND terraform",
+                       '"machine learning" OR pytorch OR tensorflow',
+                       "NOT (sql OR excel)"):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            hits = index.query(expression)
+        elapsed = (time.perf_counter() - started) / repeat * 1000
+        print(f"{expression:>52}{len(hits):>9}{elapsed:>8.2f}")
+
+    started = time.perf_counter()
+    for candidate_id in range(pool_size, pool_size + 1_000):
+        index.add(candidate_id, ["python", "spark"])
+    index.query("python AND spark")
+    print(f"added 1000 candidates and re-queried in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,137 @@
+"""
+Bounded-memory handling of uploaded files.
+
+SpooledUpload keeps small uploads in memory and spills large ones to a temporary
+file, so PyMuPDF and zipfile read them from disk and OLE2 (.doc) parsing works on an
+mmap instead of a private copy. Uploads over the hard size cap are rejected before
+anything is read, and every handle (temp file, mmap) is released when the `with`
+block exits. Page caps are applied by the PDF extractor's budget. MuPDF's store of
+decoded fonts and images is a bounded cache shared by all sessions and is left to
+evict itself.
+
+measure_memory() records process RSS around an extraction. RSS is process-wide, so
+with concurrent sessions the figures include their allocations too:
+
+    with measure_memory(stats) as checkpoint:
+        with SpooledUpload(uploaded_file) as upload:
+            text = extract(upload.source)
+            checkpoint()  # sample while the upload is still open
+"""
+import mmap
+import os
+import resource
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+# Uploads above this size are written to a temp file instead of being held in memory
+SPILL_THRESHOLD_BYTES = 4 * 1024 * 1024
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+class SpooledUpload:
+    """
+    Context manager around a Streamlit UploadedFile.
+
+    source: bytes for small uploads, a temp file path for spilled ones; both are
+    accepted by the PDF and DOCX extractors.
+    buffer(): a bytes-like view (bytes or read-only mmap) for parsers that need
+    random access, such as the .doc extractor.
+    """
+
+    def __init__(self, uploaded_file, max_bytes=MAX_UPLOAD_BYTES, spill_bytes=SPILL_THRESHOLD_BYTES):
+        size = getattr(uploaded_file, "size", None)
+        if size is None:
+            uploaded_file.seek(0, os.SEEK_END)
+            size = uploaded_file.tell()
+        if size == 0:
+            raise ValueError("Uploaded file is empty or unreadable.")
+        if size > max_bytes:
+            raise ValueError(
+                f"File is {size / 2**20:.1f} MB; the limit is {max_bytes / 2**20:.0f} MB."
+            )
+        self.uploaded_file = uploaded_file
+        self.size = size
+        self.spill_bytes = spill_bytes
+        self.source = None
+        self._path = None
+        self._file = None
+        self._mmap = None
+
+    def __enter__(self):
+        self.uploaded_file.seek(0)
+        if self.size <= self.spill_bytes:
+            self.source = self.uploaded_file.read()
+            return self
+        suffix = os.path.splitext(getattr(self.uploaded_file, "name", ""))[1]
+        handle, self._path = tempfile.mkstemp(prefix="upload_", suffix=suffix)
+        with os.fdopen(handle, "wb") as spill:
+            shutil.copyfileobj(self.uploaded_file, spill, COPY_CHUNK_BYTES)
+        self.source = self._path
+        return self
+
+    def buffer(self):
+        if self._path is None:
+            return self.source
+        if self._mmap is None:
+            self._file = open(self._path, "rb")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._path is not None:
+            try:
+                os.remove(self._path)
+            except OSError:
+                pass
+            self._path = None
+        self.source = None
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def current_rss_mb():
+    """Resident set size of this process in MiB (Linux /proc, else peak RSS)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        # ru_maxrss is KiB on Linux, bytes on macOS; only reached off Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**20
+
+
+@contextmanager
+def measure_memory(stats):
+    """
+    Record process RSS around the wrapped extraction into `stats`: peak_mb is the
+    largest RSS growth seen at a checkpoint, steady_mb the summed RSS growth left
+    after the documents were closed, rss_mb the latest process RSS.
+    RSS covers the whole server process: extractions running at the same time in
+    other sessions are counted too, so the figures are an upper bound for these
+    uploads, not a per-session measurement.
+    Yields a checkpoint() callable to sample RSS while documents are still open.
+    """
+    before = current_rss_mb()
+    peak = [before]
+
+    def checkpoint():
+        peak[0] = max(peak[0], current_rss_mb())
+
+    try:
+        yield checkpoint
+    finally:
+        after = current_rss_mb()
+        stats["uploads"] = stats.get("uploads", 0) + 1
+        stats["peak_mb"] = max(stats.get("peak_mb", 0.0), max(peak[0], after) - before)
+        stats["steady_mb"] = stats.get("steady_mb", 0.0) + after - before
+        stats["rss_mb"] = after
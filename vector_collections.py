@@ -0,0 +1,293 @@
+"""
+Per-document-pair vector collections shared safely by concurrent sessions.
+
+All Streamlit sessions of a server process talk to the same in-process Chroma
+backend, so one fixed collection name mixes every recruiter's chunks and nothing
+is ever deleted. CollectionPool gives each (embedding model, JD, resume) triple its
+own collection, named from a digest of the contents, and tracks which sessions use
+it:
+
+    pool = CollectionPool(drop=lambda store: store.delete_collection())
+    name = collection_name(model, jd_text, resume_text)
+    store = pool.acquire(session_id, name, lambda name: (build(name), nbytes))
+
+Sessions indexing identical documents share one collection (its contents are the
+same, and retrieval only reads it). A session holds one collection at a time:
+acquiring another releases the previous one. A collection is dropped when
+    idle            nobody holds it and it was not used for idle_seconds
+    abandoned       its sessions stopped using it for lease_seconds (Streamlit
+                    does not report closed browser tabs)
+    over the ceiling  the estimated size of all collections exceeds max_bytes;
+                    least recently used first. A collection a session still
+                    holds is never dropped under it: it is marked and dropped
+                    when its last holder releases it.
+A session whose collection was dropped rebuilds it on its next acquire().
+Builds are single-flight per collection name: concurrent sessions with the same
+documents wait for one build, and a name is never built while a store of that name
+exists (Chroma deletes collections by name).
+
+Run this module directly for a simulation of concurrent sessions:
+    python vector_collections.py
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+
+COLLECTION_PREFIX = "jobfit_"
+DEFAULT_IDLE_SECONDS = 15 * 60
+DEFAULT_LEASE_SECONDS = 2 * 60 * 60
+DEFAULT_MAX_BYTES = int(os.getenv("VECTOR_COLLECTIONS_MAX_MB", 512)) * 2 ** 20
+# Size estimate: Chroma keeps each chunk's text, metadata and full-text index,
+# and an HNSW node with its float32 vector
+BYTES_PER_CHAR = 3
+CHUNK_OVERHEAD_BYTES = 2_048
+ESTIMATE_CHUNK_CHARS = 1_500
+
+
+def collection_name(*parts):
+    """Chroma-safe collection name from a digest of `parts` (model, texts, ...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return f"{COLLECTION_PREFIX}{digest.hexdigest()[:32]}"
+
+
+def estimate_collection_bytes(chars, dim=384):
+    """Rough memory of a collection holding `chars` characters of chunked text."""
+    chunks = max(1, -(-chars // ESTIMATE_CHUNK_CHARS))
+    return chars * BYTES_PER_CHAR + chunks * (dim * 4 * 2 + CHUNK_OVERHEAD_BYTES)
+
+
+class _Entry:
+    __slots__ = ("store", "nbytes", "holders", "last_used", "doomed")
+
+    def __init__(self, store, nbytes, now):
+        self.store = store
+        self.nbytes = nbytes
+        self.holders = set()
+        self.last_used = now
+        self.doomed = False  # over the ceiling: dropped when the last holder releases it
+
+
+class CollectionPool:
+    """Reference-counted vector collections with idle eviction and a memory ceiling."""
+
+    def __init__(self, drop, max_bytes=DEFAULT_MAX_BYTES, idle_seconds=DEFAULT_IDLE_SECONDS,
+                 lease_seconds=DEFAULT_LEASE_SECONDS, clock=time.monotonic):
+        self.drop = drop
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self._lock = threading.RLock()
+        self._entries = {}   # name -> _Entry
+        self._sessions = {}  # session id -> name
+        self._build_locks = {}  # name -> [lock, sessions using it]
+        self.evictions = 0
+
+    def _evict(self, name):
+        # Called with self._lock held, so nobody builds `name` until drop() returns
+        entry = self._entries.pop(name)
+        for session_id in entry.holders:
+            self._sessions.pop(session_id, None)
+        self.evictions += 1
+        self.drop(entry.store)
+
+    def evict_expired(self):
+        """Drop idle and abandoned collections; returns their names."""
+        with self._lock:
+            now = self.clock()
+            expired = [
+                name for name, entry in self._entries.items()
+                if now - entry.last_used > (self.lease_seconds if entry.holders else self.idle_seconds)
+            ]
+            for name in expired:
+                self._evict(name)
+            return expired
+
+    def _make_room(self, keep):
+        # Least recently used first; held collections are only marked for a later drop
+        total = sum(entry.nbytes for entry in self._entries.values() if not entry.doomed)
+        victims = sorted(
+            (name for name, entry in self._entries.items() if name != keep and not entry.doomed),
+            key=lambda name: (bool(self._entries[name].holders), self._entries[name].last_used),
+        )
+        for name in victims:
+            if total <= self.max_bytes:
+                break
+            entry = self._entries[name]
+            total -= entry.nbytes
+            if entry.holders:
+                entry.doomed = True
+            else:
+                self._evict(name)
+
+    def _hold(self, session_id, name):
+        previous = self._sessions.get(session_id)
+        if previous != name:
+            self.release(session_id)
+        entry = self._entries[name]
+        entry.holders.add(session_id)
+        entry.last_used = self.clock()
+        self._sessions[session_id] = name
+        return entry.store
+
+    def acquire(self, session_id, name, build):
+        """
+        The collection `name` for a session, built with build(name) -> (store, nbytes)
+        if it does not exist. Returns None when build returns no store.
+        """
+        self.evict_expired()
+        with self._lock:
+            if name in self._entries:
+                return self._hold(session_id, name)
+            # The lock lives while any session waits on it, so two builds of a name never overlap
+            build_lock = self._build_locks.setdefault(name, [threading.Lock(), 0])
+            build_lock[1] += 1
+        try:
+            with build_lock[0]:
+                with self._lock:
+                    # Another session may have built it while this one waited
+                    if name in self._entries:
+                        return self._hold(session_id, name)
+                store, nbytes = build(name)
+                if store is None:
+                    return None
+                with self._lock:
+                    self._entries[name] = _Entry(store, nbytes, self.clock())
+                    store = self._hold(session_id, name)
+                    self._make_room(keep=name)
+                    return store
+        finally:
+            with self._lock:
+                build_lock[1] -= 1
+                if not build_lock[1]:
+                    del self._build_locks[name]
+
+    def release(self, session_id):
+        """Stop holding the session's collection; it stays until it goes idle."""
+        with self._lock:
+            name = self._sessions.pop(session_id, None)
+            entry = self._entries.get(name)
+            if entry is not None:
+                entry.holders.discard(session_id)
+                entry.last_used = self.clock()
+                if entry.doomed and not entry.holders:
+                    self._evict(name)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "collections": len(self._entries),
+                "sessions": len(self._sessions),
+                "bytes": sum(entry.nbytes for entry in self._entries.values()),
+                "held_bytes": sum(entry.nbytes for entry in self._entries.values() if entry.holders),
+                "pending_drops": sum(entry.doomed for entry in self._entries.values()),
+                "evictions": self.evictions,
+            }
+
+
+def benchmark(recruiters=60, documents=40, rounds=2_000, max_mb=2, seed=5):
+    rng = random.Random(seed)
+    now = [0.0]
+    live = {}
+    held = {}  # recruiter -> collection name it holds
+
+    def build(name):
+        # Chroma collections are addressed by name: never build one that exists
+        assert name not in live, name
+        time.sleep(0.0005)  # stands in for chunking and embedding
+        live[name] = {"name": name}
+        return live[name], estimate_collection_bytes(rng.randint(8_000, 40_000))
+
+    def drop(store):
+        assert store["name"] not in held.values(), "dropped a collection a session holds"
+        del live[store["name"]]
+
+    pool = CollectionPool(drop, max_bytes=max_mb * 2 ** 20, idle_seconds=900, lease_seconds=7_200,
+                          clock=lambda: now[0])
+    pairs = [(f"jd {i % 10}", f"resume {i}") for i in range(documents)]
+    peak = peak_idle = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        now[0] += rng.expovariate(1 / 5)
+        recruiter = rng.randrange(recruiters)
+        jd, resume = rng.choice(pairs)
+        name = collection_name("bge-small", jd, resume)
+        built = name not in live
+        held.pop(recruiter, None)  # acquire() releases the previous collection
+        store = pool.acquire(recruiter, name, build)
+        held[recruiter] = name
+        # No cross-talk: every session reads the collection of its own documents
+        assert store["name"] == name and store is live[name]
+        stats = pool.stats()
+        peak = max(peak, stats["bytes"])
+        if built:
+            # Only collections in use may keep the pool over its ceiling
+            peak_idle = max(peak_idle, stats["bytes"] - stats["held_bytes"])
+        if rng.random() < 0.05:
+            held.pop(recruiter)
+            pool.release(recruiter)
+    elapsed = time.perf_counter() - started
+    stats = pool.stats()
+    print(f"{rounds} requests from {recruiters} recruiters over {len(pairs)} document pairs "
+          f"in {elapsed:.2f}s ({elapsed / rounds * 1000:.2f} ms each, builds included)")
+    print(f"  {stats['collections']} collections live, peak {peak / 2 ** 20:.1f} MB, unheld after a build "
+          f"at most {peak_idle / 2 ** 20:.1f} MB (ceiling {max_mb} MB), {stats['evictions']} evictions, "
+          f"{stats['pending_drops']} waiting for their holders")
+    assert peak_idle <= max_mb * 2 ** 20
+
+    held.clear()
+    now[0] += 3 * 60 * 60
+    pool.evict_expired()
+    print(f"  after 3 idle hours: {pool.stats()['collections']} collections, {len(live)} live stores")
+    assert not live
+
+    # Concurrent sessions opening the same documents share one build
+    builds = []
+
+    def counted_build(name):
+        builds.append(name)
+        return build(name)
+
+    threads = [threading.Thread(target=pool.acquire, args=(f"s{i}", "jobfit_shared", counted_build))
+               for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"  20 concurrent sessions on one document pair: {len(builds)} build, "
+          f"{pool.stats()['sessions']} holders")
+    assert len(builds) == 1
+
+    # Eviction racing rebuilds: sessions switch between a few collections under a tiny ceiling
+    for session_id in [f"s{i}" for i in range(20)]:
+        pool.release(session_id)
+    errors = []
+    tiny = CollectionPool(lambda store: live.pop(store["name"]), max_bytes=1, clock=time.monotonic)
+
+    def churn(session_id, seed):
+        churn_rng = random.Random(seed)
+        try:
+            for _ in range(200):
+                tiny.acquire(session_id, f"jobfit_{churn_rng.randrange(4)}", build)
+                if churn_rng.random() < 0.3:
+                    tiny.release(session_id)
+        except AssertionError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=churn, args=(f"c{i}", i)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"  8 sessions churning 4 collections under a 1-byte ceiling: {tiny.stats()['evictions']} evictions, "
+          f"no collection built while a store of its name existed")
+    assert not errors, errors[0]
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,291 @@
+"""
+Compact in-memory vector search over embeddings of the candidate pool.
+
+A 384-dimension FastEmbed vector takes 1.5 KB at float32, so millions of resume
+chunks outgrow the RAM of one node. QuantizedVectorIndex keeps the searchable
+copy of the vectors in one of these precisions:
+
+    float32  exact, 4 bytes per dimension (what Chroma keeps)
+    float16  2 bytes per dimension
+    int8     1 byte per dimension plus one float32 scale per vector
+    pq       product quantization: one byte per subspace (96 bytes for 384
+             dimensions); the best rerank * k candidates are re-scored against the
+             exact vectors, which stay on disk in a memory-mapped file
+
+    index = QuantizedVectorIndex(dim=384, precision="pq")
+    index.train(sample_vectors)                  # pq only: learns the codebooks
+    index.add(file_hashes, vectors)              # or from_candidate_store(store, model)
+    for key, score in index.search(query_vector, k=10):
+        ...
+
+Vectors are normalized on the way in and scores are cosine similarities. Scoring
+is a brute-force scan; float16 and int8 rows are converted to float32 in blocks of
+SEARCH_BLOCK_ROWS, so a search needs no full-precision copy of the pool.
+
+Run this module directly for the memory / latency / recall@K tradeoff on a
+synthetic clustered pool:
+    python vector_quantization.py
+"""
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+PRECISIONS = ("float32", "float16", "int8", "pq")
+# Centroids per PQ subspace, so that a code fits in one byte
+PQ_CENTROIDS = 256
+# Dimensions per PQ subspace when the number of subspaces is not given
+PQ_SUBSPACE_DIMS = 4
+# PQ candidates re-scored against the exact vectors, as a multiple of k
+DEFAULT_RERANK = 4
+KMEANS_ITERATIONS = 10
+# Vectors sampled from the training set to learn the PQ codebooks
+TRAIN_SAMPLE = 10_000
+# Rows assigned to PQ centroids at a time
+ENCODE_BLOCK_ROWS = 16_384
+# Rows converted to float32 at a time; small enough for the buffer to stay in cache
+SEARCH_BLOCK_ROWS = 1_024
+
+
+def normalize(vectors):
+    """Rows of `vectors` scaled to unit length, as float32."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def _kmeans(points, clusters, iterations, rng):
+    centroids = points[rng.choice(len(points), clusters, replace=len(points) < clusters)].copy()
+    for _ in range(iterations):
+        # Squared distances without the constant |x|^2 term
+        distances = (centroids ** 2).sum(axis=1) - 2 * points @ centroids.T
+        assignment = distances.argmin(axis=1)
+        counts = np.bincount(assignment, minlength=clusters)
+        sums = np.stack([np.bincount(assignment, weights=points[:, d], minlength=clusters)
+                         for d in range(points.shape[1])], axis=1).astype(np.float32)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        # Re-seed empty clusters with random points
+        centroids[empty] = points[rng.choice(len(points), int(empty.sum()))]
+    return centroids
+
+
+class QuantizedVectorIndex:
+    """Keyed vectors stored at a reduced precision, searched by cosine similarity."""
+
+    def __init__(self, dim, precision="int8", subspaces=None, rerank=None, exact_path=None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"precision must be one of {PRECISIONS}, not {precision!r}")
+        self.dim = dim
+        self.precision = precision
+        self.subspaces = subspaces or max(1, dim // PQ_SUBSPACE_DIMS)
+        if precision == "pq" and dim % self.subspaces:
+            raise ValueError(f"{dim} dimensions cannot be split into {self.subspaces} subspaces")
+        self.rerank = (DEFAULT_RERANK if precision == "pq" else 0) if rerank is None else rerank
+        self.codebooks = None  # (subspaces, PQ_CENTROIDS, dim // subspaces), pq only
+        # Shared by the sessions of a server: searches and additions do not interleave
+        self._lock = threading.RLock()
+        self._keys = []
+        self._key_set = set()
+        self._blocks = []      # pending additions, concatenated on the next search
+        self._scale_blocks = []
+        self._data = None
+        self._scales = None
+        self._exact_file = None
+        self._exact = None
+        if self.rerank:
+            # Exact vectors for re-ranking live on disk; only the candidates are read
+            self._exact_file = open(exact_path, "w+b") if exact_path else tempfile.TemporaryFile()
+
+    @classmethod
+    def from_candidate_store(cls, store, model, precision="int8", **kwargs):
+        """Index of the `model` embeddings in a CandidateStore, keyed by file hash."""
+        file_hashes, matrix = store.get_embeddings(model)
+        if not file_hashes:
+            raise ValueError(f"No {model} embeddings in the candidate store")
+        index = cls(matrix.shape[1], precision, **kwargs)
+        index.add(file_hashes, matrix)
+        return index
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._key_set
+
+    @property
+    def nbytes(self):
+        """Bytes of RAM held by the searchable vectors (keys excluded)."""
+        with self._lock:
+            self._compact()
+            total = 0 if self._data is None else self._data.nbytes
+            total += 0 if self._scales is None else self._scales.nbytes
+            total += 0 if self.codebooks is None else self.codebooks.nbytes
+            return total
+
+    def train(self, vectors, iterations=KMEANS_ITERATIONS, seed=0):
+        """Learn the PQ codebooks from a sample of the vectors (a no-op otherwise)."""
+        if self.precision != "pq":
+            return
+        rng = np.random.default_rng(seed)
+        vectors = normalize(vectors)
+        if len(vectors) > TRAIN_SAMPLE:
+            vectors = vectors[rng.choice(len(vectors), TRAIN_SAMPLE, replace=False)]
+        width = self.dim // self.subspaces
+        self.codebooks = np.stack([
+            _kmeans(vectors[:, j * width:(j + 1) * width], PQ_CENTROIDS, iterations, rng)
+            for j in range(self.subspaces)
+        ])
+
+    def _encode(self, vectors):
+        if self.precision == "float32":
+            return vectors, None
+        if self.precision == "float16":
+            return vectors.astype(np.float16), None
+        if self.precision == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127
+            scales[scales == 0] = 1
+            return np.rint(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+        width = self.dim // self.subspaces
+        codes = np.empty((len(vectors), self.subspaces), dtype=np.uint8)
+        for j, centroids in enumerate(self.codebooks):
+            part = vectors[:, j * width:(j + 1) * width]
+            squared = (centroids ** 2).sum(axis=1)
+            for start in range(0, len(part), ENCODE_BLOCK_ROWS):
+                block = part[start:start + ENCODE_BLOCK_ROWS]
+                codes[start:start + len(block), j] = (squared - 2 * block @ centroids.T).argmin(axis=1)
+        return codes, None
+
+    def add(self, keys, vectors):
+        """
+        Add vectors (one row per key); pq indexes are trained on them if untrained.
+        Keys already in the index are skipped.
+        """
+        keys = list(keys)
+        vectors = normalize(vectors)
+        if len(keys) != len(vectors) or vectors.shape[1] != self.dim:
+            raise ValueError(f"expected {len(keys)} vectors of {self.dim} dimensions, got {vectors.shape}")
+        with self._lock:
+            new = [i for i, key in enumerate(keys) if key not in self._key_set]
+            if len(new) < len(keys):
+                keys, vectors = [keys[i] for i in new], vectors[new]
+            if not keys:
+                return
+            if self.precision == "pq" and self.codebooks is None:
+                self.train(vectors)
+            data, scales = self._encode(vectors)
+            self._keys.extend(keys)
+            self._key_set.update(keys)
+            self._blocks.append(data)
+            if scales is not None:
+                self._scale_blocks.append(scales)
+            if self._exact_file is not None:
+                self._exact_file.seek(0, 2)
+                self._exact_file.write(vectors.tobytes())
+                self._exact_file.flush()
+                self._exact = None
+
+    def _compact(self):
+        if self._blocks:
+            blocks = ([self._data] if self._data is not None else []) + self._blocks
+            self._data = np.concatenate(blocks)
+            if self.precision == "pq":
+                # Column-major, so each subspace's codes are contiguous for the lookups
+                self._data = np.asfortranarray(self._data)
+            if self._scale_blocks:
+                scales = ([self._scales] if self._scales is not None else []) + self._scale_blocks
+                self._scales = np.concatenate(scales)
+            self._blocks, self._scale_blocks = [], []
+        if self._exact_file is not None and self._exact is None and self._keys:
+            self._exact = np.memmap(self._exact_file, dtype=np.float32, mode="r", shape=(len(self._keys), self.dim))
+
+    def _scores(self, query):
+        data = self._data
+        if self.precision == "pq":
+            width = self.dim // self.subspaces
+            # Similarity of each query subvector to each centroid: (subspaces, PQ_CENTROIDS)
+            table = np.einsum("mcd,md->mc", self.codebooks, query.reshape(self.subspaces, width))
+            scores = np.zeros(len(data), dtype=np.float32)
+            for j in range(self.subspaces):
+                scores += table[j].take(data[:, j])
+            return scores
+        if self.precision == "float32":
+            return data @ query
+        scores = np.empty(len(data), dtype=np.float32)
+        buffer = np.empty((SEARCH_BLOCK_ROWS, self.dim), dtype=np.float32)
+        for start in range(0, len(data), SEARCH_BLOCK_ROWS):
+            block = data[start:start + SEARCH_BLOCK_ROWS]
+            np.copyto(buffer[:len(block)], block)
+            scores[start:start + len(block)] = buffer[:len(block)] @ query
+        if self._scales is not None:
+            scores *= self._scales
+        return scores
+
+    def search(self, query, k=10):
+        """[(key, score)] of the `k` most similar vectors, best first."""
+        if self.precision == "pq" and self.codebooks is None:
+            raise ValueError("train() the pq index before searching it")
+        query = normalize(query)[0]
+        with self._lock:
+            self._compact()
+            if not self._keys:
+                return []
+            scores = self._scores(query)
+            k = min(k, len(scores))
+            shortlist = min(len(scores), k * self.rerank) if self.rerank else k
+            top = np.argpartition(-scores, shortlist - 1)[:shortlist]
+            if self.rerank:
+                # Sorted reads keep the memory-mapped access sequential
+                top = np.sort(top)
+                scores = dict(zip(top.tolist(), (self._exact[top] @ query).tolist()))
+                top = np.array(sorted(scores, key=scores.get, reverse=True)[:k])
+                return [(self._keys[i], scores[i]) for i in top.tolist()]
+            top = top[np.argsort(-scores[top], kind="stable")]
+            return [(self._keys[i], float(scores[i])) for i in top.tolist()]
+
+    def close(self):
+        with self._lock:
+            if self._exact_file is not None:
+                self._exact = None
+                self._exact_file.close()
+                self._exact_file = None
+
+
+def _synthetic_embeddings(rng, count, dim, topics=2_000, spread=0.6):
+    # Chunks cluster around topics (roles, stacks, domains), like resume embeddings
+    centers = normalize(rng.standard_normal((topics, dim), dtype=np.float32))
+    vectors = centers[rng.integers(topics, size=count)]
+    vectors += spread / np.sqrt(dim) * rng.standard_normal((count, dim), dtype=np.float32)
+    return normalize(vectors)
+
+
+def benchmark(pool_size=100_000, dim=384, queries=100, k=10):
+    rng = np.random.default_rng(5)
+    # Queries come from the same topics as the pool but are not in it
+    vectors = _synthetic_embeddings(rng, pool_size + queries, dim)
+    vectors, query_vectors = vectors[:pool_size], vectors[pool_size:]
+    keys = range(pool_size)
+    truth = [set(np.argpartition(-(vectors @ query), k)[:k].tolist()) for query in query_vectors]
+
+    print(f"{pool_size} vectors x {dim} dims, {queries} queries, recall@{k} against exact search")
+    print(f"{'index':>24}{'RAM MB':>9}{'build s':>9}{'ms/query':>10}{'recall':>8}")
+    configs = [("float32", {}), ("float16", {}), ("int8", {}),
+               ("pq", {"rerank": 0}), ("pq", {}), ("pq", {"subspaces": dim // 8})]
+    for precision, options in configs:
+        started = time.perf_counter()
+        index = QuantizedVectorIndex(dim, precision, **options)
+        index.add(keys, vectors)
+        index.search(query_vectors[0], k)  # compacts the blocks
+        build = time.perf_counter() - started
+        started = time.perf_counter()
+        hits = [index.search(query, k) for query in query_vectors]
+        latency = (time.perf_counter() - started) / queries * 1000
+        recall = np.mean([len(truth[i] & {key for key, _ in hit}) / k for i, hit in enumerate(hits)])
+        label = precision if precision != "pq" else f"pq{index.subspaces} rerank x{index.rerank}"
+        print(f"{label:>24}{index.nbytes / 2**20:>9.1f}{build:>9.1f}{latency:>10.2f}{recall:>8.3f}")
+        index.close()
+
+
+if __name__ == "__main__":
+    benchmark()